@@ -39,7 +39,7 @@ import { resolveMaxBytesForFile, resolveMaxDepthCap, resolveMaxFilesCap, isIndex
 import { startChokidarWatcher } from './watch/backends/chokidar.js';
 import { startParcelWatcher } from './watch/backends/parcel.js';
 import { createWatchAttemptManager } from './watch/attempts.js';
-import { normalizeRoot } from './watch/shared.js';
+import { normalizeRoot, WATCH_EVENTS_LOST } from './watch/shared.js';
 import { isCodeEntryForPath, isProseEntryForPath } from './mode-routing.js';
 import { detectShebangLanguage } from './shebang.js';
 import { isWithinRoot, toRealPathSync } from '../../workspace/identity.js';
@@ -53,6 +53,10 @@ export { createDebouncedScheduler, acquireIndexLockWithBackoff };
 
 const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
+const isSameStat = (a, b) => Boolean(a && b)
+  && Number(a.size) === Number(b.size)
+  && Number(a.mtimeMs) === Number(b.mtimeMs);
+
 /**
  * Watch for file changes and rebuild indexes incrementally.
  * @param {{runtime:object,modes:string[],pollMs:number,debounceMs:number,abortSignal?:AbortSignal|null,handleSignals?:boolean,deps?:object,onReady?:Function}} input
@@ -133,6 +137,12 @@ export async function watchIndex({
   let stabilityGuard = null;
   let updateScheduled = false;
   let updateRunning = false;
+  let rescanRunning = false;
+  let rescanPending = false;
+  const eventReceivedAt = new Map();
+  let lagSamples = 0;
+  let lagTotalMs = 0;
+  let lagMaxMs = 0;
 
   const stop = () => {
     if (resolveExit) {
@@ -426,6 +436,25 @@ export async function watchIndex({
     };
   };
 
+  /**
+   * Record how long after the file's mtime the watcher delivered its event.
+   *
+   * @param {string} absPath
+   * @param {import('node:fs').Stats|undefined} stat
+   * @returns {void}
+   */
+  const noteEventLag = (absPath, stat) => {
+    const receivedAt = eventReceivedAt.get(absPath);
+    if (receivedAt == null) return;
+    eventReceivedAt.delete(absPath);
+    const mtimeMs = Number(stat?.mtimeMs);
+    if (!Number.isFinite(mtimeMs)) return;
+    const lagMs = Math.max(0, receivedAt - mtimeMs);
+    lagSamples += 1;
+    lagTotalMs += lagMs;
+    lagMaxMs = Math.max(lagMaxMs, lagMs);
+  };
+
   /**
    * Reconcile one absolute path across all active modes and update tracked
    * entry/skip maps while maintaining cross-mode reference counts.
@@ -436,6 +465,7 @@ export async function watchIndex({
   const updateTrackedEntry = async (absPath) => {
     const beforeCount = trackedCounts.get(absPath) || 0;
     const classification = await classifyPath(absPath);
+    noteEventLag(absPath, classification.stat);
     if (classification.skip) {
       if (beforeCount > 0) removeEntryFromModes(absPath);
       for (const mode of modes) {
@@ -554,6 +584,15 @@ export async function watchIndex({
       if (queuedPathsAtStart > 0) {
         log(`[watch] Rebuilding index for ${queuedPathsAtStart} change(s)...`);
       }
+      if (lagSamples > 0) {
+        log(
+          `[watch] Event lag: avg ${Math.round(lagTotalMs / lagSamples)}ms, `
+          + `max ${Math.round(lagMaxMs)}ms over ${lagSamples} event(s).`
+        );
+        lagSamples = 0;
+        lagTotalMs = 0;
+        lagMaxMs = 0;
+      }
       await initBuildState({
         buildRoot: attemptRuntime.buildRoot,
         buildId: attemptRuntime.buildId,
@@ -785,8 +824,7 @@ export async function watchIndex({
     }
   };
 
-  const skippedByMode = {};
-  const discoveredByMode = await resolvedDeps.discoverFilesForModes({
+  const discoverTrackedFiles = (skippedByMode) => resolvedDeps.discoverFilesForModes({
     root,
     modes,
     recordsDir: runtimeRef.recordsDir,
@@ -802,6 +840,64 @@ export async function watchIndex({
     maxDepth: maxDepthCap,
     maxFiles: maxFilesCap
   });
+
+  const findTrackedEntry = (absPath) => {
+    for (const map of trackedEntriesByMode.values()) {
+      const entry = map.get(absPath);
+      if (entry) return entry;
+    }
+    return null;
+  };
+
+  /**
+   * Recover from lost watcher events: walk the tree once and queue only the
+   * files whose size/mtime differ from tracked state, plus tracked files that
+   * no longer exist. Unchanged files are not re-read or rebuilt.
+   *
+   * @returns {Promise<void>}
+   */
+  const rescanAfterOverflow = async () => {
+    if (rescanRunning) {
+      rescanPending = true;
+      return;
+    }
+    rescanRunning = true;
+    try {
+      do {
+        rescanPending = false;
+        const discovered = await discoverTrackedFiles({});
+        const seen = new Set();
+        let queued = 0;
+        for (const mode of modes) {
+          const entries = Array.isArray(discovered[mode]) ? discovered[mode] : [];
+          for (const entry of entries) {
+            if (!entry?.abs || seen.has(entry.abs)) continue;
+            seen.add(entry.abs);
+            if (isSameStat(findTrackedEntry(entry.abs)?.stat, entry.stat)) continue;
+            queued += 1;
+            void recordAddOrChange(entry.abs);
+          }
+        }
+        for (const absPath of Array.from(trackedFiles)) {
+          if (seen.has(absPath)) continue;
+          try {
+            await fs.lstat(absPath);
+            continue;
+          } catch {}
+          queued += 1;
+          recordRemove(absPath);
+        }
+        log(`[watch] Rescan after lost events queued ${queued} change(s).`);
+      } while (rescanPending && !shouldExit);
+    } catch (err) {
+      log(`[watch] Rescan failed: ${err?.message || err}`);
+    } finally {
+      rescanRunning = false;
+    }
+  };
+
+  const skippedByMode = {};
+  const discoveredByMode = await discoverTrackedFiles(skippedByMode);
   for (const mode of modes) {
     const entries = Array.isArray(discoveredByMode[mode]) ? discoveredByMode[mode] : [];
     const modeMap = ensureModeMap(mode);
@@ -849,14 +945,23 @@ export async function watchIndex({
     incWatchEvent(event?.type || 'unknown');
     recordBurst();
     if (event?.type === 'unlink') {
+      eventReceivedAt.delete(event.absPath);
       recordRemove(event.absPath);
       return;
     }
+    if (event?.absPath) eventReceivedAt.set(event.absPath, Date.now());
     void recordAddOrChange(event.absPath);
   };
   const handleError = (err) => {
+    const message = err?.message || String(err);
+    if (err?.code === WATCH_EVENTS_LOST) {
+      incWatchEvent('overflow');
+      log(`[watch] Watcher lost events (${message}); rescanning for changes.`);
+      void rescanAfterOverflow();
+      return;
+    }
     incWatchEvent('error');
-    log(`[watch] Watcher error: ${err?.message || err}`);
+    log(`[watch] Watcher error: ${message}`);
   };
   const ignored = buildIgnoredMatcher({ root, ignoreMatcher });
   const watcher = resolvedDeps.startWatcher
@@ -1,4 +1,15 @@
 import { tryRequire } from '../../../../shared/optional-deps.js';
+import { markEventsLost } from '../shared.js';
+
+/**
+ * @parcel/watcher reports lost events as plain errors with these fixed
+ * messages (FSEvents dropped events, Windows ReadDirectoryChangesW buffer
+ * overflow); it exposes no error code.
+ */
+const PARCEL_EVENTS_LOST_MESSAGES = new Set([
+  'Events were dropped by the FSEvents client. File system must be re-scanned.',
+  'Buffer overflow. Some events may have been lost.'
+]);
 
 const mapParcelEvent = (type) => {
   if (type === 'create') return 'add';
@@ -22,7 +33,7 @@ export async function startParcelWatcher({ root, ignored, onEvent, onError }) {
     root,
     (err, events) => {
       if (err) {
-        onError?.(err);
+        onError?.(PARCEL_EVENTS_LOST_MESSAGES.has(err?.message) ? markEventsLost(err) : err);
         return;
       }
       if (!Array.isArray(events)) return;
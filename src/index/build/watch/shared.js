@@ -6,3 +6,15 @@ export const normalizeRoot = (value) => {
   const resolved = path.resolve(value || '');
   return process.platform === 'win32' ? resolved.toLowerCase() : resolved;
 };
+
+/**
+ * Error code backends attach when the native watcher reports that events were
+ * lost, so tracked state has to be reconciled from disk.
+ */
+export const WATCH_EVENTS_LOST = 'WATCH_EVENTS_LOST';
+
+export const markEventsLost = (err) => {
+  const error = err instanceof Error ? err : new Error(String(err));
+  error.code = WATCH_EVENTS_LOST;
+  return error;
+};
@@ -1,6 +1,6 @@
 import { getToolVersion } from '../../shared/dict-utils.js';
 
-export const MCP_SCHEMA_VERSION = '1.3.0';
+export const MCP_SCHEMA_VERSION = '1.4.0';
 
 /**
  * Build MCP tool definitions for the server.
@@ -54,7 +54,7 @@ export function getToolDefs(defaultModelId) {
           repoPath: { type: 'string', description: 'Repo path (defaults to server cwd).' },
           query: { type: 'string' },
           mode: { type: 'string', enum: ['both', 'code', 'prose', 'extracted-prose', 'records', 'all'] },
-          backend: { type: 'string', enum: ['memory', 'sqlite', 'sqlite-fts'] },
+          backend: { type: 'string', enum: ['memory', 'sqlite', 'sqlite-fts', 'lmdb'] },
           output: { type: 'string', enum: ['compact', 'full'], description: 'Return compact JSON (default) or full payload.' },
           ann: { type: 'boolean', description: 'Enable ANN re-ranking (default uses config).' },
           allowSparseFallback: { type: 'boolean', description: 'Allow ANN fallback when sparse-only is requested but sparse is unavailable.' },
@@ -22,7 +22,7 @@ const STATUSES = new Set(['ok', 'error', 'unknown']);
 const ANN = new Set(['on', 'off', 'unknown']);
 const POOLS = new Set(['tokenize', 'quantize', 'watch', 'unknown']);
 const TASKS = new Set(['tokenize', 'quantize', 'unknown']);
-const WATCH_EVENTS = new Set(['add', 'change', 'unlink', 'error', 'unknown']);
+const WATCH_EVENTS = new Set(['add', 'change', 'unlink', 'error', 'overflow', 'unknown']);
 const DEBOUNCE = new Set(['scheduled', 'fired', 'canceled', 'unknown']);
 const CACHES = new Set(['query', 'embedding', 'output', 'repo', 'index', 'sqlite', 'query-plan', 'unknown']);
 
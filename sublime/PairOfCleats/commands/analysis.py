@@ -618,10 +618,12 @@ def _record_analysis_session(window, kind, session):
 def _load_analysis_session(window, source):
     source = _normalize_analysis_kind(source)
     if source == 'risk-explain':
-        return results_state.get_last_risk_explain(window)
-    if source == 'context-pack':
-        return results_state.get_last_context_pack(window)
-    return results_state.get_last_analysis(window, source)
+        session = results_state.get_last_risk_explain(window)
+    elif source == 'context-pack':
+        session = results_state.get_last_context_pack(window)
+    else:
+        session = results_state.get_last_analysis(window, source)
+    return results_state.load_session(window, session)
 
 
 def _has_any_analysis_session(window):
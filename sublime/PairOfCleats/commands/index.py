@@ -3,8 +3,10 @@ import sublime_plugin
 
 from ..lib import config
 from ..lib import index_state
+from ..lib import index_status
 from ..lib import indexing
 from ..lib import paths
+from ..lib import result_cache
 from ..lib import runner
 from ..lib import ui
 from ..lib import watch
@@ -55,8 +57,12 @@ def _run_index_build(window, mode):
         ui.show_status('PairOfCleats: index build started ({0}) for {1}.'.format(mode, repo_root))
 
         def on_done(result):
+            result_cache.invalidate(repo_root)
             if result.returncode == 0:
                 index_state.record_last_build(window, mode)
+            index_status.refresh(repo_root)
+            index_status.paint_window(window)
+            if result.returncode == 0:
                 ui.show_status('PairOfCleats: index build complete ({0}) for {1}.'.format(mode, repo_root))
                 return
             message = result.output.strip() or 'PairOfCleats index build failed.'
@@ -74,6 +80,7 @@ def _run_index_build(window, mode):
             stream_output=True,
             panel_name=INDEX_PANEL
         )
+        index_status.paint_window(window)
 
     _with_mutating_repo_root(window, 'index build', on_repo_root)
 
@@ -105,7 +112,9 @@ def _run_index_watch(window):
             ui.show_status('PairOfCleats: restarting watch ({0}).'.format(watch_root))
 
         mode = settings.get('index_watch_mode') or 'all'
-        poll_ms = settings.get('index_watch_poll_ms')
+        # 0 keeps the event-driven backend; the CLI would otherwise poll.
+        poll_ms = settings.get('index_watch_poll_ms') or 0
+        backend = settings.get('index_watch_backend') or 'parcel'
         debounce_ms = settings.get('index_watch_debounce_ms')
 
         args = indexing.build_index_args(
@@ -120,45 +129,56 @@ def _run_index_watch(window):
         command = cli['command']
         full_args = list(cli.get('args_prefix') or []) + args
         env = config.build_env(settings)
-
-        ui.show_status('PairOfCleats: watch started ({0}).'.format(watch_root))
-
-        token = None
-
-        def on_done(result):
-            current = watch.snapshot(window)
-            if current and current.get('token') != token:
-                return
-            stop_reason = current.get('stopReason') if current else None
-            stopping = bool(current and current.get('stopping'))
-            watch.clear_if_done(window, token=token)
-            if stop_reason == 'restart':
-                return
-            if result.returncode == 0 or stopping:
-                ui.show_status('PairOfCleats: watch stopped.')
-                return
-            message = result.output.strip() or 'PairOfCleats watch failed.'
-            ui.show_error(message)
-
-        handle = runner.run_process(
-            command,
-            full_args,
-            cwd=watch_root,
-            env=env,
-            window=window,
-            title='PairOfCleats index watch',
-            capture_json=False,
-            on_done=on_done,
-            stream_output=True,
-            panel_name=INDEX_PANEL
+        if backend != 'auto':
+            env['PAIROFCLEATS_WATCHER_BACKEND'] = backend
+
+        def launch(owner, on_output, on_exit):
+            def on_done(result):
+                result_cache.invalidate(repo_root)
+                index_status.refresh(repo_root)
+                on_exit(result)
+
+            return runner.run_process(
+                command,
+                full_args,
+                cwd=watch_root,
+                env=env,
+                window=owner,
+                title='PairOfCleats index watch',
+                capture_json=False,
+                on_done=on_done,
+                stream_output=False,
+                panel_name=INDEX_PANEL,
+                on_output=on_output,
+            )
+
+        started = watch.start(
+            window,
+            watch_root,
+            launch,
+            panel_name=INDEX_PANEL,
+            on_change=index_status.paint_window,
+            on_commit=lambda: _on_watch_commit(repo_root),
         )
-        token = watch.register(window, handle, watch_root)
+        if started == 'joined':
+            ui.show_status('PairOfCleats: joined running watch ({0}).'.format(watch_root))
+        else:
+            ui.show_status('PairOfCleats: watch started ({0}).'.format(watch_root))
 
     _with_mutating_repo_root(window, 'index watch', on_repo_root)
 
 
+def _on_watch_commit(repo_root):
+    result_cache.invalidate(repo_root)
+    index_status.refresh(repo_root)
+
+
 def _run_index_watch_stop(window):
+    active_watch = watch.snapshot(window)
     if watch.stop(window, reason='user'):
+        if active_watch and active_watch.get('subscribers', 1) > 1:
+            ui.show_status('PairOfCleats: left shared watch; other windows still use it.')
+            return
         ui.show_status('PairOfCleats: watch stopping...')
     else:
         ui.show_status('PairOfCleats: no watch to stop.')
@@ -1,4 +1,3 @@
-import json
 import os
 import webbrowser
 from urllib.parse import quote, urlparse
@@ -8,6 +7,7 @@ import sublime_plugin
 
 from ..lib import config
 from ..lib import map as map_lib
+from ..lib import map_nodes
 from ..lib import map_state
 from ..lib import paths
 from ..lib import results
@@ -54,7 +54,7 @@ def _has_current_folder(window):
 
 
 def _has_map_state(window):
-    return map_state.get_last_map(window) is not None
+    return map_state.get_last_map_ref(window) is not None
 
 
 def _with_map_repo_root(window, on_resolved, path_hint=None):
@@ -455,17 +455,16 @@ class PairOfCleatsMapSelectionCommand(sublime_plugin.TextCommand):
 
 class PairOfCleatsMapJumpToNodeCommand(sublime_plugin.WindowCommand):
     def is_enabled(self):
-        state = map_state.get_last_map(self.window)
+        state = map_state.get_last_map_ref(self.window)
         if not state:
             return False
-        node_list_path = state.get('nodeListPath')
-        return bool(node_list_path and os.path.exists(node_list_path))
+        return map_nodes.is_available(state.get('nodeListPath'))
 
     def is_visible(self):
         return _has_map_state(self.window)
 
     def run(self):
-        state = map_state.get_last_map(self.window)
+        state = map_state.get_last_map_ref(self.window)
         if not state:
             ui.show_status('PairOfCleats: no map history yet.')
             return
@@ -474,25 +473,14 @@ class PairOfCleatsMapJumpToNodeCommand(sublime_plugin.WindowCommand):
             ui.show_status('PairOfCleats: node list unavailable.')
             return
         try:
-            with open(node_list_path, 'r') as handle:
-                payload = json.load(handle)
+            nodes = map_nodes.get_index(node_list_path)
         except Exception:
             ui.show_error('PairOfCleats: failed to read node list.')
             return
-        nodes = payload.get('nodes') if isinstance(payload, dict) else None
-        if not isinstance(nodes, list) or not nodes:
+        if not len(nodes):
             ui.show_status('PairOfCleats: node list empty.')
             return
 
-        items = []
-        for node in nodes:
-            label = node.get('label') or node.get('id') or '(unnamed node)'
-            file_label = node.get('file') or '(no file)'
-            start_line = node.get('startLine')
-            if isinstance(start_line, int) and start_line > 0:
-                file_label = '{0}:{1}'.format(file_label, start_line)
-            items.append([label, file_label])
-
         repo_root = state.get('repo')
         if not repo_root:
             repo_root, reason = _resolve_repo_root(self.window, allow_fallback=False)
@@ -503,23 +491,18 @@ class PairOfCleatsMapJumpToNodeCommand(sublime_plugin.WindowCommand):
         def on_select(index):
             if index < 0:
                 return
-            node = nodes[index]
-            if not node.get('file'):
+            hit = nodes.hit(index)
+            if not hit.get('file'):
                 ui.show_status('PairOfCleats: selected node has no source location.')
                 return
-            hit = {
-                'file': node.get('file'),
-                'startLine': node.get('startLine'),
-                'endLine': node.get('endLine')
-            }
             results.open_hit(self.window, hit, repo_root=repo_root)
 
-        self.window.show_quick_panel(items, on_select)
+        self.window.show_quick_panel(nodes.items(), on_select)
 
 
 class PairOfCleatsMapOpenLastViewerCommand(sublime_plugin.WindowCommand):
     def is_enabled(self):
-        state = map_state.get_last_map(self.window)
+        state = map_state.get_last_map_ref(self.window)
         if not state:
             return False
         return bool(state.get('outPath') or state.get('browserUrl'))
@@ -528,7 +511,7 @@ class PairOfCleatsMapOpenLastViewerCommand(sublime_plugin.WindowCommand):
         return _has_map_state(self.window)
 
     def run(self):
-        state = map_state.get_last_map(self.window)
+        state = map_state.get_last_map_ref(self.window)
         if not state:
             ui.show_status('PairOfCleats: no map history yet.')
             return
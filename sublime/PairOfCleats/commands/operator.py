@@ -68,7 +68,7 @@ def _start_api_task(window, title, repo_root=None, details=None):
         title,
         kind='api',
         repo_root=repo_root,
-        cancellable=False,
+        cancellable=True,
         details=details or 'Request started.',
         show_panel=True,
     )
@@ -78,6 +78,9 @@ def _run_api(window, title, panel_name, request_fn, render_fn, success_message,
     task = _start_api_task(window, title, repo_root=repo_root, details='Request started.')
 
     def on_done(result):
+        if result.cancelled:
+            tasks.complete_task(window, task, status='cancelled', details=result.error)
+            return
         if result.error:
             tasks.complete_task(window, task, status='failed', details=result.error)
             ui.show_error(result.error)
@@ -87,11 +90,15 @@ def _run_api(window, title, panel_name, request_fn, render_fn, success_message,
         tasks.complete_task(window, task, status='done', details=success_message)
         ui.show_status('PairOfCleats: {0}'.format(success_message))
 
-    api_client.run_async(
+    handle = api_client.run_async(
         request_fn,
         on_done,
         on_progress=lambda message: tasks.note_progress(window, task, details=message),
+        queue_key=window.id(),
+        priority=api_client.PRIORITY_BACKGROUND,
     )
+    if task:
+        task['cancel'] = handle.cancel
 
 
 def _run_cli_json(window, context, title, panel_name, args, render_fn, success_message):
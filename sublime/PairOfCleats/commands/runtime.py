@@ -1,3 +1,4 @@
+import sublime
 import sublime_plugin
 
 from ..lib import tasks
@@ -31,3 +32,23 @@ class PairOfCleatsCancelActiveTaskCommand(sublime_plugin.WindowCommand):
             ui.show_status('PairOfCleats: cancelling {0}.'.format(task.get('title') or 'task'))
             return
         ui.show_status('PairOfCleats: no active cancellable task.')
+
+
+class PairOfCleatsReplacePanelTailCommand(sublime_plugin.TextCommand):
+    def is_visible(self):
+        return False
+
+    def run(self, edit, start=0, characters=''):
+        start = max(0, min(int(start), self.view.size()))
+        self.view.replace(edit, sublime.Region(start, self.view.size()), characters)
+
+
+class PairOfCleatsTrimPanelCommand(sublime_plugin.TextCommand):
+    def is_visible(self):
+        return False
+
+    def run(self, edit, max_lines=0):
+        rows = self.view.rowcol(self.view.size())[0]
+        if max_lines <= 0 or rows <= max_lines:
+            return
+        self.view.erase(edit, sublime.Region(0, self.view.text_point(rows - max_lines, 0)))
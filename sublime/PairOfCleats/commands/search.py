@@ -2,17 +2,30 @@ import sublime
 import sublime_plugin
 
 from ..lib import api_client
+from ..lib import api_service
 from ..lib import config
+from ..lib import federated
 from ..lib import history
+from ..lib import overlay
 from ..lib import paths
+from ..lib import result_cache
 from ..lib import results
 from ..lib import results_state
 from ..lib import runner
 from ..lib import search as search_lib
 from ..lib import tasks
 from ..lib import ui
+from ..lib import worker
 
 LIMIT_CHOICES = [10, 25, 50, 100, 200]
+PAGE_SECTIONS = ('code', 'prose', 'extractedProse', 'records')
+
+LIVE_SEARCH_MIN_CHARS = 2
+LIVE_SEARCH_LIMIT = 20
+
+_RESULT_VIEWS = {}
+_PAGE_REQUESTS = {}
+_LIVE_SEARCHES = {}
 
 
 def _resolve_repo_root(window):
@@ -35,6 +48,10 @@ def _has_last_results(window):
     return results_state.get_last_results(window) is not None
 
 
+def _has_more_results(window):
+    return results.has_more_results(results_state.get_last_results(window))
+
+
 def _has_last_explain(window):
     return results_state.get_last_explain(window) is not None
 
@@ -47,6 +64,13 @@ def _has_last_query(window):
     return history.get_last_query(window) is not None
 
 
+def _apply_unsaved_overlay(window, settings, hits, repo_root, on_done):
+    if not settings.get('search_unsaved_overlay', True):
+        on_done(hits)
+        return
+    overlay.apply(window, hits, repo_root, on_done)
+
+
 def _resolve_defaults(settings, overrides=None):
     overrides = overrides or {}
     mode = overrides.get('mode') or settings.get('index_mode_default') or 'both'
@@ -295,20 +319,36 @@ def _prompt_limit(window, options, on_done):
     window.show_quick_panel(choices, on_limit_select, selected_index=0)
 
 
-def _execute_search(window, query, overrides=None, explain=False):
+def _execute_search(window, query, overrides=None, explain=False, previous=None):
     if not query:
         return
 
+    def finish_page_request():
+        # Let the footer request this page again after a failure.
+        if previous is not None:
+            _PAGE_REQUESTS.pop(window.id(), None)
+
     settings = config.get_settings(window)
     repo_root, reason = _resolve_repo_root(window)
     if not repo_root:
+        finish_page_request()
         ui.show_error('PairOfCleats: {0}'.format(reason))
         return
     if reason:
         ui.show_status('PairOfCleats: {0}'.format(reason))
 
+    settings = api_service.managed_settings(
+        settings,
+        repo_root,
+        on_ready=lambda: _execute_search(window, query, overrides=overrides, explain=explain, previous=previous),
+    )
+    if settings is None:
+        ui.show_status('PairOfCleats: starting local API server...')
+        return
+
     errors = config.validate_settings(settings, repo_root, workflow='search-explain' if explain else 'search')
     if errors:
+        finish_page_request()
         message = 'PairOfCleats settings need attention:\n- {0}'.format(
             '\n- '.join(errors)
         )
@@ -318,10 +358,12 @@ def _execute_search(window, query, overrides=None, explain=False):
     resolved = _resolve_defaults(settings, overrides)
     execution = config.resolve_execution_mode(settings, 'search-explain' if explain else 'search')
     if execution.get('error'):
+        finish_page_request()
         ui.show_error(execution['error'])
         return
 
     def handle_payload(result):
+        finish_page_request()
         if result.returncode != 0:
             message = result.output.strip() or 'PairOfCleats search failed.'
             ui.show_error(message)
@@ -337,7 +379,18 @@ def _execute_search(window, query, overrides=None, explain=False):
             ui.show_error(payload.get('message') or 'PairOfCleats search failed.')
             return
 
-        hits = results.collect_hits(payload)
+        _apply_unsaved_overlay(
+            window,
+            settings,
+            results.collect_hits(payload),
+            repo_root,
+            lambda hits: show_hits(payload, hits),
+        )
+
+    def show_hits(payload, hits):
+        if previous is not None:
+            _show_next_page(window, previous, query, resolved, repo_root, hits, _page_info(payload, resolved, previous))
+            return
         history_limit = settings.get('history_limit')
         history.record_query(window, query, resolved, history_limit)
 
@@ -364,7 +417,14 @@ def _execute_search(window, query, overrides=None, explain=False):
             return
 
         target = _resolve_results_target(settings, len(hits))
-        session = results.build_session(query, resolved, repo_root, hits, target)
+        session = results.build_session(
+            query,
+            resolved,
+            repo_root,
+            hits,
+            target,
+            page=_page_info(payload, resolved),
+        )
         results_state.record_last_results(window, session)
         if target == 'output_panel':
             results.open_output_panel(
@@ -374,7 +434,7 @@ def _execute_search(window, query, overrides=None, explain=False):
             )
             return
         if target == 'new_tab':
-            results.open_results_view(
+            _RESULT_VIEWS[window.id()] = results.open_results_view(
                 window,
                 session.get('text') or results.format_results_text(hits),
                 session=session,
@@ -397,25 +457,36 @@ def _execute_search(window, query, overrides=None, explain=False):
             'PairOfCleats search',
             kind='search',
             repo_root=repo_root,
-            cancellable=False,
+            cancellable=True,
             details='Searching via API...',
             show_panel=bool(settings.get('progress_panel_on_start', True)),
         )
 
+        def on_stream_event(event):
+            # Progress only: the server sends hits in one final result event,
+            # which is rendered once by handle_payload.
+            if event.get('type') == 'progress':
+                sublime.set_timeout(lambda: tasks.note_progress(window, task, details=event.get('message')), 0)
+
         def on_api_done(result):
+            if result.cancelled:
+                tasks.complete_task(window, task, status='cancelled', details=result.error)
+                finish_page_request()
+                return
             if result.error:
                 tasks.complete_task(window, task, status='failed', details=result.error)
                 if execution.get('allow_fallback'):
                     ui.show_status('PairOfCleats: API search failed; falling back to CLI.')
-                    _execute_search_cli(window, query, repo_root, settings, resolved, explain, handle_payload)
+                    _execute_search_cli(window, query, repo_root, settings, resolved, explain, handle_payload, on_cancelled=finish_page_request)
                     return
+                finish_page_request()
                 ui.show_error(result.error)
                 return
             tasks.complete_task(window, task, status='done', details='Search completed via API.')
             handle_payload(_ApiProcessResult(result.payload))
 
-        api_client.run_async(
-            lambda: api_client.search_json(
+        handle = api_client.run_async(
+            lambda: api_client.search_stream_json(
                 execution.get('base_url'),
                 repo_root,
                 settings,
@@ -428,14 +499,486 @@ def _execute_search(window, query, overrides=None, explain=False):
                 as_of=resolved.get('as_of') or None,
                 snapshot=resolved.get('snapshot') or None,
                 advanced=resolved.get('advanced'),
+                on_event=on_stream_event,
             ),
             on_api_done,
             on_progress=lambda message: tasks.note_progress(window, task, details=message),
+            supersede_key=('search', window.id()),
+            queue_key=window.id(),
         )
+        if task:
+            task['cancel'] = handle.cancel
         return
 
     ui.show_status('PairOfCleats: searching...')
-    _execute_search_cli(window, query, repo_root, settings, resolved, explain, handle_payload)
+    _execute_search_cli(window, query, repo_root, settings, resolved, explain, handle_payload, on_cancelled=finish_page_request)
+
+
+def _page_info(payload, resolved, previous=None):
+    """Describe the page of results for a search ran with ``resolved``.
+
+    The search API has no cursors, so the next page re-runs the query with
+    ``top`` raised by one page and only the hits not shown yet are appended.
+    More results are assumed while any section came back full.
+    """
+    limit = resolved.get('limit') or 25
+    size = limit
+    if previous is not None:
+        size = (previous.get('page') or {}).get('size') or limit
+    more = False
+    for key in PAGE_SECTIONS:
+        items = payload.get(key)
+        if isinstance(items, list) and len(items) >= limit:
+            more = True
+    return {'size': size, 'limit': limit, 'more': more, 'request': dict(resolved)}
+
+
+def _show_next_page(window, previous, query, resolved, repo_root, hits, page):
+    previous_hits = results.collect_hits_from_session(previous)
+    seen = set(results.hit_identity(hit) for hit in previous_hits)
+    new_hits = [hit for hit in hits if results.hit_identity(hit) not in seen]
+    if not new_hits:
+        page['more'] = False
+    target = previous.get('target') or 'quick_panel'
+    session = results.build_session(query, resolved, repo_root, previous_hits + new_hits, target, page=page)
+    results_state.record_last_results(window, session)
+    if not new_hits:
+        ui.show_status('PairOfCleats: no more results.')
+    if target in ('output_panel', 'new_tab'):
+        if target == 'output_panel':
+            view = window.find_output_panel(results.RESULTS_PANEL)
+        else:
+            view = _RESULT_VIEWS.get(window.id())
+        if view is not None and view.is_valid():
+            results.append_results_page(view, previous, session, new_hits)
+            return
+        reopened = results.reopen_session(window, session)
+        if reopened and target == 'new_tab':
+            _RESULT_VIEWS[window.id()] = reopened.get('view')
+        return
+    if not new_hits:
+        return
+    all_hits = session['hits']
+    items = [results.format_quick_panel_item(hit) for hit in all_hits]
+
+    def on_select(index):
+        if index < 0:
+            return
+        results.open_hit(window, all_hits[index], repo_root)
+
+    window.show_quick_panel(items, on_select, selected_index=len(previous_hits))
+
+
+def load_more_results(window):
+    ref = results_state.get_last_results(window)
+    if not results.has_more_results(ref):
+        ui.show_status('PairOfCleats: no more results to load.')
+        return
+    previous = results_state.load_session(window, ref)
+    if not previous:
+        ui.show_status('PairOfCleats: previous results are no longer available.')
+        return
+    _PAGE_REQUESTS[window.id()] = ref.get('blob')
+    page = previous['page']
+    request = dict(page.get('request') or {})
+    request['limit'] = (page.get('limit') or 0) + (page.get('size') or 25)
+    ui.show_status('PairOfCleats: loading more results...')
+    _execute_search(window, previous.get('query'), overrides=request, previous=previous)
+
+
+def load_more_on_footer_click(view, command_name, args):
+    """Load the next page when a results view's footer is double-clicked."""
+    if command_name != 'drag_select' or not isinstance(args, dict) or args.get('by') != 'words':
+        return
+    event = args.get('event')
+    if not isinstance(event, dict) or 'x' not in event or 'y' not in event:
+        return
+    ref = view.settings().get(results.RESULTS_SESSION_KEY)
+    if not results.has_more_results(ref):
+        return
+    window = view.window()
+    if window is None or _PAGE_REQUESTS.get(window.id()) == ref.get('blob'):
+        return
+    last = results_state.get_last_results(window)
+    if not isinstance(last, dict) or last.get('blob') != ref.get('blob'):
+        return
+    point = view.window_to_text((event['x'], event['y']))
+    if point < view.size() - len(results.format_page_footer(ref)):
+        return
+    load_more_results(window)
+
+
+def _live_search(window, initial=''):
+    settings = config.get_settings(window)
+    repo_root, reason = _resolve_repo_root(window)
+    if not repo_root:
+        ui.show_error('PairOfCleats: {0}'.format(reason))
+        return
+    settings = api_service.managed_settings(
+        settings,
+        repo_root,
+        on_ready=lambda: _live_search(window, initial),
+    )
+    if settings is None:
+        ui.show_status('PairOfCleats: starting local API server...')
+        return
+    errors = config.validate_settings(settings, repo_root, workflow='search')
+    if errors:
+        ui.show_error('PairOfCleats settings need attention:\n- {0}'.format('\n- '.join(errors)))
+        return
+    resolved = _resolve_defaults(settings)
+    resolved['limit'] = min(resolved.get('limit') or LIVE_SEARCH_LIMIT, LIVE_SEARCH_LIMIT)
+    state = {
+        'generation': 0,
+        'query': '',
+        'hits': [],
+        'call': None,
+        'input_view': None,
+        'repo_root': repo_root,
+        'settings': settings,
+        'resolved': resolved,
+    }
+    _stop_live_search(window)
+    _LIVE_SEARCHES[window.id()] = state
+
+    def on_done(value):
+        _stop_live_search(window)
+        query = value.strip()
+        if query:
+            _execute_search(window, query)
+
+    state['input_view'] = window.show_input_panel(
+        'PairOfCleats live search',
+        initial or '',
+        on_done,
+        lambda value: _queue_live_search(window, state, value),
+        lambda: _stop_live_search(window),
+    )
+
+
+def _stop_live_search(window):
+    state = _LIVE_SEARCHES.pop(window.id(), None)
+    if state is not None:
+        state['generation'] += 1
+        _cancel_live_request(state)
+
+
+def _cancel_live_request(state):
+    call = state.get('call')
+    state['call'] = None
+    if call is not None:
+        call.cancel()
+
+
+def _live_cache_key(state, query):
+    resolved = state['resolved']
+    return result_cache.make_key(
+        state['repo_root'],
+        query,
+        resolved.get('mode'),
+        resolved.get('limit'),
+        resolved.get('advanced'),
+    )
+
+
+def _queue_live_search(window, state, value):
+    """Debounce a keystroke; cached queries and prefixes render at once."""
+    if _LIVE_SEARCHES.get(window.id()) is not state:
+        return
+    query = value.strip()
+    state['generation'] += 1
+    generation = state['generation']
+    state['query'] = query
+    if len(query) < LIVE_SEARCH_MIN_CHARS:
+        _cancel_live_request(state)
+        return
+    cached = result_cache.LIVE_CACHE.get(_live_cache_key(state, query))
+    if cached is not None:
+        _cancel_live_request(state)
+        _show_live_hits(window, state, cached)
+        return
+    provisional = _live_prefix_hits(state, query)
+    if provisional:
+        _show_live_hits(window, state, provisional)
+    delay = state['settings'].get('search_live_debounce_ms')
+    if not isinstance(delay, int) or delay < 0:
+        delay = 150
+    sublime.set_timeout(lambda: _run_live_search(window, state, generation), delay)
+
+
+def _live_prefix_hits(state, query):
+    # Narrow the hits of the longest cached prefix while the real query runs.
+    tokens = query.lower().split()
+    for end in range(len(query) - 1, LIVE_SEARCH_MIN_CHARS - 1, -1):
+        cached = result_cache.LIVE_CACHE.get(_live_cache_key(state, query[:end].strip()))
+        if cached is None:
+            continue
+        matches = []
+        for hit in cached:
+            text = ' '.join(
+                str(hit.get(key) or '') for key in ('file', 'name', 'symbol', 'headline', 'preview')
+            ).lower()
+            if all(token in text for token in tokens):
+                matches.append(hit)
+        return matches
+    return None
+
+
+def _run_live_search(window, state, generation):
+    if _LIVE_SEARCHES.get(window.id()) is not state or state['generation'] != generation:
+        return
+    _cancel_live_request(state)
+    query = state['query']
+    settings = state['settings']
+    repo_root = state['repo_root']
+    resolved = state['resolved']
+    execution = config.resolve_execution_mode(settings, 'search')
+    if execution.get('mode') != 'api':
+        _run_live_worker(window, state, generation)
+        return
+
+    def on_api_done(result):
+        if result.cancelled:
+            return
+        if result.error:
+            if execution.get('allow_fallback'):
+                _run_live_worker(window, state, generation)
+                return
+            ui.show_status('PairOfCleats: {0}'.format(result.error))
+            return
+        _deliver_live_hits(window, state, generation, query, result.payload)
+
+    state['call'] = api_client.run_async(
+        lambda: api_client.search_json(
+            execution.get('base_url'),
+            repo_root,
+            settings,
+            query,
+            resolved.get('mode'),
+            backend=resolved.get('backend') or None,
+            limit=resolved.get('limit'),
+            ann=resolved.get('ann'),
+            allow_sparse_fallback=resolved.get('allow_sparse_fallback'),
+            as_of=resolved.get('as_of') or None,
+            snapshot=resolved.get('snapshot') or None,
+            advanced=resolved.get('advanced'),
+        ),
+        on_api_done,
+        supersede_key=('live-search', window.id()),
+        queue_key=window.id(),
+    )
+
+
+def _run_live_worker(window, state, generation):
+    query = state['query']
+    arguments = worker.build_search_arguments(query, state['repo_root'], state['resolved'])
+    cli_worker = worker.get_worker(state['settings'], state['repo_root']) if arguments is not None else None
+    if cli_worker is None:
+        # Spawning the CLI per keystroke is too slow to be useful.
+        ui.show_status('PairOfCleats: live search needs the API server or the CLI worker.')
+        return
+
+    def on_worker_done(result):
+        if result.cancelled:
+            return
+        if result.error:
+            ui.show_status('PairOfCleats: {0}'.format(result.error))
+            return
+        _deliver_live_hits(window, state, generation, query, result.payload)
+
+    state['call'] = worker.call_tool_async(cli_worker, 'search', arguments, on_worker_done)
+
+
+def _deliver_live_hits(window, state, generation, query, payload):
+    if not isinstance(payload, dict):
+        return
+    hits = results.collect_hits(payload)[:state['resolved'].get('limit')]
+    result_cache.LIVE_CACHE.put(_live_cache_key(state, query), hits)
+    if _LIVE_SEARCHES.get(window.id()) is not state or state['generation'] != generation:
+        return
+    state['call'] = None
+    _show_live_hits(window, state, hits)
+
+
+def _show_live_hits(window, state, hits):
+    state['hits'] = hits
+    if not hits:
+        ui.show_status('PairOfCleats: no results for "{0}".'.format(state['query']))
+        return
+    items = [results.format_quick_panel_item(hit) for hit in hits]
+    repo_root = state['repo_root']
+
+    def on_select(index):
+        if index < 0:
+            return
+        _stop_live_search(window)
+        window.run_command('hide_panel', {'cancel': True})
+        results.open_hit(window, hits[index], repo_root)
+
+    window.show_quick_panel(items, on_select, flags=getattr(sublime, 'KEEP_OPEN_ON_FOCUS_LOST', 0))
+    if state.get('input_view') is not None:
+        # Keep typing in the input panel while the hits stay visible.
+        window.focus_view(state['input_view'])
+
+
+def _execute_federated_search(window, query):
+    if not query:
+        return
+    roots = federated.collect_repo_roots(window)
+    if len(roots) < 2:
+        ui.show_status('PairOfCleats: one repo root in this window; running a normal search.')
+        _execute_search(window, query)
+        return
+    primary = roots[0]
+    settings = api_service.managed_settings(
+        config.get_settings(window),
+        primary,
+        on_ready=lambda: _execute_federated_search(window, query),
+        allowed_roots=roots[1:],
+    )
+    if settings is None:
+        ui.show_status('PairOfCleats: starting local API server...')
+        return
+    errors = config.validate_settings(settings, primary, workflow='search')
+    if errors:
+        ui.show_error('PairOfCleats settings need attention:\n- {0}'.format('\n- '.join(errors)))
+        return
+    execution = config.resolve_execution_mode(settings, 'search')
+    if execution.get('error'):
+        ui.show_error(execution['error'])
+        return
+    resolved = _resolve_defaults(settings)
+    try:
+        workspace, aliases = federated.write_workspace(primary, roots)
+    except OSError as exc:
+        ui.show_error('PairOfCleats: failed to write the federated workspace file: {0}'.format(exc))
+        return
+    target = _resolve_results_target(settings, 0)
+    header = 'PairOfCleats federated results for "{0}" ({1} repos: {2})\n\n'.format(
+        query,
+        len(aliases),
+        ', '.join(aliases),
+    )
+
+    def settle_panel(text):
+        # Replace the "searching..." note so the panel is never left stale.
+        if target == 'output_panel':
+            results.open_output_panel(window, header + text)
+
+    if target == 'output_panel':
+        # Show which repos are being searched while the request runs.
+        results.open_output_panel(window, header + 'searching...\n')
+
+    def handle_payload(result):
+        if result.returncode != 0 or result.error:
+            settle_panel('search failed.\n')
+            ui.show_error(result.error or result.output.strip() or 'PairOfCleats federated search failed.')
+            return
+        payload = result.payload
+        if not isinstance(payload, dict) or payload.get('ok') is False:
+            message = payload.get('message') if isinstance(payload, dict) else None
+            settle_panel('search failed.\n')
+            ui.show_error(message or 'PairOfCleats federated search returned invalid JSON.')
+            return
+        hits = federated.collect_hits(payload, aliases, results.collect_hits)
+        history.record_query(window, query, resolved, settings.get('history_limit'))
+        if not hits:
+            settle_panel('no results.\n')
+            ui.show_status('PairOfCleats: no results.')
+            return
+        if target in ('output_panel', 'new_tab'):
+            sections = federated.group_by_repo(hits, aliases)
+            ordered = [hit for _alias, section_hits in sections for hit in section_hits]
+            session = results.build_session(query, resolved, primary, ordered, target)
+            results_state.record_last_results(window, session)
+            view = results.open_repo_sections(window, target, header, sections, session=session)
+            if target == 'new_tab':
+                _RESULT_VIEWS[window.id()] = view
+            return
+        session = results.build_session(query, resolved, primary, hits, 'quick_panel')
+        results_state.record_last_results(window, session)
+        results.reopen_session(window, session)
+
+    if execution.get('mode') == 'api':
+        ui.show_status('PairOfCleats: searching {0} repos via API...'.format(len(aliases)))
+        request = federated.build_request(
+            workspace,
+            query,
+            search_lib.build_search_payload(
+                query,
+                mode=resolved.get('mode'),
+                backend=resolved.get('backend') or None,
+                limit=resolved.get('limit'),
+                ann=resolved.get('ann'),
+                allow_sparse_fallback=resolved.get('allow_sparse_fallback'),
+                advanced=resolved.get('advanced'),
+            ),
+        )
+
+        task = tasks.start_task(
+            window,
+            'PairOfCleats federated search',
+            kind='search',
+            repo_root=primary,
+            cancellable=True,
+            details='Searching {0} repos via API...'.format(len(aliases)),
+            show_panel=bool(settings.get('progress_panel_on_start', True)),
+        )
+
+        def on_api_done(result):
+            if result.cancelled:
+                tasks.complete_task(window, task, status='cancelled', details=result.error)
+                settle_panel('search cancelled.\n')
+                ui.show_status('PairOfCleats: federated search cancelled.')
+                return
+            if result.error:
+                tasks.complete_task(window, task, status='failed', details=result.error)
+                if execution.get('allow_fallback'):
+                    ui.show_status('PairOfCleats: API federated search failed; falling back to CLI.')
+                    _spawn_federated_cli(window, query, workspace, settings, resolved, primary, handle_payload)
+                    return
+                settle_panel('search failed.\n')
+                ui.show_error(result.error)
+                return
+            tasks.complete_task(window, task, status='done', details='Federated search completed via API.')
+            handle_payload(_ApiProcessResult(result.payload))
+
+        handle = api_client.run_async(
+            lambda: api_client.federated_search_json(execution.get('base_url'), settings, request),
+            on_api_done,
+            on_progress=lambda message: tasks.note_progress(window, task, details=message),
+            supersede_key=('federated-search', window.id()),
+            queue_key=window.id(),
+        )
+        if task:
+            task['cancel'] = handle.cancel
+        return
+    ui.show_status('PairOfCleats: searching {0} repos...'.format(len(aliases)))
+    _spawn_federated_cli(window, query, workspace, settings, resolved, primary, handle_payload)
+
+
+def _spawn_federated_cli(window, query, workspace, settings, resolved, cwd, on_done):
+    args = search_lib.build_search_args(
+        query,
+        mode=resolved.get('mode'),
+        backend=resolved.get('backend') or None,
+        limit=resolved.get('limit'),
+        ann=resolved.get('ann'),
+        allow_sparse_fallback=resolved.get('allow_sparse_fallback'),
+        advanced=resolved.get('advanced'),
+    ) + ['--workspace', workspace]
+    cli = paths.resolve_cli(settings, cwd)
+    runner.run_process(
+        cli['command'],
+        list(cli.get('args_prefix') or []) + args,
+        cwd=cwd,
+        env=config.build_env(settings),
+        window=window,
+        title='PairOfCleats federated search',
+        capture_json=True,
+        on_done=on_done,
+        stream_output=False
+    )
 
 
 class _ApiProcessResult(object):
@@ -446,7 +989,57 @@ class _ApiProcessResult(object):
         self.payload = payload
 
 
-def _execute_search_cli(window, query, repo_root, settings, resolved, explain, on_done):
+def _run_search_worker(window, query, repo_root, settings, resolved, explain, title, on_done, on_unavailable, on_cancelled=None):
+    arguments = worker.build_search_arguments(query, repo_root, resolved, explain=explain)
+    cli_worker = worker.get_worker(settings, repo_root) if arguments is not None else None
+    if cli_worker is None:
+        on_unavailable()
+        return
+    task = tasks.start_task(
+        window,
+        title,
+        kind='search',
+        repo_root=repo_root,
+        cancellable=True,
+        details='Searching via CLI worker...',
+        show_panel=bool(settings.get('progress_panel_on_start', True)),
+    )
+
+    def on_worker_done(result):
+        if result.cancelled:
+            tasks.complete_task(window, task, status='cancelled', details=result.error)
+            if on_cancelled is not None:
+                on_cancelled()
+            return
+        if result.error:
+            tasks.complete_task(window, task, status='failed', details=result.error)
+            ui.show_status('PairOfCleats: CLI worker failed; running the CLI directly.')
+            on_unavailable()
+            return
+        tasks.complete_task(window, task, status='done', details='Completed via CLI worker.')
+        on_done(result)
+
+    call = worker.call_tool_async(cli_worker, 'search', arguments, on_worker_done)
+    if task:
+        task['cancel'] = call.cancel
+
+
+def _execute_search_cli(window, query, repo_root, settings, resolved, explain, on_done, on_cancelled=None):
+    _run_search_worker(
+        window,
+        query,
+        repo_root,
+        settings,
+        resolved,
+        explain,
+        'PairOfCleats search',
+        on_done,
+        lambda: _spawn_search_cli(window, query, repo_root, settings, resolved, explain, on_done),
+        on_cancelled=on_cancelled,
+    )
+
+
+def _spawn_search_cli(window, query, repo_root, settings, resolved, explain, on_done):
     args = search_lib.build_search_args(
         query,
         repo_root=repo_root,
@@ -490,6 +1083,15 @@ def _execute_symbol_lookup(window, query, on_hits, limit=25, title='PairOfCleats
     if reason:
         ui.show_status('PairOfCleats: {0}'.format(reason))
 
+    settings = api_service.managed_settings(
+        settings,
+        repo_root,
+        on_ready=lambda: _execute_symbol_lookup(window, query, on_hits, limit=limit, title=title),
+    )
+    if settings is None:
+        ui.show_status('PairOfCleats: starting local API server...')
+        return
+
     errors = config.validate_settings(settings, repo_root, workflow='search-symbol')
     if errors:
         message = 'PairOfCleats settings need attention:\n- {0}'.format(
@@ -509,6 +1111,18 @@ def _execute_symbol_lookup(window, query, on_hits, limit=25, title='PairOfCleats
         ui.show_error(execution['error'])
         return
 
+    cache_key = result_cache.make_key(
+        repo_root,
+        query,
+        'code',
+        resolved.get('limit'),
+        resolved.get('advanced'),
+    )
+    cached = result_cache.SYMBOL_CACHE.get(cache_key)
+    if cached is not None:
+        _apply_unsaved_overlay(window, settings, cached, repo_root, lambda hits: on_hits(hits, repo_root, resolved))
+        return
+
     def on_done(result):
         if result.returncode != 0:
             message = result.output.strip() or '{0} failed.'.format(title)
@@ -525,7 +1139,8 @@ def _execute_symbol_lookup(window, query, on_hits, limit=25, title='PairOfCleats
             ui.show_error(payload.get('message') or '{0} failed.'.format(title))
             return
         hits = [hit for hit in results.collect_hits(payload) if hit.get('section') == 'code']
-        on_hits(hits, repo_root, resolved)
+        result_cache.SYMBOL_CACHE.put(cache_key, hits)
+        _apply_unsaved_overlay(window, settings, hits, repo_root, lambda mapped: on_hits(mapped, repo_root, resolved))
 
     if execution.get('mode') == 'api':
         task = tasks.start_task(
@@ -533,11 +1148,14 @@ def _execute_symbol_lookup(window, query, on_hits, limit=25, title='PairOfCleats
             title,
             kind='search',
             repo_root=repo_root,
-            cancellable=False,
+            cancellable=True,
             details='Symbol lookup via API...',
             show_panel=bool(settings.get('progress_panel_on_start', True)),
         )
         def on_api_done(result):
+            if result.cancelled:
+                tasks.complete_task(window, task, status='cancelled', details=result.error)
+                return
             if result.error:
                 tasks.complete_task(window, task, status='failed', details=result.error)
                 if execution.get('allow_fallback'):
@@ -548,7 +1166,7 @@ def _execute_symbol_lookup(window, query, on_hits, limit=25, title='PairOfCleats
             tasks.complete_task(window, task, status='done', details='Symbol lookup completed via API.')
             on_done(_ApiProcessResult(result.payload))
 
-        api_client.run_async(
+        handle = api_client.run_async(
             lambda: api_client.search_json(
                 execution.get('base_url'),
                 repo_root,
@@ -565,13 +1183,31 @@ def _execute_symbol_lookup(window, query, on_hits, limit=25, title='PairOfCleats
             ),
             on_api_done,
             on_progress=lambda message: tasks.note_progress(window, task, details=message),
+            supersede_key=('symbol', window.id()),
+            queue_key=window.id(),
         )
+        if task:
+            task['cancel'] = handle.cancel
         return
 
     _execute_symbol_lookup_cli(window, query, repo_root, settings, resolved, title, on_done)
 
 
 def _execute_symbol_lookup_cli(window, query, repo_root, settings, resolved, title, on_done):
+    _run_search_worker(
+        window,
+        query,
+        repo_root,
+        settings,
+        dict(resolved, mode='code'),
+        False,
+        title,
+        on_done,
+        lambda: _spawn_symbol_lookup_cli(window, query, repo_root, settings, resolved, title, on_done),
+    )
+
+
+def _spawn_symbol_lookup_cli(window, query, repo_root, settings, resolved, title, on_done):
     args = search_lib.build_search_args(
         query,
         repo_root=repo_root,
@@ -697,6 +1333,31 @@ class PairOfCleatsSearchCommand(sublime_plugin.WindowCommand):
         _search_with_prompt(self.window)
 
 
+class PairOfCleatsLiveSearchCommand(sublime_plugin.WindowCommand):
+    def is_enabled(self):
+        return _has_repo_root(self.window)
+
+    def is_visible(self):
+        return True
+
+    def run(self, query=''):
+        _live_search(self.window, query or '')
+
+
+class PairOfCleatsFederatedSearchCommand(sublime_plugin.WindowCommand):
+    def is_enabled(self):
+        return _has_repo_root(self.window)
+
+    def is_visible(self):
+        return True
+
+    def run(self, query=None):
+        if query:
+            _execute_federated_search(self.window, query)
+            return
+        _prompt_query(self.window, '', lambda value: _execute_federated_search(self.window, value))
+
+
 class PairOfCleatsSearchWithOptionsCommand(sublime_plugin.WindowCommand):       
     def is_enabled(self):
         return _has_repo_root(self.window)
@@ -951,6 +1612,17 @@ class PairOfCleatsReopenLastResultsCommand(sublime_plugin.WindowCommand):
         results.reopen_session(self.window, session)
 
 
+class PairOfCleatsLoadMoreResultsCommand(sublime_plugin.WindowCommand):
+    def is_enabled(self):
+        return _has_more_results(self.window)
+
+    def is_visible(self):
+        return self.is_enabled()
+
+    def run(self):
+        load_more_results(self.window)
+
+
 class PairOfCleatsReopenLastExplainCommand(sublime_plugin.WindowCommand):
     def is_enabled(self):
         return _has_last_explain(self.window)
@@ -999,8 +1671,10 @@ class PairOfCleatsResultActionsCommand(sublime_plugin.WindowCommand):
 
 def _load_action_session(window, source):
     if source == 'explain':
-        return results_state.get_last_explain(window)
-    return results_state.get_last_results(window)
+        session = results_state.get_last_explain(window)
+    else:
+        session = results_state.get_last_results(window)
+    return results_state.load_session(window, session)
 
 
 def _show_result_action_choices(window, session, hit):
@@ -43,6 +43,7 @@ class PairOfCleatsOpenProjectSettingsCommand(sublime_plugin.WindowCommand):
         if not isinstance(override, dict):
             settings['pairofcleats'] = {}
         self.window.set_project_data(data)
+        config.invalidate_settings(self.window)
         self.window.run_command('edit_project')
 
 
@@ -1,29 +1,212 @@
+import collections
+import http.client
 import json
 import os
+import socket
 import threading
+import time
 import urllib.parse
-import urllib.request
-import urllib.error
+
+from . import result_cache
+
+POOL_MAX_CONNECTIONS = 4
+POOL_IDLE_TIMEOUT_S = 30.0
+EXECUTOR_MAX_WORKERS = POOL_MAX_CONNECTIONS
+EXECUTOR_MAX_QUEUED = 16
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+SEARCH_HIT_SECTIONS = ('code', 'prose', 'extractedProse', 'records')
+# Read timeout for followed status streams; the server pings every 15s.
+STATUS_FOLLOW_TIMEOUT_MS = 45000
+_RECONNECT_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
 
 
 class ApiResult(object):
-    def __init__(self, payload=None, headers=None, error=None):
+    def __init__(self, payload=None, headers=None, error=None, cancelled=False):
         self.payload = payload
         self.headers = headers or {}
         self.error = error
+        self.cancelled = cancelled
+
+
+class ApiRequestError(RuntimeError):
+    def __init__(self, message, status=0):
+        super(ApiRequestError, self).__init__(message)
+        self.status = status
+
+
+class ApiCancelled(RuntimeError):
+    pass
 
 
 class ApiHandle(object):
     def __init__(self, thread):
         self.thread = thread
+        self.reason = None
         self._cancelled = False
+        self._lock = threading.Lock()
+        self._connections = []
+        self._on_cancel = None
 
-    def cancel(self):
-        self._cancelled = True
+    def cancel(self, reason=None):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            self.reason = reason or 'Request cancelled.'
+            connections = list(self._connections)
+            on_cancel = self._on_cancel
+        # Shut the sockets down rather than closing them so the request
+        # thread wakes up from its blocking read and releases them itself.
+        for conn in connections:
+            _shutdown_quietly(conn)
+        if callable(on_cancel):
+            on_cancel()
 
     def is_cancelled(self):
         return self._cancelled
 
+    def _attach(self, conn):
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._connections.append(conn)
+            return True
+
+    def _detach(self, conn):
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+
+
+class _Job(object):
+    def __init__(self, handle, run, deliver_cancelled, queue_key=None, priority=PRIORITY_INTERACTIVE):
+        self.handle = handle
+        self.run = run
+        self.deliver_cancelled = deliver_cancelled
+        self.queue_key = queue_key
+        self.priority = priority
+
+
+class RequestExecutor(object):
+    """Bounded worker pool that runs queued API requests.
+
+    Jobs are queued per ``queue_key`` (normally the window id) in priority
+    lanes; workers drain the interactive lane first and rotate between keys
+    so one window cannot starve another.
+    """
+
+    def __init__(self, max_workers=EXECUTOR_MAX_WORKERS, max_queued=EXECUTOR_MAX_QUEUED,
+                 idle_timeout_s=POOL_IDLE_TIMEOUT_S):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(1, int(max_queued))
+        self.idle_timeout_s = float(idle_timeout_s)
+        self._cond = threading.Condition()
+        self._lanes = [collections.OrderedDict(), collections.OrderedDict()]
+        self._workers = 0
+        self._idle = 0
+
+    def submit(self, job):
+        with self._cond:
+            if self._pending(job.queue_key) >= self.max_queued:
+                return False
+            lane = self._lanes[job.priority]
+            lane.setdefault(job.queue_key, collections.deque()).append(job)
+            if self._idle > 0:
+                self._cond.notify()
+            # A notified worker still counts as idle until it wakes, so compare
+            # against the whole queue: one idle worker is not enough for two
+            # jobs submitted back to back.
+            queued = sum(len(queue) for lane in self._lanes for queue in lane.values())
+            if queued > self._idle and self._workers < self.max_workers:
+                self._workers += 1
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+        return True
+
+    def discard(self, job):
+        with self._cond:
+            queue = self._lanes[job.priority].get(job.queue_key)
+            if not queue or job not in queue:
+                return False
+            queue.remove(job)
+            if not queue:
+                del self._lanes[job.priority][job.queue_key]
+            return True
+
+    def pending_count(self, queue_key=None):
+        with self._cond:
+            if queue_key is not None:
+                return self._pending(queue_key)
+            return sum(len(queue) for lane in self._lanes for queue in lane.values())
+
+    def worker_count(self):
+        with self._cond:
+            return self._workers
+
+    def drain(self):
+        with self._cond:
+            jobs = [job for lane in self._lanes for queue in lane.values() for job in queue]
+            for lane in self._lanes:
+                lane.clear()
+        return jobs
+
+    def _pending(self, queue_key):
+        return sum(len(lane.get(queue_key) or ()) for lane in self._lanes)
+
+    def _next_job(self):
+        for lane in self._lanes:
+            if not lane:
+                continue
+            queue_key = next(iter(lane))
+            queue = lane[queue_key]
+            job = queue.popleft()
+            if queue:
+                lane.move_to_end(queue_key)
+            else:
+                del lane[queue_key]
+            return job
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._idle += 1
+                    signalled = self._cond.wait(self.idle_timeout_s)
+                    self._idle -= 1
+                    job = self._next_job()
+                    if job is None and not signalled:
+                        self._workers -= 1
+                        return
+            job.run()
+
+
+_EXECUTOR = RequestExecutor()
+_LOCAL = threading.local()
+_SUPERSEDABLE = {}
+_SUPERSEDABLE_LOCK = threading.Lock()
+_RUNNING = set()
+_RUNNING_LOCK = threading.Lock()
+
+
+def _current_handle():
+    return getattr(_LOCAL, 'handle', None)
+
+
+def _check_cancelled():
+    handle = _current_handle()
+    if handle is not None and handle.is_cancelled():
+        raise ApiCancelled(handle.reason)
+
 
 def normalize_base_url(value):
     if not value:
@@ -58,7 +241,142 @@ def _encode_payload(payload):
     return json.dumps(payload).encode('utf-8')
 
 
-def _open_url(url, timeout_ms=5000, method='GET', payload=None, headers=None):
+class ConnectionPool(object):
+    """Keep-alive ``http.client`` connections shared per base URL."""
+
+    def __init__(self, max_connections=POOL_MAX_CONNECTIONS, idle_timeout_s=POOL_IDLE_TIMEOUT_S):
+        self.max_connections = max(1, int(max_connections))
+        self.idle_timeout_s = float(idle_timeout_s)
+        self._cond = threading.Condition()
+        self._idle = {}
+        self._in_use = {}
+
+    def acquire(self, key, timeout):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                self._evict_idle(key)
+                idle = self._idle.get(key) or []
+                if idle:
+                    conn, _last_used = idle.pop()
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                if self._in_use.get(key, 0) < self.max_connections:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise RuntimeError('API connection pool exhausted for {0}://{1}:{2}.'.format(*key))
+                self._cond.wait(remaining)
+        return _new_connection(key, timeout), False
+
+    def release(self, key, conn, reusable=True):
+        with self._cond:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            if reusable and conn.sock is not None:
+                self._idle.setdefault(key, []).append((conn, time.time()))
+                conn = None
+            self._cond.notify()
+        if conn is not None:
+            _close_quietly(conn)
+
+    def idle_count(self, key=None):
+        with self._cond:
+            if key is not None:
+                return len(self._idle.get(key) or [])
+            return sum(len(entries) for entries in self._idle.values())
+
+    def close_all(self):
+        with self._cond:
+            idle = self._idle
+            self._idle = {}
+            self._cond.notify_all()
+        for entries in idle.values():
+            for conn, _last_used in entries:
+                _close_quietly(conn)
+
+    def _evict_idle(self, key):
+        entries = self._idle.get(key)
+        if not entries:
+            return
+        cutoff = time.time() - self.idle_timeout_s
+        fresh = []
+        for conn, last_used in entries:
+            if last_used < cutoff or conn.sock is None:
+                _close_quietly(conn)
+            else:
+                fresh.append((conn, last_used))
+        self._idle[key] = fresh
+
+
+_POOL = ConnectionPool()
+
+
+def close_connections():
+    _POOL.close_all()
+
+
+def _new_connection(key, timeout):
+    scheme, host, port = key
+    if scheme == 'https':
+        return http.client.HTTPSConnection(host, port, timeout=timeout)
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _shutdown_quietly(conn):
+    sock = getattr(conn, 'sock', None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except Exception:
+        pass
+
+
+def _acquire(key, timeout):
+    conn, reused = _POOL.acquire(key, timeout)
+    handle = _current_handle()
+    if handle is not None and not handle._attach(conn):
+        _POOL.release(key, conn, reusable=reused)
+        raise ApiCancelled(handle.reason)
+    return conn, reused
+
+
+def _release(key, conn, reusable=True):
+    handle = _current_handle()
+    if handle is not None:
+        handle._detach(conn)
+        if handle.is_cancelled():
+            reusable = False
+    _POOL.release(key, conn, reusable=reusable)
+
+
+def _request_error(exc):
+    handle = _current_handle()
+    if handle is not None and handle.is_cancelled():
+        return ApiCancelled(handle.reason)
+    return RuntimeError('API request failed: {0}'.format(exc))
+
+
+def _pool_key(parsed):
+    scheme = (parsed.scheme or 'http').lower()
+    if scheme not in ('http', 'https'):
+        raise RuntimeError('API URL must use http:// or https://: {0}'.format(parsed.geturl()))
+    port = parsed.port or (443 if scheme == 'https' else 80)
+    return scheme, parsed.hostname or 'localhost', port
+
+
+def _send_request(url, timeout_ms=5000, method='GET', payload=None, headers=None):
     timeout = float(timeout_ms or 5000) / 1000.0
     if timeout <= 0:
         timeout = 5.0
@@ -66,35 +384,61 @@ def _open_url(url, timeout_ms=5000, method='GET', payload=None, headers=None):
     data = _encode_payload(payload)
     if data is not None and 'Content-Type' not in request_headers:
         request_headers['Content-Type'] = 'application/json'
-    request = urllib.request.Request(url, data=data, headers=request_headers, method=method)
-
-    try:
-        resp = urllib.request.urlopen(request, timeout=timeout)
+    parsed = urllib.parse.urlsplit(url)
+    key = _pool_key(parsed)
+    target = parsed.path or '/'
+    if parsed.query:
+        target = '{0}?{1}'.format(target, parsed.query)
+
+    attempt = 0
+    while True:
+        attempt += 1
+        _check_cancelled()
+        conn, reused = _acquire(key, timeout)
         try:
-            status = resp.getcode() or 0
-            headers = dict(resp.headers.items())
-            data = resp.read()
-        finally:
-            try:
-                resp.close()
-            except Exception:
-                pass
-        return status, headers, data
-    except urllib.error.HTTPError as err:
-        try:
-            data = err.read()
+            conn.request(method, target, body=data, headers=request_headers)
+            return key, conn, conn.getresponse()
+        except _RECONNECT_ERRORS as exc:
+            _release(key, conn, reusable=False)
+            # An idle keep-alive socket may have been closed by the server;
+            # retry once on a fresh connection before surfacing the error.
+            if reused and attempt == 1:
+                continue
+            raise _request_error(exc)
+        except OSError as exc:
+            _release(key, conn, reusable=False)
+            raise _request_error(exc)
         except Exception:
-            data = b''
-        headers = dict(getattr(err, 'headers', {}).items()) if getattr(err, 'headers', None) else {}
-        status = getattr(err, 'code', 0) or 0
-        return status, headers, data
+            _release(key, conn, reusable=False)
+            raise
+
+
+def _open_url(url, timeout_ms=5000, method='GET', payload=None, headers=None):
+    key, conn, resp = _send_request(url, timeout_ms=timeout_ms, method=method, payload=payload, headers=headers)
+    try:
+        body = resp.read()
+    except Exception as exc:
+        _release(key, conn, reusable=False)
+        raise _request_error(exc)
+    _release(key, conn, reusable=not resp.will_close)
+    _check_cancelled()
+    return resp.status or 0, dict(resp.getheaders()), body
+
+
+def _raise_for_status(status, data, url):
+    if 200 <= status < 300:
+        return
+    text = (data or b'').decode('utf-8', 'replace')
+    raise ApiRequestError(
+        'API request failed ({0}): {1}'.format(status, text.strip() or url),
+        status=status,
+    )
 
 
 def request_json(url, timeout_ms=5000, method='GET', payload=None, headers=None):
     status, headers, data = _open_url(url, timeout_ms=timeout_ms, method=method, payload=payload, headers=headers)
+    _raise_for_status(status, data, url)
     text = (data or b'').decode('utf-8', 'replace')
-    if status < 200 or status >= 300:
-        raise RuntimeError('API request failed ({0}): {1}'.format(status, text.strip() or url))
     try:
         return json.loads(text or '{}'), headers
     except Exception as exc:
@@ -103,10 +447,65 @@ def request_json(url, timeout_ms=5000, method='GET', payload=None, headers=None)
 
 def request_text(url, timeout_ms=5000, method='GET', payload=None, headers=None):
     status, headers, data = _open_url(url, timeout_ms=timeout_ms, method=method, payload=payload, headers=headers)
-    text = (data or b'').decode('utf-8', 'replace')
-    if status < 200 or status >= 300:
-        raise RuntimeError('API request failed ({0}): {1}'.format(status, text.strip() or url))
-    return text, headers
+    _raise_for_status(status, data, url)
+    return (data or b'').decode('utf-8', 'replace'), headers
+
+
+def iter_sse_events(lines):
+    """Yield ``(event, data)`` pairs from an iterable of SSE lines."""
+    event = None
+    data_lines = []
+    for raw in lines:
+        line = raw.decode('utf-8', 'replace') if isinstance(raw, bytes) else raw
+        line = line.rstrip('\r\n')
+        if not line:
+            if data_lines:
+                yield event or 'message', _parse_sse_data(data_lines)
+            event = None
+            data_lines = []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _sep, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data_lines.append(value)
+    if data_lines:
+        yield event or 'message', _parse_sse_data(data_lines)
+
+
+def _parse_sse_data(data_lines):
+    text = '\n'.join(data_lines)
+    try:
+        return json.loads(text)
+    except Exception:
+        return {'message': text}
+
+
+def request_sse(url, timeout_ms=5000, method='GET', payload=None, headers=None, response_headers=None):
+    request_headers = dict(headers or {})
+    request_headers.setdefault('Accept', 'text/event-stream')
+    key, conn, resp = _send_request(url, timeout_ms=timeout_ms, method=method, payload=payload, headers=request_headers)
+    reusable = False
+    try:
+        if not 200 <= (resp.status or 0) < 300:
+            data = resp.read()
+            reusable = not resp.will_close
+            _raise_for_status(resp.status or 0, data, url)
+        if isinstance(response_headers, dict):
+            response_headers.update(dict(resp.getheaders()))
+        for event in iter_sse_events(iter(resp.readline, b'')):
+            _check_cancelled()
+            yield event
+        _check_cancelled()
+        reusable = not resp.will_close
+    except (OSError, http.client.HTTPException) as exc:
+        raise _request_error(exc)
+    finally:
+        _release(key, conn, reusable=reusable)
 
 
 def _ensure_parent_dir(path_value):
@@ -135,37 +534,100 @@ def _write_json(path_value, payload):
         json.dump(payload, handle, indent=2, sort_keys=True)
 
 
-def run_async(request_fn, on_done, on_progress=None):
+def run_async(request_fn, on_done, on_progress=None, supersede_key=None, queue_key=None,
+              priority=PRIORITY_INTERACTIVE):
+    """Queue ``request_fn`` on the shared executor and deliver an ``ApiResult``.
+
+    Requests started with the same ``supersede_key`` cancel the previous one.
+    Cancelled or rejected requests still call ``on_done`` with
+    ``result.cancelled`` set.
+    """
     import sublime
     handle = ApiHandle(None)
 
-    def worker():
+    def deliver(result):
+        sublime.set_timeout(lambda: on_done(result), 0)
+
+    def deliver_cancelled():
+        deliver(ApiResult(error=handle.reason, cancelled=True))
+
+    def run():
+        handle.thread = threading.current_thread()
+        if handle.is_cancelled():
+            _forget(supersede_key, handle)
+            deliver_cancelled()
+            return
+        _LOCAL.handle = handle
+        with _RUNNING_LOCK:
+            _RUNNING.add(handle)
         try:
             if callable(on_progress):
                 on_progress('Request started.')
             response = request_fn()
-            if handle.is_cancelled():
-                return
             if isinstance(response, tuple) and len(response) == 2:
                 payload, headers = response
             else:
                 payload, headers = response, {}
             result = ApiResult(payload=payload, headers=headers)
         except Exception as exc:
-            if handle.is_cancelled():
-                return
             result = ApiResult(error=str(exc))
+        finally:
+            _LOCAL.handle = None
+            with _RUNNING_LOCK:
+                _RUNNING.discard(handle)
+            _forget(supersede_key, handle)
         if handle.is_cancelled():
-            return
-        sublime.set_timeout(lambda: on_done(result), 0)
-
-    thread = threading.Thread(target=worker)
-    thread.daemon = True
-    thread.start()
-    handle.thread = thread
+            result = ApiResult(error=handle.reason, cancelled=True)
+        deliver(result)
+
+    if supersede_key is not None:
+        with _SUPERSEDABLE_LOCK:
+            previous = _SUPERSEDABLE.get(supersede_key)
+            _SUPERSEDABLE[supersede_key] = handle
+        if previous is not None:
+            previous.cancel('Superseded by a newer request.')
+
+    job = _Job(handle, run, deliver_cancelled, queue_key=queue_key, priority=priority)
+    if not _EXECUTOR.submit(job):
+        _forget(supersede_key, handle)
+        handle.cancel('API request queue is full.')
+        deliver_cancelled()
+        return handle
+
+    def on_cancel():
+        # Queued jobs never reach a worker once cancelled; report them now.
+        if _EXECUTOR.discard(job):
+            _forget(supersede_key, handle)
+            deliver_cancelled()
+
+    handle._on_cancel = on_cancel
+    if handle.is_cancelled():
+        on_cancel()
     return handle
 
 
+def _forget(supersede_key, handle):
+    if supersede_key is None:
+        return
+    with _SUPERSEDABLE_LOCK:
+        if _SUPERSEDABLE.get(supersede_key) is handle:
+            _SUPERSEDABLE.pop(supersede_key, None)
+
+
+def cancel_all(reason=None):
+    """Cancel queued and in-flight requests, shutting down their sockets."""
+    with _SUPERSEDABLE_LOCK:
+        handles = list(_SUPERSEDABLE.values())
+        _SUPERSEDABLE.clear()
+    with _RUNNING_LOCK:
+        handles.extend(_RUNNING)
+    for job in _EXECUTOR.drain():
+        job.handle.cancel(reason)
+        job.deliver_cancelled()
+    for handle in handles:
+        handle.cancel(reason)
+
+
 def search_json(
         base_url,
         repo_root,
@@ -208,6 +670,25 @@ def search_json(
         method='POST',
         payload=payload,
     )
+    return _unwrap_search_body(body), headers
+
+
+def federated_search_json(base_url, settings, payload):
+    base_url = normalize_base_url(base_url)
+    if not base_url:
+        raise RuntimeError('api_server_url is not set')
+    body, headers = request_json(
+        build_url(base_url, '/search/federated'),
+        timeout_ms=_resolve_timeout_ms(settings),
+        method='POST',
+        payload=payload,
+    )
+    if not isinstance(body, dict) or body.get('ok') is False:
+        raise RuntimeError((body or {}).get('message') or 'API federated search failed.')
+    return body, headers
+
+
+def _unwrap_search_body(body):
     if not isinstance(body, dict) or body.get('ok') is False:
         raise RuntimeError((body or {}).get('message') or 'API search failed.')
     result = body.get('result')
@@ -215,7 +696,89 @@ def search_json(
         raise RuntimeError('API search returned invalid JSON.')
     payload = dict(result)
     payload.setdefault('ok', True)
-    return payload, headers
+    return payload
+
+
+def search_stream_json(
+        base_url,
+        repo_root,
+        settings,
+        query,
+        mode,
+        backend=None,
+        limit=None,
+        ann=None,
+        allow_sparse_fallback=False,
+        as_of=None,
+        snapshot=None,
+        advanced=None,
+        on_event=None):
+    """Run a search over ``/search/stream``, reporting progress as it arrives.
+
+    ``on_event`` receives ``{'type': 'progress', 'message': ...}`` dicts from
+    the request thread. The server sends the finished result as a single
+    ``result`` event, which is returned as-is for one render.
+    Servers without the streaming route fall back to ``search_json``.
+    """
+    from . import search as search_lib
+
+    base_url = normalize_base_url(base_url)
+    if not base_url:
+        raise RuntimeError('api_server_url is not set')
+
+    def emit(event):
+        if callable(on_event):
+            on_event(event)
+
+    payload = search_lib.build_search_payload(
+        query,
+        repo_root=repo_root,
+        mode=mode,
+        backend=backend,
+        limit=limit,
+        ann=ann,
+        allow_sparse_fallback=allow_sparse_fallback,
+        as_of=as_of,
+        snapshot=snapshot,
+        advanced=advanced,
+    )
+    headers = {}
+    result = None
+    try:
+        for event, data in request_sse(
+                build_url(base_url, '/search/stream'),
+                timeout_ms=_resolve_timeout_ms(settings),
+                method='POST',
+                payload=payload,
+                response_headers=headers):
+            data = data if isinstance(data, dict) else {}
+            if event == 'progress':
+                if data.get('message'):
+                    emit({'type': 'progress', 'message': data.get('message')})
+            elif event == 'error':
+                raise RuntimeError(data.get('message') or 'API search failed.')
+            elif event == 'result':
+                result = _unwrap_search_body(data)
+    except ApiRequestError as exc:
+        if exc.status not in (404, 405):
+            raise
+        return search_json(
+            base_url,
+            repo_root,
+            settings,
+            query,
+            mode,
+            backend=backend,
+            limit=limit,
+            ann=ann,
+            allow_sparse_fallback=allow_sparse_fallback,
+            as_of=as_of,
+            snapshot=snapshot,
+            advanced=advanced,
+        )
+    if result is None:
+        raise RuntimeError('API search stream ended without a result.')
+    return result, headers
 
 
 def _resolve_timeout_ms(settings):
@@ -241,6 +804,82 @@ def health_json(base_url, settings):
     return payload, headers
 
 
+def status_stream_json(base_url, repo_root, settings):
+    """Read one status snapshot from ``/status/stream``.
+
+    Servers without the streaming route fall back to ``status_json``.
+    """
+    base_url = normalize_base_url(base_url)
+    if not base_url:
+        raise RuntimeError('api_server_url is not set')
+    headers = {}
+    payload = None
+    try:
+        for event, data in request_sse(
+                build_url(base_url, '/status/stream', {'repo': repo_root}),
+                timeout_ms=_resolve_timeout_ms(settings),
+                response_headers=headers):
+            data = data if isinstance(data, dict) else {}
+            if event == 'error':
+                raise RuntimeError(data.get('message') or 'API status request failed.')
+            if event == 'result':
+                payload = data.get('status')
+    except ApiRequestError as exc:
+        if exc.status not in (404, 405):
+            raise
+        return status_json(base_url, repo_root, settings)
+    if not isinstance(payload, dict):
+        raise RuntimeError('API status stream ended without a status.')
+    result_cache.note_status(repo_root, payload)
+    payload = dict(payload)
+    payload.setdefault('ok', True)
+    return payload, headers
+
+
+def follow_status(base_url, repo_root, settings, on_status, on_connect=None):
+    """Follow ``/status/stream?follow=1`` until the server ends the stream.
+
+    The stream stays open, so it uses its own connection instead of one from
+    the pool; ``on_connect(conn)`` receives it so the caller can close it to
+    stop following. ``on_status`` is called with each status snapshot and with
+    ``None`` for each keep-alive ``ping``. Servers without the streaming route
+    fall back to one ``status_json`` snapshot.
+    """
+    base_url = normalize_base_url(base_url)
+    if not base_url:
+        raise RuntimeError('api_server_url is not set')
+    parsed = urllib.parse.urlsplit(build_url(base_url, '/status/stream', {'repo': repo_root, 'follow': '1'}))
+    timeout_ms = max(_resolve_timeout_ms(settings), STATUS_FOLLOW_TIMEOUT_MS)
+    conn = _new_connection(_pool_key(parsed), timeout_ms / 1000.0)
+    if on_connect is not None:
+        on_connect(conn)
+    try:
+        conn.request('GET', '{0}?{1}'.format(parsed.path, parsed.query), headers={'Accept': 'text/event-stream'})
+        resp = conn.getresponse()
+        if resp.status in (404, 405):
+            payload, _headers = status_json(base_url, repo_root, settings)
+            on_status(payload)
+            return
+        if not 200 <= (resp.status or 0) < 300:
+            _raise_for_status(resp.status or 0, resp.read(), parsed.geturl())
+        for event, data in iter_sse_events(iter(resp.readline, b'')):
+            data = data if isinstance(data, dict) else {}
+            if event == 'error':
+                raise RuntimeError(data.get('message') or 'API status request failed.')
+            if event == 'ping':
+                on_status(None)
+            elif event == 'result' and isinstance(data.get('status'), dict):
+                payload = data['status']
+                result_cache.note_status(repo_root, payload)
+                payload = dict(payload)
+                payload.setdefault('ok', True)
+                on_status(payload)
+    except (OSError, ValueError, http.client.HTTPException) as exc:
+        raise RuntimeError('API request failed: {0}'.format(exc))
+    finally:
+        _close_quietly(conn)
+
+
 def status_json(base_url, repo_root, settings):
     base_url = normalize_base_url(base_url)
     if not base_url:
@@ -255,6 +894,7 @@ def status_json(base_url, repo_root, settings):
     payload = body.get('status')
     if not isinstance(payload, dict):
         raise RuntimeError('API status returned invalid JSON.')
+    result_cache.note_status(repo_root, payload)
     payload = dict(payload)
     payload.setdefault('ok', True)
     return payload, headers
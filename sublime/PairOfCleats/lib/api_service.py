@@ -0,0 +1,252 @@
+import json
+import os
+import subprocess
+import threading
+import time
+
+import sublime
+
+from . import api_client
+from . import cli_info
+from . import config
+from . import paths
+from . import runner
+from . import ui
+
+START_TIMEOUT_S = 30.0
+HEALTH_ATTEMPTS = 10
+HEALTH_RETRY_S = 0.2
+RETRY_AFTER_FAILURE_S = 30.0
+
+_SERVERS = {}
+_LOCK = threading.Lock()
+
+
+class ManagedServer(object):
+    """Local `pairofcleats service api` process shared by windows on one repo."""
+
+    def __init__(self, command, cwd, env=None, spawn_process=None, cli=None):
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = env
+        self.cli = cli
+        self.base_url = ''
+        self.error = None
+        self.failed_at = None
+        self._spawn = spawn_process or subprocess.Popen
+        self._proc = None
+        self._starting = False
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    def is_ready(self):
+        proc = self._proc
+        return bool(self.base_url) and proc is not None and proc.poll() is None
+
+    def is_starting(self):
+        return self._starting
+
+    def start_async(self, settings, on_ready=None):
+        with self._lock:
+            if on_ready is not None:
+                self._waiters.append(on_ready)
+            if self._starting:
+                return
+            self._starting = True
+            self.base_url = ''
+            self.error = None
+        thread = threading.Thread(target=self._start, args=(settings,))
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        with self._lock:
+            proc = self._proc
+            self._proc = None
+            self.base_url = ''
+        if proc is None:
+            return
+        runner._terminate_process_tree(proc)
+        try:
+            proc.wait(timeout=5)
+        except Exception:
+            runner._terminate_process_tree(proc, force=True)
+        try:
+            proc.stdout.close()
+        except Exception:
+            pass
+
+    def _start(self, settings):
+        try:
+            self._check_cli()
+            self._launch()
+            self._wait_healthy(settings)
+            ok = True
+        except Exception as exc:
+            self.stop()
+            self.error = str(exc)
+            self.failed_at = time.time()
+            ok = False
+        with self._lock:
+            self._starting = False
+            waiters = list(self._waiters)
+            self._waiters = []
+        for waiter in waiters:
+            sublime.set_timeout(lambda waiter=waiter: waiter(ok), 0)
+
+    def _check_cli(self):
+        # A CLI that cannot start is reported at once instead of after the
+        # startup timeout; the check runs once per CLI.
+        if self.cli is None:
+            return
+        info = cli_info.get_info(self.cli, cwd=self.cwd, env=self.env, spawn_process=self._spawn)
+        if not info['ok']:
+            raise RuntimeError(info['error'])
+
+    def _launch(self):
+        try:
+            proc = self._spawn(
+                self.command,
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                **runner._build_spawn_kwargs()
+            )
+        except Exception as exc:
+            raise RuntimeError('Failed to launch PairOfCleats API server: {0}'.format(exc))
+        self._proc = proc
+        ready = {}
+
+        def read_stdout():
+            for raw in iter(proc.stdout.readline, b''):
+                if 'payload' in ready:
+                    continue
+                try:
+                    payload = json.loads(raw.decode('utf-8', errors='replace'))
+                except ValueError:
+                    continue
+                if isinstance(payload, dict) and payload.get('baseUrl'):
+                    ready['payload'] = payload
+            ready['eof'] = True
+
+        # Keep draining stdout for the life of the server so it never blocks.
+        thread = threading.Thread(target=read_stdout)
+        thread.daemon = True
+        thread.start()
+        deadline = time.time() + START_TIMEOUT_S
+        while 'payload' not in ready:
+            if ready.get('eof') or proc.poll() is not None:
+                raise RuntimeError('PairOfCleats API server exited during startup.')
+            if time.time() > deadline:
+                raise RuntimeError('PairOfCleats API server did not start within {0:.0f}s.'.format(START_TIMEOUT_S))
+            time.sleep(0.05)
+        self.base_url = api_client.normalize_base_url(ready['payload']['baseUrl'])
+
+    def _wait_healthy(self, settings):
+        last_error = None
+        for _attempt in range(HEALTH_ATTEMPTS):
+            try:
+                api_client.health_json(self.base_url, settings)
+                return
+            except Exception as exc:
+                last_error = exc
+                time.sleep(HEALTH_RETRY_S)
+        raise RuntimeError('PairOfCleats API server failed its health check: {0}'.format(last_error))
+
+
+def is_enabled(settings):
+    settings = settings or {}
+    if not bool(settings.get('api_server_auto_start', True)):
+        return False
+    if str(settings.get('api_server_url') or '').strip():
+        return False
+    mode = str(settings.get('api_execution_mode') or 'cli').strip().lower()
+    return mode in ('prefer', 'require')
+
+
+def build_server_command(settings, repo_root, allowed_roots=None):
+    cli = paths.resolve_cli(settings, repo_root)
+    extra = []
+    if allowed_roots:
+        extra = ['--allowed-repo-roots', ','.join(allowed_roots)]
+    return [cli['command']] + list(cli.get('args_prefix') or []) + [
+        'service',
+        'api',
+        '--repo',
+        repo_root,
+        '--host',
+        '127.0.0.1',
+        '--port',
+        '0',
+        '--json',
+        '--quiet',
+    ] + extra
+
+
+def get_server(settings, repo_root, allowed_roots=None):
+    command = build_server_command(settings, repo_root, allowed_roots=allowed_roots)
+    key = (os.path.normcase(os.path.abspath(repo_root)), tuple(command))
+    with _LOCK:
+        server = _SERVERS.get(key)
+        if server is None:
+            cli = paths.resolve_cli(settings, repo_root)
+            cli_command = [cli['command']] + cli['args_prefix']
+            server = ManagedServer(
+                command,
+                repo_root,
+                env=config.build_env(settings),
+                cli=cli if command[:len(cli_command)] == cli_command else None,
+            )
+            _SERVERS[key] = server
+    return server
+
+
+def running_url(settings, repo_root):
+    """Return the base URL of an already running server for ``repo_root``."""
+    if not repo_root or not is_enabled(settings):
+        return ''
+    repo_key = os.path.normcase(os.path.abspath(repo_root))
+    with _LOCK:
+        servers = [server for key, server in _SERVERS.items() if key[0] == repo_key]
+    for server in servers:
+        if server.is_ready():
+            return server.base_url
+    return ''
+
+
+def managed_settings(settings, repo_root, on_ready=None, allowed_roots=None):
+    """Point ``settings`` at the auto-started API server for ``repo_root``.
+
+    Returns the settings unchanged when auto start does not apply or while the
+    server is starting in ``prefer`` mode (the request runs via the CLI). In
+    ``require`` mode it returns ``None`` while starting and calls ``on_ready``
+    on the UI thread once the server is up (or has failed to start).
+    ``allowed_roots`` lets the server open other repos (federated search).
+    """
+    if not repo_root or not is_enabled(settings):
+        return settings
+    server = get_server(settings, repo_root, allowed_roots=allowed_roots)
+    if server.is_ready():
+        return dict(settings, api_server_url=server.base_url)
+    waiting = require_mode(settings) and on_ready is not None
+    if not server.is_starting():
+        if server.failed_at is not None and time.time() - server.failed_at < RETRY_AFTER_FAILURE_S:
+            ui.show_status('PairOfCleats: {0}'.format(server.error))
+            return settings
+        server.stop()
+    server.start_async(settings, on_ready=(lambda _ok: on_ready()) if waiting else None)
+    return None if waiting else settings
+
+
+def require_mode(settings):
+    return str((settings or {}).get('api_execution_mode') or '').strip().lower() == 'require'
+
+
+def stop_all():
+    with _LOCK:
+        servers = list(_SERVERS.values())
+        _SERVERS.clear()
+    for server in servers:
+        server.stop()
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import threading
+import time
+
+from . import runner
+
+VERSION_TIMEOUT_S = 10.0
+RETRY_AFTER_FAILURE_S = 30.0
+
+_INFO = {}
+_LOCK = threading.Lock()
+
+
+def cli_key(cli):
+    return (cli.get('command'), tuple(cli.get('args_prefix') or []))
+
+
+def get_info(cli, cwd=None, env=None, spawn_process=None):
+    """Check once that ``cli`` starts and return ``{ok, version, error}``.
+
+    The result is cached per CLI command until its entrypoint changes on disk.
+    A failed check is retried after ``RETRY_AFTER_FAILURE_S``.
+    """
+    key = cli_key(cli)
+    stamp = _entry_mtime(cli)
+    with _LOCK:
+        info = _INFO.get(key)
+    if info is not None and info['stamp'] == stamp:
+        if info['ok'] or time.time() - info['checked_at'] < RETRY_AFTER_FAILURE_S:
+            return dict(info)
+    info = _probe(cli, cwd, env, spawn_process or subprocess.Popen)
+    info['stamp'] = stamp
+    with _LOCK:
+        _INFO[key] = info
+    return dict(info)
+
+
+def clear():
+    with _LOCK:
+        _INFO.clear()
+
+
+def _entry_mtime(cli):
+    prefix = cli.get('args_prefix') or []
+    entry = prefix[0] if prefix else cli.get('command')
+    if not entry or not os.path.isabs(entry):
+        return None
+    try:
+        return os.stat(entry).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _probe(cli, cwd, env, spawn):
+    command = [cli.get('command')] + list(cli.get('args_prefix') or []) + ['--version']
+    info = {'ok': False, 'version': None, 'error': None, 'checked_at': time.time()}
+    try:
+        proc = spawn(
+            command,
+            cwd=cwd or None,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **runner._build_spawn_kwargs()
+        )
+    except Exception as exc:
+        info['error'] = 'Failed to launch PairOfCleats CLI ({0}): {1}'.format(cli.get('command'), exc)
+        return info
+    try:
+        stdout, stderr = proc.communicate(timeout=VERSION_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        runner._terminate_process_tree(proc, force=True)
+        try:
+            proc.communicate(timeout=1)
+        except Exception:
+            pass
+        info['error'] = 'PairOfCleats CLI did not answer --version within {0:.0f}s.'.format(VERSION_TIMEOUT_S)
+        return info
+    # The CLI prints its version to stderr.
+    text = b'\n'.join(part for part in (stderr, stdout) if part).decode('utf-8', errors='replace')
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if proc.returncode != 0:
+        info['error'] = 'PairOfCleats CLI exited with code {0}: {1}'.format(
+            proc.returncode,
+            lines[-1] if lines else 'no output',
+        )
+        return info
+    info['ok'] = True
+    info['version'] = lines[-1] if lines else None
+    return info
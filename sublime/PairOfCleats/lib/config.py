@@ -1,5 +1,8 @@
+import hashlib
 import json
 import os
+import threading
+import time
 from urllib.parse import urlparse
 
 import sublime
@@ -7,6 +10,10 @@ import sublime
 from . import paths
 
 SETTINGS_FILE = 'PairOfCleats.sublime-settings'
+SETTINGS_CHANGE_KEY = 'pairofcleats-config'
+PROJECT_RECHECK_S = 1.0
+VALIDATION_TTL_S = 2.0
+VALIDATION_CACHE_MAX_ENTRIES = 64
 
 DEFAULT_EDITOR_CONFIG_CONTRACT = {
     'schemaVersion': 1,
@@ -97,6 +104,8 @@ DEFAULT_SETTINGS = {
     'search_backend_default': '',
     'search_limit': 25,
     'search_prompt_options': False,
+    'search_live_debounce_ms': 150,
+    'search_unsaved_overlay': True,
     'search_ann_default': None,
     'search_allow_sparse_fallback': False,
     'search_as_of_default': '',
@@ -104,9 +113,13 @@ DEFAULT_SETTINGS = {
     'search_filter_default': '',
     'search_advanced_defaults': {},
     'history_limit': 25,
+    'cli_worker_enabled': True,
+    'cli_worker_idle_ms': 300000,
     'api_server_url': '',
     'api_timeout_ms': 5000,
     'api_execution_mode': 'cli',
+    'api_server_auto_start': True,
+    'index_status_interval_ms': 30000,
     'open_results_in': 'quick_panel',
     'results_buffer_threshold': 50,
     'progress_panel_on_start': True,
@@ -114,8 +127,11 @@ DEFAULT_SETTINGS = {
     'index_watch_scope': 'repo',
     'index_watch_folder': '',
     'index_watch_mode': 'all',
-    'index_watch_poll_ms': 2000,
+    'index_watch_backend': 'parcel',
+    'index_watch_poll_ms': 0,
     'index_watch_debounce_ms': 500,
+    'index_on_save': False,
+    'index_on_save_debounce_ms': 1000,
     'map_type_default': 'combined',
     'map_format_default': 'html-iso',
     'map_prompt_options': False,
@@ -145,11 +161,15 @@ SETTING_GROUPS = (
         'node_path',
         'index_mode_default',
         'history_limit',
+        'cli_worker_enabled',
+        'cli_worker_idle_ms',
     )),
     ('Search', (
         'search_backend_default',
         'search_limit',
         'search_prompt_options',
+        'search_live_debounce_ms',
+        'search_unsaved_overlay',
         'search_ann_default',
         'search_allow_sparse_fallback',
         'search_as_of_default',
@@ -161,6 +181,8 @@ SETTING_GROUPS = (
         'api_server_url',
         'api_timeout_ms',
         'api_execution_mode',
+        'api_server_auto_start',
+        'index_status_interval_ms',
     )),
     ('Output', (
         'open_results_in',
@@ -172,8 +194,11 @@ SETTING_GROUPS = (
         'index_watch_scope',
         'index_watch_folder',
         'index_watch_mode',
+        'index_watch_backend',
         'index_watch_poll_ms',
         'index_watch_debounce_ms',
+        'index_on_save',
+        'index_on_save_debounce_ms',
     )),
     ('Map', (
         'map_type_default',
@@ -208,6 +233,7 @@ VALID_OPEN_TARGETS = {'quick_panel', 'new_tab', 'output_panel'}
 VALID_API_EXECUTION_MODES = {'cli', 'prefer', 'require'}
 VALID_WATCH_SCOPES = {'repo', 'folder'}
 VALID_WATCH_MODES = {'all', 'code', 'prose', 'records', 'extracted-prose'}
+VALID_WATCH_BACKENDS = {'auto', 'parcel', 'chokidar'}
 VALID_MAP_TYPES = {'combined', 'imports', 'calls', 'usages', 'dataflow'}
 VALID_MAP_FORMATS = {'json', 'dot', 'svg', 'html', 'html-iso'}
 VALID_MAP_COLLAPSE = {'none', 'file', 'dir'}
@@ -272,9 +298,15 @@ WORKFLOW_TRANSPORTS = {
 }
 
 
+_BASE_CACHE = {'handle': None, 'values': None, 'version': 0}
+_WINDOW_SETTINGS = {}
+_VALIDATION_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
 def prime_settings():
     try:
-        sublime.load_settings(SETTINGS_FILE)
+        _load_base_settings()
     except Exception:
         pass
 
@@ -287,9 +319,80 @@ def get_setting_groups():
 
 
 def get_settings(window=None):
-    base = _load_base_settings()
+    """Return the effective settings for ``window`` as a fresh dict.
+
+    The merged snapshot is cached per window. It is dropped when the settings
+    file changes or the window's project is reloaded, and the project
+    overrides are re-read at most once per ``PROJECT_RECHECK_S``.
+    """
+    base, version = _base_snapshot()
+    if window is None:
+        return dict(base)
+    window_id = window.id()
+    now = time.time()
+    with _CACHE_LOCK:
+        cached = _WINDOW_SETTINGS.get(window_id)
+    if cached is not None and cached[0] == version and now - cached[2] < PROJECT_RECHECK_S:
+        return dict(cached[3])
     overrides = extract_project_settings(window)
-    return merge_settings(base, overrides)
+    stamp = _fingerprint(overrides)
+    if cached is not None and cached[0] == version and cached[1] == stamp:
+        merged = cached[3]
+    else:
+        merged = merge_settings(base, overrides)
+    with _CACHE_LOCK:
+        _WINDOW_SETTINGS[window_id] = (version, stamp, now, merged)
+    return dict(merged)
+
+
+def invalidate_settings(window=None):
+    """Drop cached settings for ``window`` (or every window)."""
+    with _CACHE_LOCK:
+        if window is None:
+            _WINDOW_SETTINGS.clear()
+        else:
+            _WINDOW_SETTINGS.pop(window.id(), None)
+        _VALIDATION_CACHE.clear()
+
+
+def _on_base_settings_change():
+    with _CACHE_LOCK:
+        _BASE_CACHE['values'] = None
+        _BASE_CACHE['version'] += 1
+        _WINDOW_SETTINGS.clear()
+        _VALIDATION_CACHE.clear()
+
+
+def _base_snapshot():
+    handle = sublime.load_settings(SETTINGS_FILE)
+    with _CACHE_LOCK:
+        if _BASE_CACHE['handle'] is handle and _BASE_CACHE['values'] is not None:
+            return _BASE_CACHE['values'], _BASE_CACHE['version']
+    values = _read_base_settings(handle)
+    with _CACHE_LOCK:
+        if _BASE_CACHE['handle'] is not handle:
+            previous = _BASE_CACHE['handle']
+            if previous is not None and hasattr(previous, 'clear_on_change'):
+                previous.clear_on_change(SETTINGS_CHANGE_KEY)
+            if hasattr(handle, 'add_on_change'):
+                handle.add_on_change(SETTINGS_CHANGE_KEY, _on_base_settings_change)
+            _BASE_CACHE['handle'] = handle
+            _BASE_CACHE['version'] += 1
+            _WINDOW_SETTINGS.clear()
+            _VALIDATION_CACHE.clear()
+        if not hasattr(handle, 'add_on_change'):
+            # Without change notifications the values cannot be trusted later.
+            return values, _BASE_CACHE['version']
+        _BASE_CACHE['values'] = values
+        return values, _BASE_CACHE['version']
+
+
+def _fingerprint(value):
+    try:
+        raw = json.dumps(value, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        raw = repr(value)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
 
 
 def build_project_settings_template():
@@ -351,6 +454,26 @@ def build_env(settings):
 
 
 def validate_settings(settings, repo_root=None, workflow=None):
+    """Return validation errors for ``settings``.
+
+    Results are memoized by a hash of the settings for ``VALIDATION_TTL_S`` so
+    the path checks on disk are not repeated for every search.
+    """
+    key = (_fingerprint(settings), repo_root, workflow)
+    now = time.time()
+    with _CACHE_LOCK:
+        cached = _VALIDATION_CACHE.get(key)
+    if cached is not None and now - cached[0] < VALIDATION_TTL_S:
+        return list(cached[1])
+    errors = _validate_settings(settings, repo_root, workflow)
+    with _CACHE_LOCK:
+        if len(_VALIDATION_CACHE) >= VALIDATION_CACHE_MAX_ENTRIES:
+            _VALIDATION_CACHE.clear()
+        _VALIDATION_CACHE[key] = (now, tuple(errors))
+    return errors
+
+
+def _validate_settings(settings, repo_root, workflow):
     errors = []
 
     mode = settings.get('index_mode_default')
@@ -428,16 +551,18 @@ def validate_settings(settings, repo_root=None, workflow=None):
     if api_server_url and not _is_valid_base_url(api_server_url):
         errors.append('api_server_url must be an http:// or https:// URL.')
     api_execution_mode = str(settings.get('api_execution_mode') or 'cli').strip().lower()
+    # With auto start the plugin fills in the URL of its own local server.
+    api_url_missing = not api_server_url and not bool(settings.get('api_server_auto_start', True))
     workflow_transport = get_workflow_transport(workflow) if workflow else None
     if api_execution_mode not in VALID_API_EXECUTION_MODES:
         errors.append('api_execution_mode must be one of: cli, prefer, require.')
     elif workflow_transport and api_execution_mode in {'prefer', 'require'}:
         if workflow_transport['supports_api']:
-            if not api_server_url:
+            if api_url_missing:
                 errors.append('api_server_url must be set when api_execution_mode is prefer or require.')
         elif api_execution_mode == 'require':
             errors.append('API mode is not supported for {0}.'.format(workflow_transport['label']))
-    elif api_execution_mode in {'prefer', 'require'} and not api_server_url:
+    elif api_execution_mode in {'prefer', 'require'} and api_url_missing:
         errors.append('api_server_url must be set when api_execution_mode is prefer or require.')
 
     env = _get_env_settings(settings)
@@ -460,15 +585,23 @@ def validate_settings(settings, repo_root=None, workflow=None):
             )
 
     _validate_int_setting(errors, settings, 'search_limit', allow_zero=False)
+    _validate_int_setting(errors, settings, 'search_live_debounce_ms', allow_zero=True)
     _validate_int_setting(errors, settings, 'results_buffer_threshold', allow_zero=True)
     _validate_bool_setting(errors, settings, 'progress_panel_on_start')
     _validate_int_setting(errors, settings, 'progress_watchdog_ms', allow_zero=False)
     _validate_int_setting(errors, settings, 'history_limit', allow_zero=True)
+    _validate_bool_setting(errors, settings, 'api_server_auto_start')
+    _validate_bool_setting(errors, settings, 'cli_worker_enabled')
+    _validate_int_setting(errors, settings, 'cli_worker_idle_ms', allow_zero=False)
     _validate_int_setting(errors, settings, 'api_timeout_ms', allow_zero=False)
-    _validate_int_setting(errors, settings, 'index_watch_poll_ms', allow_zero=False)
+    _validate_int_setting(errors, settings, 'index_status_interval_ms', allow_zero=True)
+    _validate_int_setting(errors, settings, 'index_watch_poll_ms', allow_zero=True)
     _validate_int_setting(errors, settings, 'index_watch_debounce_ms', allow_zero=False)
+    _validate_bool_setting(errors, settings, 'index_on_save')
+    _validate_int_setting(errors, settings, 'index_on_save_debounce_ms', allow_zero=True)
 
     _validate_bool_setting(errors, settings, 'search_prompt_options')
+    _validate_bool_setting(errors, settings, 'search_unsaved_overlay')
 
     watch_scope = settings.get('index_watch_scope')
     if watch_scope and watch_scope not in VALID_WATCH_SCOPES:
@@ -478,6 +611,10 @@ def validate_settings(settings, repo_root=None, workflow=None):
     if watch_mode and watch_mode not in VALID_WATCH_MODES:
         errors.append('index_watch_mode must be one of: all, code, prose, records, extracted-prose.')
 
+    watch_backend = settings.get('index_watch_backend')
+    if watch_backend and watch_backend not in VALID_WATCH_BACKENDS:
+        errors.append('index_watch_backend must be auto, parcel, or chokidar.')
+
     watch_folder = settings.get('index_watch_folder')
     if watch_folder and (os.path.isabs(watch_folder) or repo_root):
         resolved = paths.resolve_path_within_repo(repo_root, watch_folder) if repo_root else _resolve_path(repo_root, watch_folder)
@@ -521,7 +658,10 @@ def validate_settings(settings, repo_root=None, workflow=None):
 
 
 def _load_base_settings():
-    settings = sublime.load_settings(SETTINGS_FILE)
+    return dict(_base_snapshot()[0])
+
+
+def _read_base_settings(settings):
     values = dict(DEFAULT_SETTINGS)
     for key in DEFAULT_SETTINGS:
         values[key] = settings.get(key, DEFAULT_SETTINGS[key])
@@ -0,0 +1,112 @@
+import json
+import os
+
+from . import paths
+from . import state_store
+
+WORKSPACE_FILE = 'workspace.jsonc'
+FEDERATION_CACHE_DIR = 'federation'
+
+
+def collect_repo_roots(window):
+    """Return every repo root in ``window``, the active file's repo first."""
+    info = paths.describe_repo_root(window)
+    roots = []
+    for entry in info.get('repo_roots') or []:
+        root = entry.get('root') if isinstance(entry, dict) else None
+        if root and root not in roots:
+            roots.append(root)
+    return roots
+
+
+def workspace_path(primary_root):
+    return os.path.join(primary_root, state_store.STATE_DIR, WORKSPACE_FILE)
+
+
+def build_aliases(roots):
+    aliases = {}
+    for root in roots:
+        base = os.path.basename(os.path.normpath(root)) or 'repo'
+        alias = base
+        suffix = 2
+        while alias.lower() in [existing.lower() for existing in aliases]:
+            alias = '{0}-{1}'.format(base, suffix)
+            suffix += 1
+        aliases[alias] = root
+    return aliases
+
+
+def write_workspace(primary_root, roots):
+    """Write the workspace file describing ``roots`` next to the plugin state.
+
+    The federation cache lives under the primary repo so an API server started
+    for that repo is allowed to write it. The file is only rewritten when its
+    content changes, which keeps the server's workspace manifest warm.
+    Returns ``(path, aliases)`` where ``aliases`` maps alias to repo root.
+    """
+    aliases = build_aliases(roots)
+    path = workspace_path(primary_root)
+    config = {
+        'schemaVersion': 1,
+        'name': 'Sublime Text window',
+        'cacheRoot': os.path.join(os.path.dirname(path), FEDERATION_CACHE_DIR),
+        'repos': [{'root': root, 'alias': alias} for alias, root in aliases.items()],
+    }
+    text = json.dumps(config, indent=2, sort_keys=True) + '\n'
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            current = handle.read()
+    except (OSError, ValueError):
+        current = None
+    if current != text:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+    return path, aliases
+
+
+def build_request(workspace, query, search_payload):
+    search = dict(search_payload or {})
+    for key in ('repo', 'query', 'output'):
+        search.pop(key, None)
+    return {
+        'workspacePath': workspace,
+        'query': query,
+        'search': search,
+    }
+
+
+def collect_hits(payload, aliases, collect):
+    """Tag federated hits with their repo root and order them by score."""
+    lookup = dict((alias.lower(), root) for alias, root in aliases.items())
+    hits = []
+    for hit in collect(payload):
+        alias = hit.get('repoAlias') or ''
+        root = lookup.get(str(alias).lower())
+        if root:
+            hit['repoRoot'] = root
+        hits.append(hit)
+    hits.sort(key=_score_key)
+    return hits
+
+
+def group_by_repo(hits, aliases):
+    """Return ``[(alias, hits)]`` with the best-scoring repo first."""
+    groups = {}
+    order = []
+    for hit in hits:
+        alias = hit.get('repoAlias') or hit.get('repoId') or 'unknown'
+        if alias not in groups:
+            groups[alias] = []
+            order.append(alias)
+        groups[alias].append(hit)
+    for alias in aliases:
+        if alias not in groups:
+            groups[alias] = []
+            order.append(alias)
+    return [(alias, groups[alias]) for alias in order]
+
+
+def _score_key(hit):
+    score = hit.get('score')
+    return -score if isinstance(score, (int, float)) else 0
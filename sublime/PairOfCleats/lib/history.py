@@ -1,8 +1,10 @@
+from . import state_store
+
+
 def load_history(window):
     if window is None:
         return []
-    _, state = _load_state(window)
-    history = state.get('history')
+    history = state_store.get(window, 'history')
     if isinstance(history, list):
         return list(history)
     return []
@@ -11,11 +13,10 @@ def load_history(window):
 def get_last_query(window):
     if window is None:
         return None
-    _, state = _load_state(window)
-    last = state.get('last_search')
+    last = state_store.get(window, 'last_search')
     if isinstance(last, dict) and last.get('query'):
         return dict(last)
-    history = state.get('history')
+    history = state_store.get(window, 'history')
     if isinstance(history, list) and history:
         entry = history[0]
         if isinstance(entry, dict) and entry.get('query'):
@@ -26,8 +27,7 @@ def get_last_query(window):
 def record_query(window, query, options, limit):
     if window is None or not query:
         return
-    data, state = _load_state(window)
-    history = state.get('history')
+    history = state_store.get(window, 'history')
     if not isinstance(history, list):
         history = []
     entry = _build_entry(query, options)
@@ -35,18 +35,8 @@ def record_query(window, query, options, limit):
     history.insert(0, entry)
     if isinstance(limit, int) and limit > 0:
         history = history[:limit]
-    state['history'] = history
-    state['last_search'] = entry
-    data['pairofcleats_state'] = state
-    window.set_project_data(data)
-
-
-def _load_state(window):
-    data = window.project_data() or {}
-    state = data.get('pairofcleats_state')
-    if not isinstance(state, dict):
-        state = {}
-    return data, state
+    state_store.put(window, 'history', history)
+    state_store.put(window, 'last_search', entry)
 
 
 def _build_entry(query, options):
@@ -0,0 +1,390 @@
+import datetime
+import os
+import threading
+import time
+
+import sublime
+
+from . import api_client
+from . import api_service
+from . import config
+from . import index_state
+from . import paths
+from . import result_cache
+from . import tasks
+from . import watch
+
+STATUS_KEY = 'pairofcleats-index'
+MIN_BACKOFF_S = 2.0
+MAX_BACKOFF_S = 60.0
+INDEX_TASK_TITLES = ('PairOfCleats index build', 'PairOfCleats index update')
+
+_MONITORS = {}
+_WINDOW_REPOS = {}
+# Windows whose repo and settings were resolved since the last forget_window.
+_RESOLVED = set()
+_UNREAD = object()
+_LOCK = threading.Lock()
+
+
+class StatusMonitor(object):
+    """Background subscriber to ``/status/stream?follow=1`` for one repo.
+
+    The server keeps the stream open and pushes a snapshot whenever a build
+    is promoted. When the stream ends (a server without follow support sends
+    one snapshot) the monitor reconnects after ``interval_s``, backing off
+    exponentially while the server is unreachable. A changed index generation
+    clears the plugin's caches. The last build time is read from the state
+    store once and again only after ``refresh`` (a build or watch update
+    finished).
+    """
+
+    def __init__(self, repo_root, settings, interval_s, on_update=None):
+        self.repo_root = repo_root
+        self.settings = settings
+        self.config_key = _config_key(settings)
+        self.interval_s = interval_s
+        self.on_update = on_update
+        self.windows = {}
+        self.status = None
+        self.generation = None
+        self.changed_at = None
+        self.updated_at = None
+        self.error = None
+        self.failures = 0
+        self.built_at = _UNREAD
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._conn = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        conn = self._conn
+        if conn is not None:
+            # Unblock the stream read so the thread exits now.
+            api_client._shutdown_quietly(conn)
+
+    def refresh(self):
+        self.built_at = _UNREAD
+        self._wake.set()
+
+    def next_delay(self):
+        if self.failures:
+            return min(MAX_BACKOFF_S, MIN_BACKOFF_S * (2 ** (self.failures - 1)))
+        return self.interval_s
+
+    def poll_once(self):
+        """Follow the status stream until it ends or fails."""
+        base_url = _base_url(self.settings, self.repo_root)
+        try:
+            if not base_url:
+                raise RuntimeError('API server is not running.')
+            api_client.follow_status(
+                base_url,
+                self.repo_root,
+                self.settings,
+                self._note_status,
+                on_connect=self._attach,
+            )
+        except Exception as exc:
+            if self._stopped:
+                return
+            self.error = str(exc) or 'API status request failed.'
+            self.failures += 1
+            if callable(self.on_update):
+                self.on_update(self)
+        finally:
+            self._conn = None
+
+    def _attach(self, conn):
+        self._conn = conn
+        if self._stopped:
+            api_client._shutdown_quietly(conn)
+
+    def _note_status(self, status):
+        if self._stopped:
+            return
+        self.updated_at = time.time()
+        self.error = None
+        self.failures = 0
+        if status is None:
+            # Keep-alive ping: the stream is healthy and nothing changed.
+            return
+        # follow_status already cleared caches built on an older generation
+        # (result_cache.note_status).
+        generation = result_cache.status_generation(status)
+        if generation != self.generation:
+            self.generation = generation
+            self.changed_at = time.time()
+        self.status = status
+        if callable(self.on_update):
+            self.on_update(self)
+
+    def _run(self):
+        while not self._stopped:
+            self.poll_once()
+            if self._stopped:
+                break
+            self._wake.wait(self.next_delay())
+            self._wake.clear()
+
+
+def _base_url(settings, repo_root):
+    explicit = api_client.normalize_base_url(settings.get('api_server_url'))
+    if explicit:
+        return explicit
+    return api_service.running_url(settings, repo_root)
+
+
+def _repo_key(repo_root):
+    return os.path.normcase(os.path.abspath(repo_root))
+
+
+def _config_key(settings):
+    return tuple(settings.get(key) for key in (
+        'api_server_url',
+        'api_execution_mode',
+        'api_server_auto_start',
+        'api_timeout_ms',
+        'index_status_interval_ms',
+    ))
+
+
+def _interval_s(settings):
+    value = settings.get('index_status_interval_ms')
+    if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+        return None
+    return value / 1000.0
+
+
+def _can_monitor(settings):
+    if api_client.normalize_base_url(settings.get('api_server_url')):
+        return True
+    return api_service.is_enabled(settings)
+
+
+def watch_window(window, view=None):
+    """Subscribe ``window`` to status updates for its repo and paint ``view``.
+
+    Once a window is subscribed this only repaints; the repo and settings are
+    resolved again after ``forget_window`` (folders, project or settings
+    changed).
+    """
+    if window is None:
+        return None
+    with _LOCK:
+        monitor = _MONITORS.get(_WINDOW_REPOS.get(window.id())) if window.id() in _RESOLVED else None
+    if monitor is not None:
+        paint_view(view or window.active_view(), monitor, window)
+        return monitor
+    settings = config.get_settings(window)
+    interval_s = _interval_s(settings)
+    repo_root = paths.resolve_repo_root(window, return_reason=False)
+    if not interval_s or not repo_root or not _can_monitor(settings):
+        release_window(window)
+        return None
+    key = _repo_key(repo_root)
+    stop = None
+    with _LOCK:
+        previous = _WINDOW_REPOS.get(window.id())
+        if previous is not None and previous != key:
+            stop = _detach(window.id(), previous)
+        monitor = _MONITORS.get(key)
+        if monitor is None or monitor.config_key != _config_key(settings):
+            replaced = monitor
+            monitor = StatusMonitor(repo_root, settings, interval_s, on_update=_schedule_paint)
+            if replaced is not None:
+                monitor.windows = dict(replaced.windows)
+                replaced.stop()
+            _MONITORS[key] = monitor
+        monitor.windows[window.id()] = window
+        _WINDOW_REPOS[window.id()] = key
+        _RESOLVED.add(window.id())
+    if stop is not None:
+        stop.stop()
+    monitor.start()
+    paint_view(view or window.active_view(), monitor, window)
+    return monitor
+
+
+def _detach(window_id, key):
+    _WINDOW_REPOS.pop(window_id, None)
+    _RESOLVED.discard(window_id)
+    monitor = _MONITORS.get(key)
+    if monitor is None:
+        return None
+    monitor.windows.pop(window_id, None)
+    if monitor.windows:
+        return None
+    _MONITORS.pop(key, None)
+    return monitor
+
+
+def release_window(window):
+    if window is None:
+        return
+    with _LOCK:
+        key = _WINDOW_REPOS.get(window.id())
+        monitor = _detach(window.id(), key) if key is not None else None
+    if monitor is not None:
+        monitor.stop()
+    view = window.active_view()
+    if view is not None:
+        view.erase_status(STATUS_KEY)
+
+
+def forget_window(window=None):
+    """Re-resolve the repo and settings of ``window`` (all windows if None)."""
+    with _LOCK:
+        if window is None:
+            _RESOLVED.clear()
+        else:
+            _RESOLVED.discard(window.id())
+
+
+def refresh(repo_root):
+    """Ask the monitor for ``repo_root`` to reconnect now (after a build).
+
+    The cached last build time is re-read on the next paint.
+    """
+    if not repo_root:
+        return
+    with _LOCK:
+        monitor = _MONITORS.get(_repo_key(repo_root))
+    if monitor is not None:
+        monitor.refresh()
+
+
+def paint_window(window):
+    """Repaint the status of ``window`` (for example when a build starts)."""
+    if window is None:
+        return
+    with _LOCK:
+        monitor = _MONITORS.get(_WINDOW_REPOS.get(window.id()))
+    if monitor is not None:
+        paint_view(window.active_view(), monitor, window)
+
+
+def get_monitor(repo_root):
+    with _LOCK:
+        return _MONITORS.get(_repo_key(repo_root))
+
+
+def stop_all():
+    with _LOCK:
+        monitors = list(_MONITORS.values())
+        _MONITORS.clear()
+        _WINDOW_REPOS.clear()
+        _RESOLVED.clear()
+    for monitor in monitors:
+        monitor.stop()
+
+
+def _schedule_paint(monitor):
+    sublime.set_timeout(lambda: _paint_windows(monitor), 0)
+
+
+def _paint_windows(monitor):
+    with _LOCK:
+        windows = list(monitor.windows.values())
+    for window in windows:
+        paint_view(window.active_view(), monitor, window)
+
+
+def paint_view(view, monitor, window=None):
+    if view is None or monitor is None:
+        return
+    text = format_status(monitor, window)
+    if text:
+        view.set_status(STATUS_KEY, text)
+    else:
+        view.erase_status(STATUS_KEY)
+
+
+def format_status(monitor, window=None, now=None):
+    now = time.time() if now is None else now
+    building = _index_task(window, monitor.repo_root)
+    if building is not None:
+        details = building.get('details') or ''
+        return 'PairOfCleats: indexing{0}'.format(' - {0}'.format(details[:60]) if details else '')
+    if monitor.status is None:
+        if monitor.error:
+            return 'PairOfCleats: index status unavailable'
+        return ''
+    parts = ['PairOfCleats: index {0}'.format((monitor.generation or 'unknown')[:7])]
+    issues = len(((monitor.status.get('health') or {}).get('issues')) or [])
+    if issues:
+        parts.append('{0} issue{1}'.format(issues, '' if issues == 1 else 's'))
+    built_at = _last_build_time(monitor, window)
+    if built_at is not None:
+        parts.append('built {0} ago'.format(_format_age(now - built_at)))
+    watch_text = _format_watch(window)
+    if watch_text:
+        parts.append(watch_text)
+    if monitor.error:
+        parts.append('offline')
+    elif monitor.updated_at is not None and now - monitor.updated_at > 2 * monitor.interval_s + MAX_BACKOFF_S:
+        parts.append('stale')
+    return ' | '.join(parts)
+
+
+def _format_watch(window):
+    active = watch.snapshot(window) if window is not None else None
+    if not active or not active.get('backend'):
+        return ''
+    text = 'watch {0}'.format(active['backend'])
+    if active.get('lagMs') is not None:
+        text = '{0}, lag {1}ms'.format(text, active['lagMs'])
+    return text
+
+
+def _index_task(window, repo_root):
+    if window is None:
+        return None
+    repo_key = _repo_key(repo_root)
+    for task in tasks.active_tasks(window):
+        if task.get('title') not in INDEX_TASK_TITLES or not task.get('repoRoot'):
+            continue
+        if _repo_key(task['repoRoot']) == repo_key:
+            return task
+    return None
+
+
+def _last_build_time(monitor, window):
+    if monitor.built_at is _UNREAD:
+        if window is None:
+            return None
+        monitor.built_at = _read_build_time(window)
+    return monitor.built_at
+
+
+def _read_build_time(window):
+    state = index_state.get_last_build(window)
+    stamp = (state or {}).get('last_time')
+    if not stamp:
+        return None
+    try:
+        parsed = datetime.datetime.strptime(stamp, '%Y-%m-%dT%H:%M:%SZ')
+    except ValueError:
+        return None
+    return (parsed - datetime.datetime(1970, 1, 1)).total_seconds()
+
+
+def _format_age(seconds):
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return '{0}s'.format(seconds)
+    if seconds < 3600:
+        return '{0}m'.format(seconds // 60)
+    if seconds < 86400:
+        return '{0}h'.format(seconds // 3600)
+    return '{0}d'.format(seconds // 86400)
@@ -1,7 +1,10 @@
-def build_index_args(mode, repo_root=None, watch=False, watch_poll_ms=None, watch_debounce_ms=None):
+def build_index_args(mode, repo_root=None, watch=False, watch_poll_ms=None, watch_debounce_ms=None,
+                     incremental=False):
     args = ['index', 'watch' if watch else 'build']
     if mode:
         args.extend(['--mode', mode])
+    if incremental:
+        args.append('--incremental')
     if watch:
         if watch_poll_ms is not None:
             args.extend(['--watch-poll', str(watch_poll_ms)])
@@ -0,0 +1,135 @@
+import json
+import re
+
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+_STRING_END = re.compile(r'["\\]')
+_NON_SPACE = re.compile(r'\S')
+
+
+class JsonStreamDecoder(object):
+    """Incrementally split a text stream into JSON documents.
+
+    Accepts a single JSON document or JSON lines (any whitespace-separated
+    sequence of objects/arrays). Text is appended to one buffer; when a
+    document's closing bracket arrives it is decoded from that buffer with
+    ``raw_decode`` and the buffer is trimmed to the text after it.
+    """
+
+    def __init__(self):
+        self.documents = []
+        self.error = None
+        self._buffer = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._scalar = False
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        if self.error is not None or not text:
+            return
+        # Drop the attribute's reference first so CPython can grow the string
+        # in place instead of copying the whole pending document per chunk.
+        buffer = self._buffer
+        self._buffer = ''
+        buffer += text
+        pos = self._pos
+        while pos < len(buffer):
+            if self._scalar:
+                # Top-level scalars (``null``, ``42``) are only valid as the
+                # whole stream; they are decoded in ``close``.
+                pos = len(buffer)
+                break
+            if self._depth == 0:
+                match = _NON_SPACE.search(buffer, pos)
+                if match is None:
+                    buffer = ''
+                    pos = 0
+                    break
+                buffer = buffer[match.start():]
+                pos = 0
+                if buffer[0] not in '{[':
+                    if self.documents:
+                        self._fail('Unexpected output after JSON document: {0!r}'.format(buffer[:40]))
+                        return
+                    self._scalar = True
+                    continue
+            pos = self._scan(buffer, pos)
+            if self._depth == 0 and not self._in_string:
+                try:
+                    document, _end = self._decoder.raw_decode(buffer)
+                except ValueError as exc:
+                    self._fail(str(exc))
+                    return
+                self.documents.append(document)
+                buffer = buffer[pos:]
+                pos = 0
+        self._buffer = buffer
+        self._pos = pos
+
+    def close(self):
+        """Finish the stream and return the decoded documents."""
+        if self.error is None and self._buffer:
+            if self._scalar:
+                try:
+                    self.documents.append(json.loads(self._buffer))
+                except ValueError as exc:
+                    self._fail(str(exc))
+                self._buffer = ''
+            else:
+                self._fail('JSON output ended before the document was complete.')
+        return self.documents
+
+    def _scan(self, text, pos):
+        length = len(text)
+        while pos < length:
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
+            if self._in_string:
+                match = _STRING_END.search(text, pos)
+                if match is None:
+                    return length
+                pos = match.end()
+                if match.group() == '\\':
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                return length
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+        return length
+
+    def _fail(self, message):
+        self.error = message
+        self._buffer = ''
+        self._pos = 0
+
+
+def decode_payload(decoder):
+    """Return the payload for a finished ``JsonStreamDecoder``.
+
+    A single document is returned as-is, JSON lines as a list and empty
+    output as an empty object.
+    """
+    documents = decoder.close()
+    if decoder.error is not None:
+        raise ValueError(decoder.error)
+    if not documents:
+        return {}
+    if len(documents) == 1:
+        return documents[0]
+    return documents
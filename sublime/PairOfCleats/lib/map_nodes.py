@@ -0,0 +1,244 @@
+import array
+import json
+import os
+import re
+import threading
+import time
+
+READ_CHUNK_CHARS = 65536
+CACHE_MAX_ENTRIES = 4
+EXISTS_RECHECK_S = 1.0
+EXISTS_CACHE_MAX_ENTRIES = 64
+
+# Longest top-level string kept while looking for the ``nodes`` key.
+MAX_KEY_CHARS = 64
+
+_STRUCTURE = re.compile(r'["{}\[\]:,]')
+_STRING_END = re.compile(r'\\.|"', re.S)
+_SKIP = re.compile(r'[\s,]*')
+
+_INDEXES = {}
+_EXISTS = {}
+_LOCK = threading.Lock()
+
+
+class NodeIndex(object):
+    """Array-backed view of a map ``.nodes.json`` node list.
+
+    Each node keeps its label, an index into a shared file table and its line
+    range in flat arrays. Quick panel items (the label/file search keys) are
+    built once on first use and reused for every later jump.
+    """
+
+    __slots__ = ('labels', 'files', 'file_ids', 'start_lines', 'end_lines', '_items')
+
+    def __init__(self):
+        self.labels = []
+        self.files = []
+        self.file_ids = array.array('l')
+        self.start_lines = array.array('l')
+        self.end_lines = array.array('l')
+        self._items = None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, node, file_table):
+        if not isinstance(node, dict):
+            return
+        file_path = node.get('file') or None
+        if file_path is None:
+            file_id = -1
+        else:
+            file_id = file_table.get(file_path)
+            if file_id is None:
+                file_id = len(self.files)
+                file_table[file_path] = file_id
+                self.files.append(file_path)
+        self.labels.append(str(node.get('label') or node.get('id') or '(unnamed node)'))
+        self.file_ids.append(file_id)
+        self.start_lines.append(_line(node.get('startLine')))
+        self.end_lines.append(_line(node.get('endLine')))
+
+    def items(self):
+        if self._items is None:
+            items = []
+            for index, label in enumerate(self.labels):
+                file_id = self.file_ids[index]
+                file_label = self.files[file_id] if file_id >= 0 else '(no file)'
+                start_line = self.start_lines[index]
+                if start_line > 0:
+                    file_label = '{0}:{1}'.format(file_label, start_line)
+                items.append([label, file_label])
+            self._items = items
+        return self._items
+
+    def hit(self, index):
+        """Return ``{file, startLine, endLine}`` for node ``index``."""
+        file_id = self.file_ids[index]
+        return {
+            'file': self.files[file_id] if file_id >= 0 else None,
+            'startLine': self.start_lines[index] or None,
+            'endLine': self.end_lines[index] or None,
+        }
+
+
+def _line(value):
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    return 0
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def is_available(path):
+    """Return whether ``path`` exists, re-checking disk at most once a second."""
+    if not path:
+        return False
+    now = time.time()
+    with _LOCK:
+        cached = _EXISTS.get(path)
+    if cached is not None and now - cached[0] < EXISTS_RECHECK_S:
+        return cached[1]
+    exists = os.path.exists(path)
+    with _LOCK:
+        _EXISTS.pop(path, None)
+        _EXISTS[path] = (now, exists)
+        while len(_EXISTS) > EXISTS_CACHE_MAX_ENTRIES:
+            _EXISTS.pop(next(iter(_EXISTS)))
+    return exists
+
+
+def get_index(path):
+    """Return the cached ``NodeIndex`` for ``path``, reparsing when it changes.
+
+    Raises ``OSError`` or ``ValueError`` when the file cannot be read.
+    """
+    stamp = _stamp(path)
+    if stamp is None:
+        raise OSError('Node list not found: {0}'.format(path))
+    with _LOCK:
+        cached = _INDEXES.get(path)
+        if cached is not None and cached[0] == stamp:
+            # Re-insert to keep the most recently used maps last.
+            _INDEXES.pop(path)
+            _INDEXES[path] = cached
+            return cached[1]
+    with open(path, 'r', encoding='utf-8') as handle:
+        index = _parse(handle)
+    with _LOCK:
+        _INDEXES.pop(path, None)
+        _INDEXES[path] = (stamp, index)
+        while len(_INDEXES) > CACHE_MAX_ENTRIES:
+            _INDEXES.pop(next(iter(_INDEXES)))
+    return index
+
+
+def clear():
+    with _LOCK:
+        _INDEXES.clear()
+        _EXISTS.clear()
+
+
+def _seek_nodes(handle):
+    """Read up to the ``[`` of the top-level ``nodes`` array.
+
+    Tracks nesting depth and string state, so a ``"nodes"`` key inside a
+    nested object or a string value is never taken for the node list. Only the
+    current chunk (plus a partial top-level key) is held in memory. Returns the
+    unread text after the ``[`` and whether the file is exhausted.
+    """
+    buffer = ''
+    pos = 0
+    eof = False
+    depth = 0
+    in_string = False
+    string_start = None
+    last_string = None
+    key = None
+    while True:
+        if in_string:
+            match = _STRING_END.search(buffer, pos)
+            if match is not None and match.group() == '"':
+                in_string = False
+                if string_start is not None:
+                    last_string = json.loads(buffer[string_start:match.end()])
+                    string_start = None
+                pos = match.end()
+                continue
+            if match is not None:
+                pos = match.end()
+                continue
+            # Only a lone trailing backslash can be left; keep it for the next chunk.
+            pos = len(buffer) - 1 if buffer.endswith('\\') else len(buffer)
+        else:
+            match = _STRUCTURE.search(buffer, pos)
+            if match is not None:
+                token = match.group()
+                pos = match.end()
+                if token == '"':
+                    in_string = True
+                    string_start = match.start() if depth == 1 else None
+                    last_string = None
+                elif depth == 1 and token == ':':
+                    key = last_string
+                elif depth == 1 and token == ',':
+                    key = None
+                elif token in '{[':
+                    if depth == 1 and token == '[' and key == 'nodes':
+                        return buffer[pos:], eof
+                    depth += 1
+                elif token in '}]':
+                    depth -= 1
+                continue
+            pos = len(buffer)
+        if eof:
+            raise ValueError('Node list has no "nodes" array.')
+        if string_start is not None and pos - string_start > MAX_KEY_CHARS:
+            # Too long to be the key; keep scanning without its text.
+            string_start = None
+        keep = pos if string_start is None else string_start
+        chunk = handle.read(READ_CHUNK_CHARS)
+        eof = not chunk
+        buffer = buffer[keep:] + chunk
+        pos -= keep
+        if string_start is not None:
+            string_start = 0
+
+
+def _parse(handle):
+    # Decode the ``nodes`` array one element at a time so only the chunk being
+    # read and the compact index are held in memory, never the whole payload.
+    decoder = json.JSONDecoder()
+    index = NodeIndex()
+    file_table = {}
+    buffer, eof = _seek_nodes(handle)
+    pos = 0
+    while True:
+        pos = _SKIP.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return index
+        if pos < len(buffer):
+            try:
+                node, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # A value that runs to the end of the buffer may be cut off.
+                if end < len(buffer) or eof:
+                    index.add(node, file_table)
+                    pos = end
+                    continue
+        if eof:
+            raise ValueError('Node list ended before the "nodes" array closed.')
+        chunk = handle.read(READ_CHUNK_CHARS)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
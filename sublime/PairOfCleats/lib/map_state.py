@@ -1,28 +1,32 @@
-def get_last_map(window):
+from . import session_blobs
+from . import state_store
+
+# Fields kept inline so menus can check the last map without loading its blob.
+SUMMARY_KEYS = ('repo', 'format', 'source', 'outPath', 'modelPath', 'nodeListPath', 'browserUrl', 'cacheKey')
+
+
+def get_last_map_ref(window):
     if window is None:
         return None
-    _, state = _load_state(window)
-    entry = state.get('last_map')
+    entry = state_store.get(window, 'last_map')
     if isinstance(entry, dict):
-        return dict(entry)
+        return entry
     return None
 
 
+def get_last_map(window):
+    entry = get_last_map_ref(window)
+    if entry is None:
+        return None
+    # A collected blob still leaves the summary fields to work with.
+    return session_blobs.load_session(window, entry) or entry
+
+
 def record_last_map(window, payload, report_text=None):
     if window is None or not isinstance(payload, dict):
         return
-    data, state = _load_state(window)
     entry = dict(payload)
     if isinstance(report_text, str) and report_text:
         entry['reportText'] = report_text
-    state['last_map'] = entry
-    data['pairofcleats_state'] = state
-    window.set_project_data(data)
-
-
-def _load_state(window):
-    data = window.project_data() or {}
-    state = data.get('pairofcleats_state')
-    if not isinstance(state, dict):
-        state = {}
-    return data, state
+    ref = session_blobs.store_session(window, entry, summary_keys=SUMMARY_KEYS)
+    state_store.put(window, 'last_map', ref)
@@ -0,0 +1,183 @@
+import bisect
+import difflib
+import os
+import threading
+
+import sublime
+
+from . import results
+
+MAX_BUFFER_CHARS = 2 * 1024 * 1024
+# Lines left on either side once the unchanged head and tail are trimmed;
+# larger edits are not diffed and their hits keep the saved line numbers.
+MAX_DIFF_LINES = 5000
+LINE_MAP_CACHE_MAX_ENTRIES = 32
+
+_LINE_MAPS = {}
+_LOCK = threading.Lock()
+_MISSING = object()
+
+
+def _path_key(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def dirty_buffers(window):
+    """Return ``{path_key: view}`` for files with unsaved edits in ``window``."""
+    buffers = {}
+    if window is None:
+        return buffers
+    for view in window.views():
+        file_name = view.file_name()
+        if not file_name or not view.is_dirty() or view.size() > MAX_BUFFER_CHARS:
+            continue
+        buffers[_path_key(file_name)] = view
+    return buffers
+
+
+def apply(window, hits, repo_root, on_done):
+    """Move hit line ranges in files with unsaved edits onto the live buffer.
+
+    Hits come from the on-disk index. For each dirty buffer the saved file is
+    diffed against the buffer text once per change count, and ``startLine`` /
+    ``endLine`` are mapped through that diff. Hits in clean files are returned
+    unchanged; nothing is written to the index.
+
+    Must be called on the UI thread. ``on_done(hits)`` runs right away when
+    every line map is cached; otherwise the buffers are copied and diffed on a
+    background thread and ``on_done`` is called back on the UI thread.
+    """
+    buffers = dirty_buffers(window)
+    if not buffers or not hits:
+        on_done(hits)
+        return
+    maps = {}
+    pending = {}
+    for hit in hits:
+        file_path = results.resolve_hit_path(hit, repo_root)
+        path_key = _path_key(file_path) if file_path else None
+        view = buffers.get(path_key)
+        if view is None or path_key in maps or path_key in pending:
+            continue
+        key = _cache_key(file_path, view)
+        if key is None:
+            continue
+        with _LOCK:
+            cached = _LINE_MAPS.get(key, _MISSING)
+        if cached is _MISSING:
+            pending[path_key] = (key, file_path, view.substr(sublime.Region(0, view.size())))
+        else:
+            maps[path_key] = cached
+
+    def finish():
+        updated = []
+        for hit in hits:
+            file_path = results.resolve_hit_path(hit, repo_root)
+            line_map = maps.get(_path_key(file_path)) if file_path else None
+            updated.append(_remap(hit, line_map) if line_map is not None else hit)
+        on_done(updated)
+
+    if not pending:
+        finish()
+        return
+
+    def build():
+        for path_key, (key, file_path, text) in pending.items():
+            maps[path_key] = _build_line_map(key, file_path, text)
+        sublime.set_timeout(finish, 0)
+
+    thread = threading.Thread(target=build)
+    thread.daemon = True
+    thread.start()
+
+
+def clear():
+    with _LOCK:
+        _LINE_MAPS.clear()
+
+
+def _cache_key(file_path, view):
+    try:
+        stamp = os.stat(file_path).st_mtime_ns
+    except OSError:
+        return None
+    return (_path_key(file_path), view.id(), view.change_count(), stamp)
+
+
+def _build_line_map(key, file_path, text):
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as handle:
+            saved = handle.read().splitlines()
+    except OSError:
+        return None
+    line_map = _LineMap.build(saved, text.splitlines())
+    with _LOCK:
+        _LINE_MAPS[key] = line_map
+        while len(_LINE_MAPS) > LINE_MAP_CACHE_MAX_ENTRIES:
+            _LINE_MAPS.pop(next(iter(_LINE_MAPS)))
+    return line_map
+
+
+class _LineMap(object):
+    """Map 1-based line numbers of the saved file to the live buffer."""
+
+    def __init__(self, opcodes, live_count):
+        self.opcodes = opcodes
+        self.starts = [op[1] for op in opcodes]
+        self.live_count = live_count
+
+    @classmethod
+    def build(cls, saved, live):
+        """Diff only the edited region; return ``None`` if it is too large."""
+        limit = min(len(saved), len(live))
+        head = 0
+        while head < limit and saved[head] == live[head]:
+            head += 1
+        tail = 0
+        while tail < limit - head and saved[-1 - tail] == live[-1 - tail]:
+            tail += 1
+        saved_end = len(saved) - tail
+        live_end = len(live) - tail
+        if max(saved_end, live_end) - head > MAX_DIFF_LINES:
+            return None
+        matcher = difflib.SequenceMatcher(None, saved[head:saved_end], live[head:live_end], autojunk=False)
+        opcodes = [('equal', 0, head, 0, head)] if head else []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            # Inserted blocks cover no saved lines, so they never own a line.
+            if tag != 'insert':
+                opcodes.append((tag, i1 + head, i2 + head, j1 + head, j2 + head))
+        if tail:
+            opcodes.append(('equal', saved_end, len(saved), live_end, len(live)))
+        return cls(opcodes, len(live))
+
+    def map(self, line):
+        index = line - 1
+        position = bisect.bisect_right(self.starts, index) - 1
+        if position < 0 or index >= self.opcodes[position][2]:
+            return self._clamp(line)
+        tag, i1, _i2, j1, j2 = self.opcodes[position]
+        if tag == 'equal':
+            return j1 + (index - i1) + 1
+        # Replaced or deleted lines land on the edited block.
+        return self._clamp(min(j1 + (index - i1), max(j1, j2 - 1)) + 1)
+
+    def _clamp(self, line):
+        return max(1, min(line, self.live_count))
+
+
+def _remap(hit, line_map):
+    start_line = hit.get('startLine')
+    if not isinstance(start_line, int) or start_line <= 0:
+        return hit
+    end_line = hit.get('endLine')
+    if not isinstance(end_line, int) or end_line < start_line:
+        end_line = start_line
+    new_start = line_map.map(start_line)
+    new_end = max(new_start, line_map.map(end_line))
+    if new_start == start_line and new_end == hit.get('endLine', end_line):
+        return hit
+    updated = dict(hit)
+    updated['startLine'] = new_start
+    if 'endLine' in hit:
+        updated['endLine'] = new_end
+    return updated
@@ -1,4 +1,15 @@
 import os
+import threading
+import time
+
+REPO_MARKER_FILE = '.pairofcleats.json'
+REPO_MARKER_DIR = '.git'
+ROOT_CACHE_RECHECK_S = 1.0
+ROOT_CACHE_MAX_ENTRIES = 1024
+
+_ROOT_CACHE = {}
+_ROOT_CACHE_LOCK = threading.Lock()
+_CLI_CACHE = {}
 
 
 def _normalize_config_path(value):
@@ -11,26 +22,68 @@ def _normalize_config_path(value):
 
 
 def find_repo_root(start_path):
+    """Return the repo root containing ``start_path`` (memoized).
+
+    Results are cached per path together with the mtimes of the directories
+    walked. Adding or removing a ``.git``/``.pairofcleats.json`` marker
+    changes its directory's mtime, so an entry is reused without any stat
+    calls for ``ROOT_CACHE_RECHECK_S`` and then revalidated with one stat per
+    directory instead of a fresh walk.
+    """
     if not start_path:
         return None
+    key = os.path.abspath(start_path)
+    now = time.time()
+    with _ROOT_CACHE_LOCK:
+        entry = _ROOT_CACHE.get(key)
+    if entry is not None:
+        root, stamps, checked_at = entry
+        if now - checked_at < ROOT_CACHE_RECHECK_S:
+            return root
+        if all(_dir_mtime(path) == mtime for path, mtime in stamps):
+            with _ROOT_CACHE_LOCK:
+                _ROOT_CACHE[key] = (root, stamps, now)
+            return root
+    root, stamps = _walk_repo_root(start_path)
+    with _ROOT_CACHE_LOCK:
+        if len(_ROOT_CACHE) >= ROOT_CACHE_MAX_ENTRIES:
+            _ROOT_CACHE.clear()
+        _ROOT_CACHE[key] = (root, stamps, now)
+    return root
+
+
+def clear_repo_root_cache():
+    with _ROOT_CACHE_LOCK:
+        _ROOT_CACHE.clear()
+
+
+def _dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
 
+def _walk_repo_root(start_path):
     path = start_path
     if os.path.isfile(path):
         path = os.path.dirname(path)
     path = os.path.abspath(path)
+    stamps = []
 
     while True:
-        if os.path.isfile(os.path.join(path, '.pairofcleats.json')):
-            return path
-        if os.path.isdir(os.path.join(path, '.git')):
-            return path
+        stamps.append((path, _dir_mtime(path)))
+        if os.path.isfile(os.path.join(path, REPO_MARKER_FILE)):
+            return path, stamps
+        if os.path.isdir(os.path.join(path, REPO_MARKER_DIR)):
+            return path, stamps
 
         parent = os.path.dirname(path)
         if parent == path:
             break
         path = parent
 
-    return None
+    return None, stamps
 
 
 def resolve_repo_root(window, return_reason=False, path_hint=None, allow_fallback=True):
@@ -122,7 +175,7 @@ def _describe_repo_root(window, path_hint=None, allow_fallback=True):
     if hint_repo_root:
         add_root(hint_repo_root, 'hint')
     if active_file:
-        active_root = find_repo_root(active_file)
+        active_root = find_repo_root(os.path.dirname(active_file))
         if active_root:
             add_root(active_root, 'active_file')
     for folder in folders:
@@ -199,8 +252,62 @@ def resolve_watch_root(window, settings, repo_root=None):
 
 
 def resolve_cli(settings, repo_root):
+    """Return ``{command, args_prefix, source}`` for the PairOfCleats CLI.
+
+    Results are memoized per repo root and CLI settings, and revalidated like
+    ``find_repo_root`` against the mtime of the configured
+    ``pairofcleats_path``, or else of ``node_modules``,
+    ``node_modules/.bin``, ``package.json`` and ``bin`` in the repo.
+    """
     node_path = settings.get('node_path') or 'node'
     configured = (settings.get('pairofcleats_path') or '').strip()
+    key = (repo_root or '', configured, node_path)
+    now = time.time()
+    with _ROOT_CACHE_LOCK:
+        entry = _CLI_CACHE.get(key)
+    if entry is not None:
+        cli, stamps, checked_at = entry
+        if now - checked_at < ROOT_CACHE_RECHECK_S:
+            return _copy_cli(cli)
+        if all(_dir_mtime(path) == mtime for path, mtime in stamps):
+            with _ROOT_CACHE_LOCK:
+                _CLI_CACHE[key] = (cli, stamps, now)
+            return _copy_cli(cli)
+    stamps = [(path, _dir_mtime(path)) for path in _cli_stamp_paths(repo_root, configured)]
+    cli = _resolve_cli(node_path, configured, repo_root)
+    with _ROOT_CACHE_LOCK:
+        if len(_CLI_CACHE) >= ROOT_CACHE_MAX_ENTRIES:
+            _CLI_CACHE.clear()
+        _CLI_CACHE[key] = (cli, stamps, now)
+    return _copy_cli(cli)
+
+
+def clear_cli_cache():
+    with _ROOT_CACHE_LOCK:
+        _CLI_CACHE.clear()
+
+
+def _cli_stamp_paths(repo_root, configured):
+    if configured:
+        resolved = resolve_path(repo_root, configured)
+        return [resolved] if resolved else []
+    if not repo_root:
+        return []
+    return [
+        os.path.join(repo_root, 'node_modules'),
+        os.path.join(repo_root, 'node_modules', '.bin'),
+        os.path.join(repo_root, 'package.json'),
+        os.path.join(repo_root, 'bin'),
+    ]
+
+
+def _copy_cli(cli):
+    copied = dict(cli)
+    copied['args_prefix'] = list(cli.get('args_prefix') or [])
+    return copied
+
+
+def _resolve_cli(node_path, configured, repo_root):
     if configured:
         resolved = resolve_path(repo_root, configured)
         return _cli_for_path(resolved, node_path, 'settings')
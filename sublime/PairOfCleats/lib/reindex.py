@@ -0,0 +1,173 @@
+import os
+import threading
+
+import sublime
+
+from . import config
+from . import index_status
+from . import indexing
+from . import paths
+from . import result_cache
+from . import runner
+from . import ui
+from . import watch
+
+UPDATE_TITLE = 'PairOfCleats index update'
+DEFAULT_DEBOUNCE_MS = 1000
+SKIPPED_DIRS = ('.git', '.pairofcleats', 'node_modules')
+
+_PENDING = {}
+_LOCK = threading.Lock()
+
+
+def _repo_key(repo_root):
+    return os.path.normcase(os.path.abspath(repo_root))
+
+
+def _debounce_ms(settings):
+    value = settings.get('index_on_save_debounce_ms')
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        return DEFAULT_DEBOUNCE_MS
+    return value
+
+
+def _is_indexed_path(repo_root, file_path):
+    relative = os.path.relpath(file_path, repo_root)
+    parts = relative.replace('\\', '/').split('/')
+    if parts[0] == '..':
+        return False
+    return not any(part in SKIPPED_DIRS for part in parts[:-1])
+
+
+def _watch_covers(window, file_path):
+    root = watch.current_root(window)
+    if not root:
+        return False
+    root = _repo_key(root)
+    target = _repo_key(file_path)
+    return target == root or target.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def note_saved(view):
+    """Queue an incremental index update for the repo of a saved file.
+
+    Saves are collected per repo and flushed once no file has been saved for
+    ``index_on_save_debounce_ms``. Files already covered by a running
+    ``index watch`` are left to the watcher.
+    """
+    window = view.window() if view is not None else None
+    file_path = view.file_name() if view is not None else None
+    if window is None or not file_path:
+        return False
+    settings = config.get_settings(window)
+    if not settings.get('index_on_save'):
+        return False
+    repo_root = paths.find_repo_root(file_path)
+    if not repo_root or not _is_indexed_path(repo_root, file_path):
+        return False
+    if _watch_covers(window, file_path):
+        return False
+    key = _repo_key(repo_root)
+    with _LOCK:
+        entry = _PENDING.get(key)
+        if entry is None:
+            entry = {
+                'repo_root': repo_root,
+                'paths': set(),
+                'generation': 0,
+                'running': False,
+            }
+            _PENDING[key] = entry
+        entry['window'] = window
+        entry['settings'] = settings
+        entry['paths'].add(file_path)
+        entry['generation'] += 1
+        generation = entry['generation']
+    sublime.set_timeout(lambda: _flush(key, generation), _debounce_ms(settings))
+    return True
+
+
+def pending_paths(repo_root):
+    with _LOCK:
+        entry = _PENDING.get(_repo_key(repo_root))
+        return sorted(entry['paths']) if entry else []
+
+
+def _flush(key, generation):
+    with _LOCK:
+        entry = _PENDING.get(key)
+        if entry is None or entry['generation'] != generation or entry['running'] or not entry['paths']:
+            # Superseded by a newer save, or an update is running and will
+            # pick these paths up when it finishes.
+            return
+        saved = sorted(entry['paths'])
+        entry['paths'] = set()
+        entry['running'] = True
+        window = entry['window']
+        settings = entry['settings']
+        repo_root = entry['repo_root']
+    _run_update(window, settings, repo_root, saved, lambda ok: _finish(key, repo_root, saved, ok))
+
+
+def _finish(key, repo_root, saved, ok):
+    result_cache.invalidate(repo_root)
+    index_status.refresh(repo_root)
+    with _LOCK:
+        entry = _PENDING.get(key)
+        if entry is None:
+            return
+        entry['running'] = False
+        if not ok:
+            # Keep the files queued so the next save retries them.
+            entry['paths'].update(saved)
+            return
+        if not entry['paths']:
+            _PENDING.pop(key, None)
+            return
+        generation = entry['generation']
+    _flush(key, generation)
+
+
+def _run_update(window, settings, repo_root, saved, on_finished):
+    mode = settings.get('index_watch_mode') or 'all'
+    label = '{0} file{1}'.format(len(saved), '' if len(saved) == 1 else 's')
+    # Run in a one-shot CLI process, never on the warm search worker: its
+    # stdio transport answers one request at a time, so a long build would
+    # hold up every search and could hit the worker's request timeout.
+    cli = paths.resolve_cli(settings, repo_root)
+    args = list(cli.get('args_prefix') or []) + indexing.build_index_args(
+        mode,
+        repo_root=repo_root,
+        incremental=True,
+    )
+
+    def on_done(result):
+        ok = result.returncode == 0
+        error = None if ok else (result.error or result.output.strip() or 'PairOfCleats index update failed.')
+        _report(ok, label, error)
+        on_finished(ok)
+
+    runner.run_process(
+        cli['command'],
+        args,
+        cwd=repo_root,
+        env=config.build_env(settings),
+        window=window,
+        title=UPDATE_TITLE,
+        on_done=on_done,
+        stream_output=False,
+        show_progress_panel=False,
+    )
+
+
+def _report(ok, label, error):
+    if ok:
+        ui.show_status('PairOfCleats: index updated ({0}).'.format(label))
+        return
+    lines = (error or '').strip().splitlines()
+    ui.show_status('PairOfCleats: index update failed: {0}'.format(lines[-1] if lines else 'unknown error'))
+
+
+def clear():
+    with _LOCK:
+        _PENDING.clear()
@@ -0,0 +1,143 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+# Backstop for index changes nothing reports (no watch output, CLI mode).
+DEFAULT_TTL_S = 30.0
+
+
+class ResultCache(object):
+    """LRU cache of search hits bounded by the JSON size of its entries.
+
+    Entries older than ``ttl_s`` seconds are treated as missing.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl_s=DEFAULT_TTL_S):
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._generations = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl_s and time.time() - entry[2] > self.ttl_s:
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return [dict(hit) for hit in entry[0]]
+
+    def put(self, key, hits):
+        hits = [dict(hit) for hit in hits or [] if isinstance(hit, dict)]
+        size = _estimate_bytes(hits)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = (hits, size, time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._discard(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, repo_root=None):
+        with self._lock:
+            if repo_root is None:
+                self._entries.clear()
+                self._bytes = 0
+                self._generations.clear()
+                return
+            repo_key = _repo_key(repo_root)
+            for key in [key for key in self._entries if key[0] == repo_key]:
+                self._discard(key)
+            self._generations.pop(repo_key, None)
+
+    def note_generation(self, repo_root, generation):
+        if not repo_root or not generation:
+            return False
+        repo_key = _repo_key(repo_root)
+        with self._lock:
+            previous = self._generations.get(repo_key)
+            self._generations[repo_key] = generation
+        if previous is None or previous == generation:
+            return False
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == repo_key]:
+                self._discard(key)
+        return True
+
+    def size_bytes(self):
+        with self._lock:
+            return self._bytes
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+def _estimate_bytes(value):
+    try:
+        return len(json.dumps(value, sort_keys=True).encode('utf-8'))
+    except Exception:
+        return len(repr(value))
+
+
+def _repo_key(repo_root):
+    return os.path.normcase(os.path.abspath(repo_root)) if repo_root else ''
+
+
+def make_key(repo_root, query, mode, limit, advanced=None):
+    advanced_key = json.dumps(advanced or {}, sort_keys=True, default=str)
+    return (_repo_key(repo_root), query or '', mode or '', limit, advanced_key)
+
+
+def status_generation(status):
+    """Return a fingerprint of the index artifacts reported by ``/status``."""
+    if not isinstance(status, dict):
+        return None
+    for field in ('generation', 'buildId'):
+        if status.get(field):
+            return str(status[field])
+    repo = status.get('repo')
+    if not isinstance(repo, dict):
+        return None
+    if repo.get('buildId'):
+        return str(repo['buildId'])
+    # The status payload has no build id; artifact sizes change with every
+    # rebuild, so they stand in for one.
+    fingerprint = {
+        'artifacts': repo.get('artifacts'),
+        'sqlite': repo.get('sqlite'),
+        'lmdb': repo.get('lmdb'),
+        'totalBytes': repo.get('totalBytes'),
+    }
+    encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+SYMBOL_CACHE = ResultCache()
+LIVE_CACHE = ResultCache(1024 * 1024)
+
+
+def invalidate(repo_root=None):
+    SYMBOL_CACHE.invalidate(repo_root)
+    LIVE_CACHE.invalidate(repo_root)
+
+
+def note_status(repo_root, status):
+    generation = status_generation(status)
+    LIVE_CACHE.note_generation(repo_root, generation)
+    return SYMBOL_CACHE.note_generation(repo_root, generation)
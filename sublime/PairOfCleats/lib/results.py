@@ -2,6 +2,8 @@ import os
 
 import sublime
 
+from . import session_blobs
+
 HIGHLIGHT_KEY = 'pairofcleats.search.highlight'
 HIGHLIGHT_SCOPE = 'region.yellowish'
 RESULTS_PANEL = 'pairofcleats-results'
@@ -45,7 +47,7 @@ def collect_hits_from_session(session):
     return [dict(hit) for hit in hits if isinstance(hit, dict)]
 
 
-def build_session(query, options, repo_root, hits, target, explain=False):
+def build_session(query, options, repo_root, hits, target, explain=False, page=None):
     session = {
         'query': query,
         'repoRoot': repo_root,
@@ -59,16 +61,44 @@ def build_session(query, options, repo_root, hits, target, explain=False):
             'backend': options.get('backend'),
             'limit': options.get('limit'),
         }
+    if isinstance(page, dict):
+        session['page'] = dict(page, shown=len(session['hits']))
     if explain:
         session['text'] = format_explain_text(session['hits'])
     elif target in ('new_tab', 'output_panel'):
-        session['text'] = format_results_text(session['hits'])
+        session['text'] = format_results_text(session['hits']) + format_page_footer(session)
     return session
 
 
+def has_more_results(session):
+    page = session.get('page') if isinstance(session, dict) else None
+    return isinstance(page, dict) and bool(page.get('more'))
+
+
+def format_page_footer(session):
+    if not has_more_results(session):
+        return ''
+    return '-- {0} hits shown; run "PairOfCleats: Load More Results" or double-click this line for more --\n'.format(
+        session['page'].get('shown') or 0
+    )
+
+
+def hit_identity(hit):
+    return (
+        hit.get('section'),
+        hit.get('file'),
+        hit.get('startLine'),
+        hit.get('endLine'),
+        hit.get('name') or hit.get('symbol'),
+    )
+
+
 def reopen_session(window, session):
     if window is None or not isinstance(session, dict):
         return None
+    session = session_blobs.load_session(window, session)
+    if session is None:
+        return None
     hits = collect_hits_from_session(session)
     target = session.get('target') or 'quick_panel'
     repo_root = session.get('repoRoot')
@@ -103,6 +133,8 @@ def format_quick_panel_item(hit):
     headline = hit.get('headline') or hit.get('preview') or ''
 
     label = name or headline or file_label
+    if hit.get('repoAlias'):
+        file_label = '{0}: {1}'.format(hit['repoAlias'], file_label)
     detail_parts = [file_label]
     if section:
         detail_parts.append(section)
@@ -128,27 +160,32 @@ def format_hit_action_items(hit):
 def format_results_text(hits):
     lines = ['PairOfCleats results ({0})'.format(len(hits)), '']
     for idx, hit in enumerate(hits, start=1):
-        file_label = format_file_label(hit)
-        section = hit.get('section') or ''
-        score_label = format_score_label(hit)
-        name = hit.get('name') or hit.get('symbol') or ''
-        headline = hit.get('headline') or hit.get('preview') or ''
-
-        header_parts = ['{0}.'.format(idx), file_label]
-        if section:
-            header_parts.append('[{0}]'.format(section))
-        if score_label:
-            header_parts.append(score_label)
-        lines.append(' '.join([part for part in header_parts if part]))
-
-        if name:
-            lines.append('  {0}'.format(name))
-        if headline and headline != name:
-            lines.append('  {0}'.format(headline))
-        lines.append('')
+        lines.extend(_format_result_lines(hit, idx))
     return '\n'.join(lines).rstrip() + '\n'
 
 
+def _format_result_lines(hit, idx):
+    file_label = format_file_label(hit)
+    section = hit.get('section') or ''
+    score_label = format_score_label(hit)
+    name = hit.get('name') or hit.get('symbol') or ''
+    headline = hit.get('headline') or hit.get('preview') or ''
+
+    header_parts = ['{0}.'.format(idx), file_label]
+    if section:
+        header_parts.append('[{0}]'.format(section))
+    if score_label:
+        header_parts.append(score_label)
+    lines = [' '.join([part for part in header_parts if part])]
+
+    if name:
+        lines.append('  {0}'.format(name))
+    if headline and headline != name:
+        lines.append('  {0}'.format(headline))
+    lines.append('')
+    return lines
+
+
 def format_explain_text(hits):
     lines = ['PairOfCleats explain ({0})'.format(len(hits)), '']
     for idx, hit in enumerate(hits, start=1):
@@ -235,7 +272,7 @@ def open_results_view(window, text, explain=False, session=None):
     view.set_read_only(False)
     view.run_command('append', {'characters': text, 'force': True})
     view.set_read_only(True)
-    _attach_session(view, explain=explain, session=session)
+    _attach_session(window, view, explain=explain, session=session)
     return view
 
 
@@ -251,11 +288,70 @@ def open_output_panel(window, text, explain=False, session=None):
         {'characters': text, 'force': True, 'scroll_to_end': False},
     )
     panel.set_read_only(True)
-    _attach_session(panel, explain=explain, session=session)
+    _attach_session(window, panel, explain=explain, session=session)
     window.run_command('show_panel', {'panel': 'output.{0}'.format(RESULTS_PANEL)})
     return panel
 
 
+def append_results_page(view, previous, session, new_hits):
+    """Append ``new_hits`` to a results view showing ``previous``.
+
+    The previous page's footer is replaced in place, so earlier hits are not
+    rewritten.
+    """
+    if view is None:
+        return None
+    footer = format_page_footer(previous)
+    start = max(view.size() - len(footer), 0)
+    lines = []
+    for idx, hit in enumerate(new_hits, start=len(session['hits']) - len(new_hits) + 1):
+        lines.extend(_format_result_lines(hit, idx))
+    text = ('\n'.join(lines).rstrip() + '\n' if lines else '') + format_page_footer(session)
+    view.set_read_only(False)
+    view.run_command('pair_of_cleats_replace_panel_tail', {'start': start, 'characters': text})
+    view.set_read_only(True)
+    _attach_session(view.window(), view, session=session)
+    return view
+
+
+def open_repo_sections(window, target, header, sections, session=None):
+    """Render ``[(title, hits)]`` sections one UI tick at a time."""
+    if target == 'new_tab':
+        view = open_results_view(window, header)
+    else:
+        view = open_output_panel(window, header)
+    if view is None:
+        return None
+    remaining = list(sections)
+    state = {'index': 1}
+
+    def render_next():
+        if not remaining:
+            _attach_session(window, view, session=session)
+            return
+        title, hits = remaining.pop(0)
+        lines = ['== {0} ({1}) =='.format(title, len(hits)), '']
+        for hit in hits:
+            lines.extend(_format_result_lines(hit, state['index']))
+            state['index'] += 1
+        if not hits:
+            lines.extend(['  no hits', ''])
+        _append_text(view, '\n'.join(lines) + '\n')
+        sublime.set_timeout(render_next, 0)
+
+    render_next()
+    return view
+
+
+def _append_text(view, text):
+    view.set_read_only(False)
+    view.run_command(
+        'append',
+        {'characters': text, 'force': True, 'scroll_to_end': False},
+    )
+    view.set_read_only(True)
+
+
 def resolve_hit_path(hit, repo_root):
     if not isinstance(hit, dict):
         return None
@@ -264,6 +360,8 @@ def resolve_hit_path(hit, repo_root):
         return None
     if os.path.isabs(file_path):
         return file_path
+    # Federated hits carry the root of the repo they came from.
+    repo_root = hit.get('repoRoot') or repo_root
     if repo_root:
         return os.path.join(repo_root, file_path)
     return file_path
@@ -341,12 +439,12 @@ def normalize_hit(hit):
     return normalized
 
 
-def _attach_session(view, explain=False, session=None):
+def _attach_session(window, view, explain=False, session=None):
     if view is None or session is None:
         return
     settings = view.settings()
     key = EXPLAIN_SESSION_KEY if explain else RESULTS_SESSION_KEY
-    settings.set(key, dict(session))
+    settings.set(key, session_blobs.store_session(window, session))
 
 
 def _safe_num_groups(window):
@@ -1,3 +1,7 @@
+from . import session_blobs
+from . import state_store
+
+
 def get_last_results(window):
     return _get_last_session(window, 'last_results')
 
@@ -41,28 +45,20 @@ def record_last_analysis(window, kind, payload):
 def _record_last_session(window, key, payload):
     if window is None or not isinstance(payload, dict):
         return
-    data, state = _load_state(window)
-    state[key] = dict(payload)
-    data['pairofcleats_state'] = state
-    window.set_project_data(data)
+    state_store.put(window, key, session_blobs.store_session(window, payload))
 
 
 def _get_last_session(window, key):
     if window is None:
         return None
-    _, state = _load_state(window)
-    payload = state.get(key)
+    payload = state_store.get(window, key)
     if isinstance(payload, dict):
         return dict(payload)
     return None
 
 
-def _load_state(window):
-    data = window.project_data() or {}
-    state = data.get('pairofcleats_state')
-    if not isinstance(state, dict):
-        state = {}
-    return data, state
+def load_session(window, session):
+    return session_blobs.load_session(window, session)
 
 
 def _analysis_key(kind):
@@ -1,4 +1,4 @@
-import json
+import codecs
 import os
 import signal
 import subprocess
@@ -8,6 +8,7 @@ import time
 import sublime
 
 from . import config
+from . import json_stream
 from . import tasks
 
 
@@ -62,6 +63,11 @@ DEFAULT_WATCHDOG_MS = 15000
 DEFAULT_TIMEOUT_MS = None
 DEFAULT_OUTPUT_CAP_CHARS = 200000
 TRUNCATION_MARKER = '\n[output truncated]\n'
+READ_CHUNK_BYTES = 65536
+PANEL_FLUSH_MS = 16
+PANEL_MAX_LINES = 10000
+_PANEL_BUFFERS = {}
+_PANEL_LOCK = threading.Lock()
 
 
 def _build_spawn_kwargs():
@@ -144,7 +150,7 @@ def run_process(command, args, cwd=None, env=None, window=None, title='PairOfCle
                 capture_json=False, on_done=None, stream_output=True,
                 panel_name='pairofcleats', watchdog_ms=None, show_progress_panel=None,
                 spawn_process=None, timeout_ms=DEFAULT_TIMEOUT_MS,
-                output_cap_chars=DEFAULT_OUTPUT_CAP_CHARS):
+                output_cap_chars=DEFAULT_OUTPUT_CAP_CHARS, on_output=None):
     if window is None:
         window = sublime.active_window()
     settings = config.get_settings(window) if window is not None else {}
@@ -170,7 +176,6 @@ def run_process(command, args, cwd=None, env=None, window=None, title='PairOfCle
             'env': full_env,
             'stdout': subprocess.PIPE,
             'stderr': subprocess.PIPE,
-            'universal_newlines': True,
         }
         if spawn_process is None:
             spawn_kwargs.update(_build_spawn_kwargs())
@@ -213,29 +218,47 @@ def run_process(command, args, cwd=None, env=None, window=None, title='PairOfCle
         'panel': {'size': 0, 'truncated': False, 'marked': False},
     }
 
-    def append_line(line, sink_state):
+    def append_text(text, sink_state):
+        decoder = sink_state.get('decoder')
+        if decoder is not None:
+            decoder.feed(text)
         with output_lock:
-            _append_bounded(combined_lines, line, output_cap_chars, state['combined'])
-            _append_bounded(sink_state['parts'], line, output_cap_chars, sink_state['state'])
+            _append_bounded(combined_lines, text, output_cap_chars, state['combined'])
+            _append_bounded(sink_state['parts'], text, output_cap_chars, sink_state['state'])
         with activity_lock:
             state['last_activity_at'] = time.time()
         if task and window:
-            detail = line.strip() or 'Output received.'
-            tasks.note_progress(window, task, details=detail[:200])
+            tasks.note_progress(window, task, details=_last_line(text)[:200] or 'Output received.')
         if panel is not None:
             panel_text = []
-            _append_bounded(panel_text, line, output_cap_chars, state['panel'])
+            _append_bounded(panel_text, text, output_cap_chars, state['panel'])
             if panel_text:
                 _append_panel(panel, ''.join(panel_text))
+        if on_output is not None:
+            on_output(text)
 
     def done_callback(result):
         if on_done:
             on_done(result)
 
     def read_stream(stream, sink):
+        # Whatever is available is read in one go and handed to the sinks as
+        # a single batch, so the cost tracks output volume, not line count.
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending_cr = ''
         try:
-            for line in stream:
-                append_line(line, sink)
+            for chunk in _iter_chunks(stream):
+                text = chunk if isinstance(chunk, str) else decoder.decode(chunk)
+                text = pending_cr + text
+                pending_cr = ''
+                if text.endswith('\r'):
+                    text, pending_cr = text[:-1], '\r'
+                text = _normalize_newlines(text)
+                if text:
+                    append_text(text, sink)
+            text = _normalize_newlines(pending_cr + decoder.decode(b'', final=True))
+            if text:
+                append_text(text, sink)
         finally:
             try:
                 stream.close()
@@ -253,7 +276,13 @@ def run_process(command, args, cwd=None, env=None, window=None, title='PairOfCle
         timer.start()
 
     def worker():
-        stdout_sink = {'parts': stdout_lines, 'state': state['stdout']}
+        # Structured output is decoded as it arrives and is not subject to
+        # output_cap_chars; the cap only bounds the text kept for display.
+        stdout_sink = {
+            'parts': stdout_lines,
+            'state': state['stdout'],
+            'decoder': json_stream.JsonStreamDecoder() if capture_json else None,
+        }
         stderr_sink = {'parts': stderr_lines, 'state': state['stderr']}
         stdout_thread = threading.Thread(target=read_stream, args=(proc.stdout, stdout_sink))
         stderr_thread = threading.Thread(target=read_stream, args=(proc.stderr, stderr_sink))
@@ -272,15 +301,11 @@ def run_process(command, args, cwd=None, env=None, window=None, title='PairOfCle
         error = None
         result_state = 'done'
         if capture_json:
-            if state['stdout']['truncated']:
-                error = 'Process output was truncated before JSON parsing could complete.'
+            try:
+                payload = json_stream.decode_payload(stdout_sink['decoder'])
+            except ValueError as exc:
+                error = 'Failed to parse JSON output: {0}'.format(exc)
                 result_state = 'parse_failed'
-            else:
-                try:
-                    payload = json.loads(stdout_output or '{}')
-                except Exception as exc:
-                    error = 'Failed to parse JSON output: {0}'.format(exc)
-                    result_state = 'parse_failed'
         stop_reason = state['stop_reason']
         if stop_reason == 'timed_out':
             result_state = 'timed_out'
@@ -372,8 +397,34 @@ def run_process(command, args, cwd=None, env=None, window=None, title='PairOfCle
     return handle
 
 
+def _iter_chunks(stream, size=None):
+    read = getattr(stream, 'read1', None) or stream.read
+    size = size or READ_CHUNK_BYTES
+    while True:
+        chunk = read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _normalize_newlines(text):
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _last_line(text):
+    for line in reversed(text.splitlines()):
+        line = line.strip()
+        if line:
+            return line
+    return ''
+
+
 def _ensure_panel(window, name):
     panel = window.create_output_panel(name)
+    with _PANEL_LOCK:
+        _PANEL_BUFFERS.pop(_panel_id(panel), None)
     panel.set_read_only(False)
     panel.run_command('select_all')
     panel.run_command('right_delete')
@@ -384,11 +435,51 @@ def _show_panel(window, name):
     window.run_command('show_panel', {'panel': 'output.{0}'.format(name)})
 
 
+def _panel_id(panel):
+    try:
+        return panel.id()
+    except Exception:
+        return id(panel)
+
+
 def _append_panel(panel, text):
-    def append():
-        panel.run_command('append', {
-            'characters': text,
-            'force': True,
-            'scroll_to_end': True
-        })
-    sublime.set_timeout(append, 0)
+    # Reader threads only buffer text; the UI thread appends whatever has
+    # accumulated once per frame.
+    key = _panel_id(panel)
+    with _PANEL_LOCK:
+        buffer = _PANEL_BUFFERS.get(key)
+        if buffer is None:
+            buffer = {'panel': panel, 'parts': [], 'scheduled': False, 'lines': 0}
+            _PANEL_BUFFERS[key] = buffer
+        buffer['parts'].append(text)
+        if buffer['scheduled']:
+            return
+        buffer['scheduled'] = True
+    sublime.set_timeout(lambda: _flush_panel(key), PANEL_FLUSH_MS)
+
+
+def _flush_panel(key):
+    with _PANEL_LOCK:
+        buffer = _PANEL_BUFFERS.get(key)
+        if buffer is None:
+            return
+        text = ''.join(buffer['parts'])
+        buffer['parts'] = []
+        buffer['scheduled'] = False
+    if not text:
+        return
+    lines = text.count('\n')
+    if lines > PANEL_MAX_LINES:
+        # Lines that would be trimmed straight away are never drawn.
+        text = ''.join(text.splitlines(True)[-PANEL_MAX_LINES:])
+        lines = PANEL_MAX_LINES
+    panel = buffer['panel']
+    panel.run_command('append', {
+        'characters': text,
+        'force': True,
+        'scroll_to_end': True
+    })
+    buffer['lines'] += lines
+    if buffer['lines'] > PANEL_MAX_LINES:
+        panel.run_command('pair_of_cleats_trim_panel', {'max_lines': PANEL_MAX_LINES})
+        buffer['lines'] = PANEL_MAX_LINES
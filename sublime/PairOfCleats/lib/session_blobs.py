@@ -0,0 +1,241 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+from . import state_store
+
+BLOB_DIR = 'blobs'
+BLOB_SUFFIX = '.json.z'
+MAX_DISK_BYTES = 64 * 1024 * 1024
+MAX_MEMORY_BYTES = 16 * 1024 * 1024
+GC_TARGET_RATIO = 0.75
+SUMMARY_EXCLUDE = ('hits', 'text', 'payload')
+
+_STORES = {}
+_LOCK = threading.Lock()
+
+
+class BlobStore(object):
+    """Content-addressed store of zlib-compressed JSON blobs.
+
+    Blobs are named by the sha256 of their canonical JSON, so identical
+    sessions are written once. Reads refresh a blob's mtime and the least
+    recently used blobs are removed once the store grows past ``max_bytes``.
+    Without a root the blobs are kept in memory.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root
+        self.max_bytes = max_bytes or (MAX_DISK_BYTES if root else MAX_MEMORY_BYTES)
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self._total = None
+
+    def put(self, value):
+        raw = json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            if self.root is None:
+                self._put_memory(digest, raw)
+            elif not self._put_disk(digest, raw):
+                # Unwritable repo: keep the blob for this session only.
+                return _memory_store().put(value)
+        return digest
+
+    def get(self, digest):
+        with self._lock:
+            if self.root is None:
+                data = self._memory.get(digest)
+                if data is not None:
+                    self._memory.move_to_end(digest)
+            else:
+                data = self._read_disk(digest)
+        if data is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(data).decode('utf-8'))
+        except (ValueError, zlib.error):
+            return None
+
+    def gc(self):
+        with self._lock:
+            if self.root is None:
+                self._gc_memory(None)
+            else:
+                self._gc_disk(None)
+
+    def _put_memory(self, digest, raw):
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return
+        self._memory[digest] = zlib.compress(raw)
+        self._gc_memory(digest)
+
+    def _gc_memory(self, keep):
+        total = sum(len(data) for data in self._memory.values())
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * GC_TARGET_RATIO
+        for digest in list(self._memory):
+            if total <= target:
+                break
+            if digest == keep:
+                continue
+            total -= len(self._memory.pop(digest))
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest + BLOB_SUFFIX)
+
+    def _put_disk(self, digest, raw):
+        path = self._path(digest)
+        if os.path.isfile(path):
+            _touch(path)
+            return True
+        data = zlib.compress(raw)
+        temp_path = '{0}.{1}.tmp'.format(path, threading.get_ident())
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with open(temp_path, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        if self._total is None:
+            self._total = sum(size for _path, size, _mtime in self._scan())
+        else:
+            self._total += len(data)
+        if self._total > self.max_bytes:
+            self._gc_disk(digest)
+        return True
+
+    def _read_disk(self, digest):
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        _touch(path)
+        return data
+
+    def _scan(self):
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(BLOB_SUFFIX):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _gc_disk(self, keep):
+        entries = self._scan()
+        total = sum(size for _path, size, _mtime in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * GC_TARGET_RATIO
+            keep_path = self._path(keep) if keep else None
+            for path, size, _mtime in sorted(entries, key=lambda entry: entry[2]):
+                if total <= target:
+                    break
+                if path == keep_path:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+        self._total = total
+
+
+def _touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _memory_store():
+    return get_store(None)
+
+
+def blob_root(store_file):
+    return os.path.join(os.path.dirname(store_file), BLOB_DIR)
+
+
+def get_store(root=None):
+    key = os.path.normcase(os.path.abspath(root)) if root else None
+    with _LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = BlobStore(root)
+            _STORES[key] = store
+    return store
+
+
+def store_for_window(window):
+    """Return the blob store next to the window's state store."""
+    if window is None:
+        return _memory_store()
+    path = state_store.store_for_window(window).path
+    if not path:
+        return _memory_store()
+    return get_store(blob_root(path))
+
+
+def is_ref(session):
+    return isinstance(session, dict) and isinstance(session.get('blob'), str) and 'hits' not in session
+
+
+def store_session(window, session, summary_keys=None):
+    """Store ``session`` as a blob and return a small reference to it.
+
+    The reference keeps the session's scalar fields (query, target, kind, ...)
+    so menus can be built without loading the blob. ``summary_keys`` limits
+    the reference to those fields.
+    """
+    if not isinstance(session, dict):
+        return None
+    if is_ref(session):
+        return dict(session)
+    if summary_keys is not None:
+        ref = dict((key, session[key]) for key in summary_keys if key in session)
+    else:
+        ref = dict((key, value) for key, value in session.items() if key not in SUMMARY_EXCLUDE)
+    ref['blob'] = store_for_window(window).put(session)
+    return ref
+
+
+def load_session(window, session):
+    """Return the full session for a reference from ``store_session``.
+
+    Full sessions (including ones recorded before blobs existed) are returned
+    as-is; a reference whose blob has been collected returns ``None``.
+    """
+    if not isinstance(session, dict):
+        return None
+    if not is_ref(session):
+        return dict(session)
+    digest = session['blob']
+    value = store_for_window(window).get(digest)
+    if value is None:
+        value = _memory_store().get(digest)
+    return value if isinstance(value, dict) else None
+
+
+def clear_memory():
+    with _LOCK:
+        _STORES.clear()
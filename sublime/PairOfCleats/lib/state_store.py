@@ -0,0 +1,224 @@
+import copy
+import json
+import os
+import threading
+
+from . import paths
+
+STATE_DIR = os.path.join('.pairofcleats', 'sublime')
+STATE_FILE = 'state.jsonl'
+PROJECT_KEY = 'pairofcleats_state'
+COMPACT_MIN_BYTES = 256 * 1024
+COMPACT_DEAD_RATIO = 4
+
+_STORES = {}
+_WINDOW_STORES = {}
+_STALE = object()
+_LOCK = threading.Lock()
+
+
+class StateStore(object):
+    """Append-only JSON-lines key/value store with decoded values in memory.
+
+    The file is read once; after that ``get`` is served from memory and
+    ``put`` updates memory and appends the record to disk. When superseded
+    records dominate the file it is rewritten from memory.
+    Without a path the store keeps values in memory only. Stores are shared
+    per repo, so all windows on one repo see the same history and sessions.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self._values = {}
+        self._records = 0
+        self._size = 0
+        self._torn = False
+
+    def get(self, key):
+        with self._lock:
+            self._ensure_loaded()
+            value = self._values.get(key)
+            # Callers may mutate what they get back; hand out a copy.
+            return copy.deepcopy(value) if value is not None else None
+
+    def put(self, key, value):
+        encoded = json.dumps(value, sort_keys=True)
+        with self._lock:
+            self._ensure_loaded()
+            self._values[key] = json.loads(encoded)
+            if self.path is None:
+                return
+            line = json.dumps({'key': key, 'value': value}, sort_keys=True).encode('utf-8') + b'\n'
+            prefix = b'\n' if self._torn else b''
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'ab') as handle:
+                    handle.write(prefix + line)
+            except OSError:
+                # Unwritable repo: keep the value for this session only.
+                return
+            self._torn = False
+            self._size += len(prefix) + len(line)
+            self._records += 1
+            if self._size >= COMPACT_MIN_BYTES and self._records > COMPACT_DEAD_RATIO * max(1, len(self._values)):
+                self._compact()
+
+    def keys(self):
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._values)
+
+    def compact(self):
+        with self._lock:
+            if self.path is None:
+                return
+            self._ensure_loaded()
+            self._compact()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._records = 0
+        self._size = 0
+        self._torn = False
+        try:
+            handle = open(self.path, 'rb')
+        except OSError:
+            return
+        with handle:
+            for line in handle:
+                self._size += len(line)
+                if not line.endswith(b'\n'):
+                    # A write was interrupted; the next record starts on a new line.
+                    self._torn = True
+                    continue
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and isinstance(record.get('key'), str):
+                    self._values[record['key']] = record.get('value')
+                    self._records += 1
+
+    def _compact(self):
+        temp_path = self.path + '.tmp'
+        size = 0
+        try:
+            with open(temp_path, 'wb') as target:
+                for key in sorted(self._values):
+                    line = json.dumps({'key': key, 'value': self._values[key]}, sort_keys=True).encode('utf-8') + b'\n'
+                    target.write(line)
+                    size += len(line)
+            os.replace(temp_path, self.path)
+        except OSError:
+            return
+        self._records = len(self._values)
+        self._size = size
+        self._torn = False
+
+
+def store_path(repo_root):
+    return os.path.join(repo_root, STATE_DIR, STATE_FILE)
+
+
+def get_store(path=None):
+    if path is None:
+        return StateStore()
+    key = os.path.normcase(os.path.abspath(path))
+    with _LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = StateStore(path)
+            _STORES[key] = store
+    return store
+
+
+def _window_context(window):
+    view = window.active_view()
+    return (tuple(window.folders() or []), view.file_name() if view else None)
+
+
+def store_for_window(window):
+    """Return the state store for ``window``.
+
+    The project file only keeps ``{"pairofcleats_state": {"store": <path>}}``.
+    Until a repo root on disk is known, state lives in a per-window memory
+    store; legacy state found in the project data is moved into the store.
+    The resolved store is cached per window: a repo-backed store until
+    ``forget_window``, a memory store until the window's folders or active
+    file change.
+    """
+    window_id = window.id()
+    context = _window_context(window)
+    with _LOCK:
+        cached = _WINDOW_STORES.get(window_id)
+    if cached is not None and cached[0] in (None, context):
+        return cached[1]
+    memory = cached[1] if cached is not None and cached[1].path is None else None
+    data = window.project_data() or {}
+    state = data.get(PROJECT_KEY)
+    if not isinstance(state, dict):
+        state = {}
+    pointer = state.get('store')
+    legacy = {}
+    if not (isinstance(pointer, str) and pointer):
+        legacy = dict((key, value) for key, value in state.items() if key != 'store')
+        repo_root = paths.resolve_repo_root(window, return_reason=False)
+        pointer = store_path(repo_root) if repo_root and os.path.isdir(repo_root) else None
+    if pointer:
+        store = get_store(pointer)
+        if memory is not None:
+            for key in memory.keys():
+                store.put(key, memory.get(key))
+    else:
+        store = memory or StateStore()
+    for key, value in legacy.items():
+        store.put(key, value)
+    if legacy or (pointer and state.get('store') != pointer):
+        data = dict(data)
+        if pointer:
+            data[PROJECT_KEY] = {'store': pointer}
+        else:
+            data.pop(PROJECT_KEY, None)
+        window.set_project_data(data)
+    with _LOCK:
+        _WINDOW_STORES[window_id] = (None if pointer else context, store)
+    return store
+
+
+def forget_window(window):
+    """Re-resolve the window's store on next use (its project changed)."""
+    if window is None:
+        return
+    with _LOCK:
+        cached = _WINDOW_STORES.get(window.id())
+        if cached is not None:
+            _WINDOW_STORES[window.id()] = (_STALE, cached[1])
+
+
+def release_window(window):
+    if window is None:
+        return
+    with _LOCK:
+        _WINDOW_STORES.pop(window.id(), None)
+
+
+def get(window, key):
+    if window is None:
+        return None
+    return store_for_window(window).get(key)
+
+
+def put(window, key, value):
+    if window is None:
+        return
+    store_for_window(window).put(key, value)
+
+
+def clear_memory():
+    with _LOCK:
+        _STORES.clear()
+        _WINDOW_STORES.clear()
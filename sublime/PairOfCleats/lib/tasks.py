@@ -1,3 +1,4 @@
+import threading
 import time
 
 import sublime
@@ -9,6 +10,9 @@ _ACTIVE_TASKS = {}
 _RECENT_TASKS = {}
 _NEXT_TASK_ID = 1
 _MAX_RECENT_TASKS = 8
+RENDER_INTERVAL_MS = 200
+_RENDER_STATE = {}
+_RENDER_LOCK = threading.Lock()
 
 
 def _window_id(window):
@@ -111,7 +115,7 @@ def recent_tasks(window):
 
 
 def show_progress(window):
-    _render(window, show_panel=True)
+    _flush(window, show_panel=True)
 
 
 def cancel_active(window):
@@ -130,11 +134,15 @@ def clear_window(window):
     window_id = _window_id(window)
     _ACTIVE_TASKS.pop(window_id, None)
     _RECENT_TASKS.pop(window_id, None)
+    with _RENDER_LOCK:
+        _RENDER_STATE.pop(window_id, None)
 
 
 def clear_all():
     _ACTIVE_TASKS.clear()
     _RECENT_TASKS.clear()
+    with _RENDER_LOCK:
+        _RENDER_STATE.clear()
 
 
 def _format_age(seconds):
@@ -148,10 +156,76 @@ def _format_age(seconds):
 
 
 def _render(window, show_panel=False):
+    """Mark the progress panel dirty; it is redrawn at most every RENDER_INTERVAL_MS."""
     if window is None:
         window = sublime.active_window()
     if window is None:
         return
+    window_id = _window_id(window)
+    with _RENDER_LOCK:
+        state = _RENDER_STATE.setdefault(window_id, {
+            'scheduled': False,
+            'show_panel': False,
+            'flushedAt': 0.0,
+            'text': None,
+        })
+        state['show_panel'] = state['show_panel'] or bool(show_panel)
+        if state['scheduled']:
+            return
+        state['scheduled'] = True
+        elapsed_ms = (_now() - state['flushedAt']) * 1000.0
+    delay = int(max(0.0, RENDER_INTERVAL_MS - elapsed_ms))
+    sublime.set_timeout(lambda: _flush(window), delay)
+
+
+def _flush(window, show_panel=False):
+    window_id = _window_id(window)
+    with _RENDER_LOCK:
+        state = _RENDER_STATE.setdefault(window_id, {
+            'scheduled': False,
+            'show_panel': False,
+            'flushedAt': 0.0,
+            'text': None,
+        })
+        show_panel = show_panel or state['show_panel']
+        state['scheduled'] = False
+        state['show_panel'] = False
+        state['flushedAt'] = _now()
+        previous = state['text']
+    text = _build_text(window)
+    panel = window.find_output_panel(TASK_PANEL) if previous is not None else None
+    if panel is not None and previous == text:
+        pass
+    elif panel is not None and _replace_tail(panel, previous, text):
+        pass
+    else:
+        ui.write_output_panel(window, TASK_PANEL, text, show_panel=False)
+    with _RENDER_LOCK:
+        state['text'] = text
+    if show_panel:
+        window.run_command('show_panel', {'panel': 'output.{0}'.format(TASK_PANEL)})
+
+
+def _replace_tail(panel, previous, text):
+    # Usually only the elapsed/detail lines of the last tasks change; rewrite
+    # from the first differing line instead of the whole panel.
+    start = 0
+    for old_line, new_line in zip(previous.splitlines(True), text.splitlines(True)):
+        if old_line != new_line:
+            break
+        start += len(old_line)
+    if start == 0:
+        return False
+    panel.set_read_only(False)
+    panel.run_command('pair_of_cleats_replace_panel_tail', {
+        'start': start,
+        'characters': text[start:],
+    })
+    panel.set_read_only(True)
+    return True
+
+
+def _build_text(window):
     now = _now()
     lines = ['PairOfCleats task progress', '']
     active = active_tasks(window)
@@ -191,5 +265,4 @@ def _render(window, show_panel=False):
     if not active and not recent:
         lines.append('No active or recent PairOfCleats tasks.')
         lines.append('')
-    text = '\n'.join(lines)
-    ui.write_output_panel(window, TASK_PANEL, text, show_panel=show_panel)
+    return '\n'.join(lines)
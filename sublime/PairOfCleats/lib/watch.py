@@ -1,5 +1,27 @@
+import os
+import re
+import threading
+import time
+
+import sublime
+
+from . import runner
+from . import ui
+
+RESTART_MIN_S = 1.0
+RESTART_MAX_S = 60.0
+STABLE_RUN_S = 60.0
+MAX_RESTARTS = 5
+MAX_PARTIAL_LINE_CHARS = 4096
+BACKEND_PATTERN = re.compile(r'\[watch\] Monitoring \d+ file\(s\) via (\w+)(?: polling (\d+)ms)?')
+LAG_PATTERN = re.compile(r'\[watch\] Event lag: avg (\d+)ms, max (\d+)ms')
+LOST_EVENTS_PATTERN = re.compile(r'\[watch\] Watcher lost events')
+COMMIT_PATTERN = re.compile(r'\[watch\] Index update complete')
+
 _WATCHERS = {}
+_WINDOW_ROOTS = {}
 _NEXT_TOKEN = 1
+_LOCK = threading.Lock()
 
 
 def _window_key(window):
@@ -11,35 +33,204 @@ def _window_key(window):
         return 'global'
 
 
-def register(window, handle, root):
+def _root_key(root):
+    return os.path.normcase(os.path.abspath(root))
+
+
+def start(window, root, launch, panel_name='pairofcleats', on_change=None, on_commit=None):
+    """Subscribe ``window`` to the watcher for ``root``, starting it if needed.
+
+    One ``index watch`` process runs per watch root no matter how many
+    windows use it. ``launch(window, on_output, on_done)`` spawns the process
+    and returns its handle; its output is copied to ``panel_name`` in every
+    subscribed window. ``on_change(window)`` is called on the UI thread when
+    the reported backend or event lag changes, and ``on_commit()`` from the
+    output thread each time the watch promotes an update. The process stops
+    when the last window unsubscribes and is restarted with exponential
+    backoff when it crashes.
+    Returns ``'started'``, ``'joined'`` or ``'running'``.
+    """
+    window_key = _window_key(window)
+    key = _root_key(root)
+    with _LOCK:
+        previous = _WINDOW_ROOTS.get(window_key)
+        if previous == key:
+            return 'running'
+    if previous is not None:
+        stop(window, reason='restart')
+    panel = runner._ensure_panel(window, panel_name)
+    runner._show_panel(window, panel_name)
+    with _LOCK:
+        entry = _WATCHERS.get(key)
+        joined = entry is not None and not entry['stopping']
+        if not joined:
+            entry = {
+                'key': key,
+                'root': root,
+                'launch': launch,
+                'onChange': on_change,
+                'onCommit': on_commit,
+                'windows': {},
+                'panels': {},
+                'handle': None,
+                'token': None,
+                'startedAt': None,
+                'failures': 0,
+                'restartPending': False,
+                'stopping': False,
+                'stopReason': None,
+                'backend': None,
+                'lagMs': None,
+                'rescans': 0,
+                'partial': '',
+            }
+            _WATCHERS[key] = entry
+        entry['windows'][window_key] = window
+        entry['panels'][window_key] = panel
+        _WINDOW_ROOTS[window_key] = key
+    if joined:
+        runner._append_panel(panel, 'Joined the running watch for {0}.\n'.format(root))
+        return 'joined'
+    _launch(entry)
+    return 'started'
+
+
+def _launch(entry):
     global _NEXT_TOKEN
-    key = _window_key(window)
-    previous = _WATCHERS.get(key)
-    if previous and not previous.get('stopping'):
-        _cancel_handle(previous.get('handle'))
-    token = _NEXT_TOKEN
-    _NEXT_TOKEN += 1
-    _WATCHERS[key] = {
-        'handle': handle,
-        'root': root,
-        'token': token,
-        'stopping': False,
-        'stopReason': None,
-    }
-    return token
+    with _LOCK:
+        if _WATCHERS.get(entry['key']) is not entry or entry['stopping'] or not entry['windows']:
+            return
+        token = _NEXT_TOKEN
+        _NEXT_TOKEN += 1
+        entry['token'] = token
+        entry['restartPending'] = False
+        entry['startedAt'] = time.time()
+        entry['backend'] = None
+        entry['lagMs'] = None
+        entry['partial'] = ''
+        window = next(iter(entry['windows'].values()))
+    handle = entry['launch'](
+        window,
+        lambda text: _fan_out(entry, text),
+        lambda result: _on_exit(entry, token, result),
+    )
+    with _LOCK:
+        current = entry['token'] == token
+        if current:
+            entry['handle'] = handle
+        stopping = entry['stopping']
+    if current and stopping:
+        _cancel_handle(handle)
+
+
+def _fan_out(entry, text):
+    with _LOCK:
+        panels = list(entry['panels'].values())
+        changed, committed = _note_output(entry, text)
+        on_change = entry['onChange'] if changed else None
+        on_commit = entry['onCommit'] if committed else None
+        windows = list(entry['windows'].values()) if on_change else []
+    for panel in panels:
+        runner._append_panel(panel, text)
+    if on_commit:
+        on_commit()
+    for window in windows:
+        sublime.set_timeout(lambda window=window: on_change(window), 0)
+
+
+def _note_output(entry, text):
+    # Track the backend and event lag the watch reports so the status bar can
+    # show them, and whether an update was promoted. Output arrives in
+    # arbitrary chunks, so keep the partial line.
+    lines = (entry['partial'] + text).split('\n')
+    entry['partial'] = lines.pop()[-MAX_PARTIAL_LINE_CHARS:]
+    changed = False
+    committed = False
+    for line in lines:
+        match = BACKEND_PATTERN.search(line)
+        if match:
+            backend = match.group(1)
+            if match.group(2):
+                backend = '{0} polling {1}ms'.format(backend, match.group(2))
+            entry['backend'] = backend
+            changed = True
+            continue
+        match = LAG_PATTERN.search(line)
+        if match:
+            entry['lagMs'] = int(match.group(1))
+            changed = True
+            continue
+        if COMMIT_PATTERN.search(line):
+            committed = True
+            continue
+        if LOST_EVENTS_PATTERN.search(line):
+            entry['rescans'] += 1
+    return changed, committed
+
+
+def _on_exit(entry, token, result):
+    with _LOCK:
+        if entry['token'] != token:
+            return
+        entry['handle'] = None
+        if _WATCHERS.get(entry['key']) is not entry:
+            return
+        if entry['stopping'] or not entry['windows'] or result.returncode == 0:
+            _remove(entry)
+            action = 'stopped'
+        else:
+            if time.time() - entry['startedAt'] >= STABLE_RUN_S:
+                entry['failures'] = 0
+            entry['failures'] += 1
+            if entry['failures'] > MAX_RESTARTS:
+                _remove(entry)
+                action = 'failed'
+            else:
+                entry['restartPending'] = True
+                action = 'restart'
+        delay_s = min(RESTART_MAX_S, RESTART_MIN_S * (2 ** (entry['failures'] - 1)))
+    if action == 'stopped':
+        if entry['stopReason'] != 'restart':
+            ui.show_status('PairOfCleats: watch stopped.')
+        return
+    if action == 'failed':
+        message = result.output.strip() or 'PairOfCleats watch failed.'
+        ui.show_error('{0}\n\nPairOfCleats: watch gave up after {1} restarts.'.format(message, MAX_RESTARTS))
+        return
+    notice = 'Watch exited with code {0}; restarting in {1:.0f}s.'.format(result.returncode, delay_s)
+    _fan_out(entry, '\n{0}\n'.format(notice))
+    ui.show_status('PairOfCleats: {0}'.format(notice))
+    sublime.set_timeout(lambda: _launch(entry), int(delay_s * 1000))
+
+
+def _remove(entry):
+    if _WATCHERS.get(entry['key']) is entry:
+        _WATCHERS.pop(entry['key'], None)
+    for window_key in list(entry['windows']):
+        if _WINDOW_ROOTS.get(window_key) == entry['key']:
+            _WINDOW_ROOTS.pop(window_key, None)
 
 
 def snapshot(window):
-    key = _window_key(window)
-    entry = _WATCHERS.get(key)
-    if not entry:
-        return None
-    if not _is_handle_running(entry.get('handle')):
-        _WATCHERS.pop(key, None)
-        return None
-    snapshot_entry = dict(entry)
-    snapshot_entry['running'] = True
-    return snapshot_entry
+    with _LOCK:
+        entry = _WATCHERS.get(_WINDOW_ROOTS.get(_window_key(window)))
+        if not entry:
+            return None
+        if not entry['restartPending'] and not _is_handle_running(entry['handle']):
+            return None
+        return {
+            'root': entry['root'],
+            'token': entry['token'],
+            'stopping': entry['stopping'],
+            'stopReason': entry['stopReason'],
+            'restarting': entry['restartPending'],
+            'failures': entry['failures'],
+            'subscribers': len(entry['windows']),
+            'backend': entry['backend'],
+            'lagMs': entry['lagMs'],
+            'rescans': entry['rescans'],
+            'running': True,
+        }
 
 
 def is_running(window):
@@ -47,35 +238,36 @@ def is_running(window):
 
 
 def stop(window, reason='user'):
-    key = _window_key(window)
-    entry = _WATCHERS.get(key)
-    if not entry:
-        return False
-    entry['stopping'] = True
-    entry['stopReason'] = reason
-    _cancel_handle(entry.get('handle'))
-    return True
-
-
-def stop_all(reason='shutdown'):
-    for key, entry in list(_WATCHERS.items()):
+    """Unsubscribe ``window``; the process stops once no window uses it."""
+    window_key = _window_key(window)
+    with _LOCK:
+        entry = _WATCHERS.get(_WINDOW_ROOTS.pop(window_key, None))
         if not entry:
-            continue
+            return False
+        entry['windows'].pop(window_key, None)
+        entry['panels'].pop(window_key, None)
+        if entry['windows']:
+            return True
         entry['stopping'] = True
         entry['stopReason'] = reason
-        _cancel_handle(entry.get('handle'))
+        handle = entry['handle']
+        if handle is None:
+            # Waiting to restart: nothing to cancel.
+            _remove(entry)
+    _cancel_handle(handle)
+    return True
 
 
-def clear_if_done(window, token=None):
-    key = _window_key(window)
-    entry = _WATCHERS.get(key)
-    if not entry:
-        return
-    if token is not None and entry.get('token') != token:
-        return
-    if _is_handle_running(entry.get('handle')):
-        return
-    _WATCHERS.pop(key, None)
+def stop_all(reason='shutdown'):
+    with _LOCK:
+        entries = list(_WATCHERS.values())
+        _WATCHERS.clear()
+        _WINDOW_ROOTS.clear()
+        for entry in entries:
+            entry['stopping'] = True
+            entry['stopReason'] = reason
+    for entry in entries:
+        _cancel_handle(entry['handle'])
 
 
 def current_root(window):
@@ -0,0 +1,432 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import sublime
+
+from . import config
+from . import paths
+from . import runner
+from . import search as search_lib
+
+DEFAULT_IDLE_MS = 300000
+START_TIMEOUT_S = 30.0
+REQUEST_TIMEOUT_S = 120.0
+MAX_RESTARTS = 3
+RESTART_WINDOW_S = 60.0
+REAPER_INTERVAL_S = 5.0
+# Search options the MCP search tool does not accept; requests using them
+# keep going through a one-shot CLI process.
+UNSUPPORTED_SEARCH_FIELDS = ('filter', 'asOf', 'snapshotId')
+# Values of the MCP search tool's ``backend`` enum.
+SEARCH_BACKENDS = ('memory', 'sqlite', 'sqlite-fts', 'lmdb')
+
+_WORKERS = {}
+_LOCK = threading.Lock()
+_REAPER = {'thread': None}
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class WorkerResult(object):
+    def __init__(self, payload=None, error=None, cancelled=False):
+        self.returncode = 0 if error is None else 1
+        self.output = ''
+        self.payload = payload
+        self.error = error
+        self.cancelled = cancelled
+
+
+class WorkerCall(object):
+    def __init__(self, worker):
+        self.worker = worker
+        self.request_id = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        if self.request_id is not None:
+            self.worker.notify('$/cancelRequest', {'id': self.request_id})
+
+    def is_cancelled(self):
+        return self._cancelled
+
+
+class CliWorker(object):
+    """PairOfCleats MCP server kept alive to answer requests over stdio."""
+
+    def __init__(self, command, cwd, env=None, idle_ms=DEFAULT_IDLE_MS, spawn_process=None):
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = env
+        self.idle_ms = idle_ms
+        self.last_used = time.time()
+        self._spawn = spawn_process or subprocess.Popen
+        self._proc = None
+        self._ready = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._next_id = 1
+        self._crashes = []
+
+    def is_alive(self):
+        proc = self._proc
+        return proc is not None and proc.poll() is None
+
+    def ensure_started(self):
+        """Start the process if needed and wait until its initialize handshake is done."""
+        with self._lock:
+            starting = not self.is_alive()
+            if starting:
+                self._spawn_locked()
+            ready = self._ready
+        if not starting:
+            if not ready['event'].wait(START_TIMEOUT_S):
+                raise WorkerError('PairOfCleats worker did not initialize after {0:.0f}s.'.format(
+                    START_TIMEOUT_S
+                ))
+            if ready['error']:
+                raise WorkerError(ready['error'])
+            return
+        try:
+            self.request('initialize', {
+                'protocolVersion': '2024-11-05',
+                'capabilities': {},
+                'clientInfo': {'name': 'pairofcleats-sublime', 'version': '1'},
+            }, timeout_s=START_TIMEOUT_S)
+        except WorkerError as exc:
+            ready['error'] = str(exc)
+            ready['event'].set()
+            self.stop()
+            raise
+        ready['event'].set()
+
+    def _spawn_locked(self):
+        now = time.time()
+        self._crashes = [stamp for stamp in self._crashes if now - stamp < RESTART_WINDOW_S]
+        if len(self._crashes) >= MAX_RESTARTS:
+            raise WorkerError('PairOfCleats worker crashed {0} times; using one-shot CLI runs.'.format(
+                len(self._crashes)
+            ))
+        kwargs = runner._build_spawn_kwargs()
+        try:
+            proc = self._spawn(
+                self.command,
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                **kwargs
+            )
+        except Exception as exc:
+            raise WorkerError('Failed to launch PairOfCleats worker: {0}'.format(exc))
+        self._proc = proc
+        self._ready = {'event': threading.Event(), 'error': None}
+        thread = threading.Thread(target=self._read_loop, args=(proc,))
+        thread.daemon = True
+        thread.start()
+
+    def request(self, method, params=None, timeout_s=REQUEST_TIMEOUT_S, call=None):
+        slot = {'event': threading.Event(), 'response': None}
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = slot
+        if call is not None:
+            call.request_id = request_id
+        self.last_used = time.time()
+        try:
+            self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}})
+        except WorkerError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise
+        if not slot['event'].wait(timeout_s):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            self.notify('$/cancelRequest', {'id': request_id})
+            raise WorkerError('PairOfCleats worker timed out after {0:.0f}s.'.format(timeout_s))
+        self.last_used = time.time()
+        response = slot['response']
+        if response is None:
+            raise WorkerError('PairOfCleats worker exited.')
+        error = response.get('error')
+        if isinstance(error, dict):
+            raise WorkerError(error.get('message') or 'PairOfCleats worker request failed.')
+        return response.get('result')
+
+    def call_tool(self, name, arguments, timeout_s=REQUEST_TIMEOUT_S, call=None):
+        result = self.request('tools/call', {'name': name, 'arguments': arguments}, timeout_s=timeout_s, call=call)
+        content = (result or {}).get('content') or []
+        text = content[0].get('text') if content and isinstance(content[0], dict) else None
+        try:
+            payload = json.loads(text or '{}')
+        except Exception:
+            raise WorkerError('PairOfCleats worker returned invalid JSON.')
+        if (result or {}).get('isError'):
+            message = payload.get('message') if isinstance(payload, dict) else None
+            raise WorkerError(message or 'PairOfCleats worker request failed.')
+        return payload
+
+    def notify(self, method, params=None):
+        try:
+            self._send({'jsonrpc': '2.0', 'method': method, 'params': params or {}})
+        except WorkerError:
+            pass
+
+    def stop(self):
+        with self._lock:
+            proc = self._proc
+            self._proc = None
+        if proc is None:
+            return
+        runner._terminate_process_tree(proc)
+        try:
+            proc.wait(timeout=2)
+        except Exception:
+            runner._terminate_process_tree(proc, force=True)
+        _close_pipes(proc)
+        self._fail_pending()
+
+    def _send(self, message):
+        proc = self._proc
+        if proc is None or proc.stdin is None:
+            raise WorkerError('PairOfCleats worker is not running.')
+        body = json.dumps(message).encode('utf-8')
+        frame = 'Content-Length: {0}\r\n\r\n'.format(len(body)).encode('ascii') + body
+        try:
+            with self._write_lock:
+                proc.stdin.write(frame)
+                proc.stdin.flush()
+        except (OSError, ValueError) as exc:
+            raise WorkerError('PairOfCleats worker write failed: {0}'.format(exc))
+
+    def _read_loop(self, proc):
+        while True:
+            try:
+                message = _read_frame(proc.stdout)
+            except Exception:
+                message = None
+            if message is None:
+                break
+            request_id = message.get('id')
+            if request_id is None:
+                continue
+            with self._lock:
+                slot = self._pending.pop(request_id, None)
+            if slot is not None:
+                slot['response'] = message
+                slot['event'].set()
+        with self._lock:
+            if self._proc is proc:
+                # Exited without being asked to: count it against restarts.
+                self._proc = None
+                self._crashes.append(time.time())
+                crashed = True
+            else:
+                crashed = False
+        if crashed:
+            try:
+                proc.wait(timeout=2)
+            except Exception:
+                pass
+            _close_pipes(proc)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for slot in pending:
+            slot['event'].set()
+
+
+def _close_pipes(proc):
+    for stream in (proc.stdin, proc.stdout):
+        try:
+            if stream is not None:
+                stream.close()
+        except Exception:
+            pass
+
+
+def _read_frame(stream):
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            if length is None:
+                continue
+            break
+        name, _sep, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value.strip())
+    chunks = []
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+def is_enabled(settings):
+    return bool((settings or {}).get('cli_worker_enabled', True))
+
+
+def resolve_worker_command(settings, repo_root):
+    cli = paths.resolve_cli(settings, repo_root)
+    package_root = _package_root(cli, repo_root)
+    if not package_root:
+        return None
+    script = os.path.join(package_root, 'tools', 'mcp', 'server.js')
+    if not os.path.isfile(script):
+        return None
+    node_path = (settings or {}).get('node_path') or 'node'
+    return [node_path, script, '--repo', repo_root]
+
+
+def _package_root(cli, repo_root):
+    prefix = cli.get('args_prefix') or []
+    entry = prefix[0] if prefix else cli.get('command')
+    if entry and not os.path.isabs(entry) and not prefix:
+        entry = shutil.which(entry)
+    if not entry:
+        return None
+    entry = os.path.realpath(entry)
+    if entry.lower().endswith('.js'):
+        return os.path.dirname(os.path.dirname(entry))
+    # npm shims (.cmd/.ps1 or copied scripts) sit next to the installed package.
+    bin_dir = os.path.dirname(entry)
+    candidates = [os.path.join(bin_dir, 'node_modules', 'pairofcleats')]
+    if os.path.basename(bin_dir) == '.bin':
+        candidates.insert(0, os.path.join(os.path.dirname(bin_dir), 'pairofcleats'))
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return candidate
+    return None
+
+
+def build_search_arguments(query, repo_root, resolved, explain=False):
+    if explain:
+        return None
+    payload = search_lib.build_search_payload(
+        query,
+        repo_root=repo_root,
+        mode=resolved.get('mode'),
+        backend=resolved.get('backend') or None,
+        limit=resolved.get('limit'),
+        ann=resolved.get('ann'),
+        allow_sparse_fallback=resolved.get('allow_sparse_fallback'),
+        as_of=resolved.get('as_of') or None,
+        snapshot=resolved.get('snapshot') or None,
+        advanced=resolved.get('advanced'),
+    )
+    if any(field in payload for field in UNSUPPORTED_SEARCH_FIELDS):
+        return None
+    if payload.get('backend') and payload['backend'] not in SEARCH_BACKENDS:
+        return None
+    payload['repoPath'] = payload.pop('repo')
+    payload['output'] = 'compact'
+    return payload
+
+
+def get_worker(settings, repo_root):
+    if not is_enabled(settings) or not repo_root:
+        return None
+    command = resolve_worker_command(settings, repo_root)
+    if not command:
+        return None
+    key = (os.path.normcase(os.path.abspath(repo_root)), tuple(command))
+    idle_ms = (settings or {}).get('cli_worker_idle_ms')
+    if not isinstance(idle_ms, int) or idle_ms <= 0:
+        idle_ms = DEFAULT_IDLE_MS
+    with _LOCK:
+        worker = _WORKERS.get(key)
+        if worker is None:
+            worker = CliWorker(command, repo_root, env=config.build_env(settings), idle_ms=idle_ms)
+            _WORKERS[key] = worker
+        worker.idle_ms = idle_ms
+        _ensure_reaper()
+    return worker
+
+
+def call_tool_async(worker, name, arguments, on_done):
+    call = WorkerCall(worker)
+
+    def run():
+        try:
+            worker.ensure_started()
+            try:
+                payload = worker.call_tool(name, arguments, call=call)
+            except WorkerError:
+                if call.is_cancelled() or worker.is_alive():
+                    raise
+                # The worker died mid-request; restart it and retry once.
+                worker.ensure_started()
+                payload = worker.call_tool(name, arguments, call=call)
+            result = WorkerResult(payload=payload)
+        except Exception as exc:
+            result = WorkerResult(error=str(exc))
+        if call.is_cancelled():
+            result = WorkerResult(error='Request cancelled.', cancelled=True)
+        sublime.set_timeout(lambda: on_done(result), 0)
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return call
+
+
+def stop_idle(now=None):
+    now = time.time() if now is None else now
+    with _LOCK:
+        idle = [
+            (key, worker) for key, worker in _WORKERS.items()
+            if (now - worker.last_used) * 1000.0 >= worker.idle_ms
+        ]
+        for key, _worker in idle:
+            _WORKERS.pop(key, None)
+    for _key, worker in idle:
+        worker.stop()
+    return len(idle)
+
+
+def stop_all():
+    with _LOCK:
+        workers = list(_WORKERS.values())
+        _WORKERS.clear()
+    for worker in workers:
+        worker.stop()
+
+
+def _ensure_reaper():
+    thread = _REAPER.get('thread')
+    if thread is not None and thread.is_alive():
+        return
+
+    def reap():
+        while True:
+            time.sleep(REAPER_INTERVAL_S)
+            stop_idle()
+            with _LOCK:
+                if not _WORKERS:
+                    _REAPER['thread'] = None
+                    return
+
+    thread = threading.Thread(target=reap)
+    thread.daemon = True
+    _REAPER['thread'] = thread
+    thread.start()
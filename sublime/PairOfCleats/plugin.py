@@ -1,9 +1,17 @@
 import sublime
 import sublime_plugin
 
+from .lib import api_client
+from .lib import api_service
+from .lib import cli_info
 from .lib import config
+from .lib import index_status
+from .lib import paths
+from .lib import reindex
+from .lib import state_store
 from .lib import tasks
 from .lib import watch
+from .lib import worker
 from .commands import analysis as _analysis_commands
 from .commands import index as _index_commands
 from .commands import map as _map_commands
@@ -14,26 +22,82 @@ from .commands import settings as _settings_commands
 from .commands import validate as _validate_commands
 
 PLUGIN_NAME = 'PairOfCleats'
+FOLDER_COMMANDS = ('prompt_add_folder', 'remove_folder', 'close_folder_list', 'refresh_folder_list')
+CLI_CACHE_CHANGE_KEY = 'pairofcleats-cli-cache'
 
 
 def plugin_loaded():
     config.prime_settings()
+    sublime.load_settings(config.SETTINGS_FILE).add_on_change(CLI_CACHE_CHANGE_KEY, _on_settings_changed)
+
+
+def _clear_cli_caches():
+    # pairofcleats_path or node_path may point at a different CLI now.
+    paths.clear_cli_cache()
+    cli_info.clear()
+
+
+def _on_settings_changed():
+    _clear_cli_caches()
+    index_status.forget_window()
 
 
 def plugin_unloaded():
+    sublime.load_settings(config.SETTINGS_FILE).clear_on_change(CLI_CACHE_CHANGE_KEY)
     watch.stop_all(reason='plugin_unload')
+    index_status.stop_all()
     tasks.clear_all()
+    api_client.cancel_all()
+    api_client.close_connections()
+    worker.stop_all()
+    api_service.stop_all()
 
 
 class PairOfCleatsWindowListener(sublime_plugin.EventListener):
     def on_window_command(self, window, command_name, args):
         if command_name == 'close_window':
             watch.stop(window, reason='window_close')
+            index_status.release_window(window)
+            state_store.release_window(window)
 
     def on_post_window_command(self, window, command_name, args):
         if command_name == 'close_window':
             watch.stop(window, reason='window_close')
+            index_status.release_window(window)
+        elif command_name in FOLDER_COMMANDS:
+            paths.clear_repo_root_cache()
+            _clear_cli_caches()
+            config.invalidate_settings(window)
+            state_store.forget_window(window)
+            index_status.forget_window(window)
+
+    def on_load_project_async(self, window):
+        paths.clear_repo_root_cache()
+        _clear_cli_caches()
+        config.invalidate_settings(window)
+        state_store.forget_window(window)
+        index_status.forget_window(window)
+
+    def on_post_save_project_async(self, window):
+        # Project settings may override pairofcleats_path or node_path.
+        _clear_cli_caches()
+        config.invalidate_settings(window)
+        index_status.forget_window(window)
+
+    def on_activated_async(self, view):
+        index_status.watch_window(view.window(), view)
+
+    def on_post_save_async(self, view):
+        reindex.note_saved(view)
+
+    def on_text_command(self, view, command_name, args):
+        _search_commands.load_more_on_footer_click(view, command_name, args)
 
     def on_exit(self):
         watch.stop_all(reason='app_exit')
+        index_status.stop_all()
         tasks.clear_all()
+        api_client.cancel_all()
+        api_client.close_connections()
+        worker.stop_all()
+        api_service.stop_all()
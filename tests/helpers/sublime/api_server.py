@@ -3,15 +3,20 @@ import json
 import os
 import sys
 import threading
+import time
 import unittest
 from http.server import BaseHTTPRequestHandler
-from socketserver import TCPServer
+from socketserver import TCPServer, ThreadingTCPServer
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 PACKAGE_ROOT = os.path.join(REPO_ROOT, 'sublime')
 if PACKAGE_ROOT not in sys.path:
     sys.path.insert(0, PACKAGE_ROOT)
 
+sys.path.insert(0, os.path.dirname(__file__))
+
+from runtime_harness import install_fake_modules
+
 api_client = importlib.import_module('PairOfCleats.lib.api_client')
 
 
@@ -79,7 +84,335 @@ class _Handler(BaseHTTPRequestHandler):
         return
 
 
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = []
+    drop_after_response = False
+    stream_supported = True
+    release = None
+
+    def setup(self):
+        super().setup()
+        _KeepAliveHandler.connections.append(self.client_address)
+
+    def do_GET(self):
+        if _KeepAliveHandler.release is not None:
+            _KeepAliveHandler.release.wait(5)
+        if self.path.startswith('/status/stream?'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            status = {'repo': {'root': '/repo', 'buildId': 'build-2'}, 'health': {'issues': []}}
+            events = [('start', {'ok': True}), ('result', {'ok': True, 'status': status})]
+            if 'follow=1' in self.path:
+                rebuilt = {'repo': {'root': '/repo', 'buildId': 'build-3'}, 'health': {'issues': []}}
+                events += [('ping', {'ok': True}), ('result', {'ok': True, 'status': rebuilt})]
+            for event, data in events + [('done', {'ok': True})]:
+                chunk = 'event: {0}\ndata: {1}\n\n'.format(event, json.dumps(data)).encode('utf-8')
+                self.wfile.write('{0:x}\r\n'.format(len(chunk)).encode('ascii') + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+            return
+        body = json.dumps({'ok': True, 'uptimeMs': 1}).encode('utf-8')
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            self.close_connection = True
+            return
+        if _KeepAliveHandler.drop_after_response:
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or '0')
+        payload = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        hits = [{'file': 'src/{0}.js'.format(idx), 'name': payload.get('query')} for idx in range(30)]
+        if self.path == '/search/stream' and _KeepAliveHandler.stream_supported:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            events = [
+                ('start', {'ok': True}),
+                ('progress', {'ok': True, 'phase': 'search', 'message': 'Running search.'}),
+                ('result', {'ok': True, 'result': {'code': hits}}),
+                ('done', {'ok': True}),
+            ]
+            for event, data in events:
+                chunk = 'event: {0}\ndata: {1}\n\n'.format(event, json.dumps(data)).encode('utf-8')
+                self.wfile.write('{0:x}\r\n'.format(len(chunk)).encode('ascii') + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+            return
+        if self.path == '/search':
+            body = json.dumps({'ok': True, 'result': {'code': hits}}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, _format, *_args):
+        return
+
+
 class ApiClientTests(unittest.TestCase):
+    def tearDown(self):
+        api_client.close_connections()
+
+    def _start_keep_alive_server(self):
+        _KeepAliveHandler.connections = []
+        _KeepAliveHandler.drop_after_response = False
+        _KeepAliveHandler.stream_supported = True
+        _KeepAliveHandler.release = None
+        server = ThreadingTCPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return 'http://127.0.0.1:{0}'.format(server.server_address[1])
+
+    def test_requests_reuse_pooled_keep_alive_connection(self):
+        base_url = self._start_keep_alive_server()
+        for _ in range(3):
+            payload, _headers = api_client.health_json(base_url, {'api_timeout_ms': 2000})
+            self.assertTrue(payload.get('ok'))
+        self.assertEqual(len(_KeepAliveHandler.connections), 1)
+        self.assertEqual(api_client._POOL.idle_count(), 1)
+
+    def test_reconnects_when_pooled_connection_was_closed(self):
+        base_url = self._start_keep_alive_server()
+        _KeepAliveHandler.drop_after_response = True
+        api_client.health_json(base_url, {'api_timeout_ms': 2000})
+        payload, _headers = api_client.health_json(base_url, {'api_timeout_ms': 2000})
+        self.assertTrue(payload.get('ok'))
+        self.assertEqual(len(_KeepAliveHandler.connections), 2)
+
+    def test_idle_connections_are_evicted(self):
+        base_url = self._start_keep_alive_server()
+        pool = api_client.ConnectionPool(max_connections=2, idle_timeout_s=0)
+        original = api_client._POOL
+        api_client._POOL = pool
+        try:
+            api_client.health_json(base_url, {'api_timeout_ms': 2000})
+            api_client.health_json(base_url, {'api_timeout_ms': 2000})
+        finally:
+            api_client._POOL = original
+            pool.close_all()
+        self.assertEqual(len(_KeepAliveHandler.connections), 2)
+
+    def _run_blocked_health(self, base_url, supersede_key=None):
+        install_fake_modules()
+        done = threading.Event()
+        results = []
+
+        def on_done(result):
+            results.append(result)
+            done.set()
+
+        handle = api_client.run_async(
+            lambda: api_client.health_json(base_url, {'api_timeout_ms': 5000}),
+            on_done,
+            supersede_key=supersede_key,
+        )
+        return handle, done, results
+
+    def test_cancel_aborts_blocked_request(self):
+        base_url = self._start_keep_alive_server()
+        _KeepAliveHandler.release = threading.Event()
+        self.addCleanup(_KeepAliveHandler.release.set)
+        handle, done, results = self._run_blocked_health(base_url)
+        while not _KeepAliveHandler.connections:
+            time.sleep(0.01)
+        started = time.time()
+        handle.cancel()
+        self.assertTrue(done.wait(2))
+        self.assertLess(time.time() - started, 2)
+        self.assertTrue(results[0].cancelled)
+        self.assertEqual(api_client._POOL.idle_count(), 0)
+
+    def test_cancel_all_aborts_in_flight_requests(self):
+        base_url = self._start_keep_alive_server()
+        _KeepAliveHandler.release = threading.Event()
+        self.addCleanup(_KeepAliveHandler.release.set)
+        handle, done, results = self._run_blocked_health(base_url)
+        while not _KeepAliveHandler.connections:
+            time.sleep(0.01)
+        api_client.cancel_all('Sublime Text is exiting.')
+        api_client.close_connections()
+        self.assertTrue(done.wait(2))
+        self.assertTrue(handle.is_cancelled())
+        self.assertTrue(results[0].cancelled)
+        self.assertEqual(api_client._POOL.idle_count(), 0)
+
+    def test_newer_request_supersedes_older_one(self):
+        base_url = self._start_keep_alive_server()
+        _KeepAliveHandler.release = threading.Event()
+        self.addCleanup(_KeepAliveHandler.release.set)
+        first, first_done, first_results = self._run_blocked_health(base_url, supersede_key=('search', 1))
+        while not _KeepAliveHandler.connections:
+            time.sleep(0.01)
+        second, second_done, second_results = self._run_blocked_health(base_url, supersede_key=('search', 1))
+        self.assertTrue(first_done.wait(2))
+        self.assertTrue(first_results[0].cancelled)
+        self.assertEqual(first_results[0].error, 'Superseded by a newer request.')
+        self.assertFalse(second.is_cancelled())
+        _KeepAliveHandler.release.set()
+        self.assertTrue(second_done.wait(2))
+        self.assertTrue(second_results[0].payload.get('ok'))
+
+    def _swap_executor(self, executor):
+        original = api_client._EXECUTOR
+        api_client._EXECUTOR = executor
+        self.addCleanup(setattr, api_client, '_EXECUTOR', original)
+        install_fake_modules()
+        return executor
+
+    def test_executor_runs_interactive_requests_before_background(self):
+        executor = self._swap_executor(api_client.RequestExecutor(max_workers=1))
+        gate = threading.Event()
+        order = []
+        done = threading.Event()
+        api_client.run_async(lambda: gate.wait(2), lambda _result: None, queue_key=1)
+        for label, priority in [('status', api_client.PRIORITY_BACKGROUND), ('search', api_client.PRIORITY_INTERACTIVE)]:
+            api_client.run_async(
+                lambda label=label: order.append(label) or ({}, {}),
+                lambda _result: done.set() if len(order) == 2 else None,
+                queue_key=1,
+                priority=priority,
+            )
+        self.assertEqual(executor.worker_count(), 1)
+        gate.set()
+        self.assertTrue(done.wait(2))
+        self.assertEqual(order, ['search', 'status'])
+
+    def test_executor_starts_a_worker_when_idle_ones_are_already_claimed(self):
+        executor = self._swap_executor(api_client.RequestExecutor(max_workers=2))
+        api_client.run_async(lambda: ({}, {}), lambda _result: None, queue_key=1)
+        while executor._idle != 1:
+            time.sleep(0.01)
+        # Both jobs must run at once to pass the barrier.
+        barrier = threading.Barrier(2, timeout=2)
+        results = []
+        done = threading.Event()
+
+        def meet():
+            barrier.wait()
+            return {}, {}
+
+        def on_done(result):
+            results.append(result)
+            if len(results) == 2:
+                done.set()
+
+        for _ in range(2):
+            api_client.run_async(meet, on_done, queue_key=1)
+        self.assertTrue(done.wait(3))
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertEqual(executor.worker_count(), 2)
+
+    def test_executor_rejects_requests_when_window_queue_is_full(self):
+        executor = self._swap_executor(api_client.RequestExecutor(max_workers=1, max_queued=1))
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        results = []
+        api_client.run_async(lambda: gate.wait(2), results.append, queue_key=1)
+        while executor.pending_count():
+            time.sleep(0.01)
+        api_client.run_async(lambda: ({}, {}), results.append, queue_key=1)
+        api_client.run_async(lambda: ({}, {}), results.append, queue_key=1)
+        api_client.run_async(lambda: ({}, {}), results.append, queue_key=2)
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0].cancelled)
+        self.assertEqual(results[0].error, 'API request queue is full.')
+        self.assertEqual(executor.pending_count(1), 1)
+        self.assertEqual(executor.pending_count(2), 1)
+
+    def test_cancelling_queued_request_reports_without_running(self):
+        self._swap_executor(api_client.RequestExecutor(max_workers=1))
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        calls = []
+        results = []
+        api_client.run_async(lambda: gate.wait(2), lambda _result: None, queue_key=1)
+        handle = api_client.run_async(lambda: calls.append(1), results.append, queue_key=1)
+        handle.cancel()
+        self.assertTrue(results[0].cancelled)
+        gate.set()
+        time.sleep(0.05)
+        self.assertEqual(calls, [])
+
+    def test_search_stream_reports_progress_and_returns_one_result(self):
+        base_url = self._start_keep_alive_server()
+        events = []
+        payload, _headers = api_client.search_stream_json(
+            base_url,
+            '/repo',
+            {'api_timeout_ms': 2000},
+            'return',
+            'code',
+            on_event=events.append,
+        )
+        self.assertEqual(len(payload['code']), 30)
+        self.assertEqual(events, [{'type': 'progress', 'message': 'Running search.'}])
+        self.assertEqual(api_client._POOL.idle_count(), 1)
+
+    def test_search_stream_falls_back_when_route_is_missing(self):
+        base_url = self._start_keep_alive_server()
+        _KeepAliveHandler.stream_supported = False
+        payload, _headers = api_client.search_stream_json(
+            base_url,
+            '/repo',
+            {'api_timeout_ms': 2000},
+            'return',
+            'code',
+        )
+        self.assertEqual(payload['code'][0]['name'], 'return')
+        self.assertEqual(len(_KeepAliveHandler.connections), 1)
+
+    def test_status_stream_reads_one_snapshot_and_notes_generation(self):
+        base_url = self._start_keep_alive_server()
+        result_cache = importlib.import_module('PairOfCleats.lib.result_cache')
+        key = result_cache.make_key('/repo', 'q', 'code', 5)
+        result_cache.SYMBOL_CACHE.note_generation('/repo', 'build-1')
+        result_cache.SYMBOL_CACHE.put(key, [{'name': 'q'}])
+        try:
+            payload, _headers = api_client.status_stream_json(base_url, '/repo', {'api_timeout_ms': 2000})
+            self.assertEqual(payload['repo']['buildId'], 'build-2')
+            self.assertIsNone(result_cache.SYMBOL_CACHE.get(key))
+        finally:
+            result_cache.invalidate()
+
+    def test_follow_status_reports_each_snapshot_and_ping(self):
+        base_url = self._start_keep_alive_server()
+        seen = []
+        connections = []
+        api_client.follow_status(
+            base_url,
+            '/repo',
+            {'api_timeout_ms': 2000},
+            lambda status: seen.append(status and status['repo']['buildId']),
+            on_connect=connections.append,
+        )
+        self.assertEqual(seen, ['build-2', None, 'build-3'])
+        self.assertEqual(len(connections), 1)
+        self.assertIsNone(connections[0].sock)
+        self.assertEqual(api_client._POOL.idle_count(), 0)
+        result_cache = importlib.import_module('PairOfCleats.lib.result_cache')
+        result_cache.invalidate()
+
+    def test_iter_sse_events_parses_multiline_data(self):
+        lines = [b': keep-alive\n', b'event: progress\n', b'data: {"message":\n', b'data: "hi"}\n', b'\n']
+        self.assertEqual(list(api_client.iter_sse_events(lines)), [('progress', {'message': 'hi'})])
+
     def test_search_json_unwraps_compact_results(self):
         server = TCPServer(('127.0.0.1', 0), _Handler)
         port = server.server_address[1]
@@ -0,0 +1,155 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from runtime_harness import install_fake_modules
+
+
+FAKE_API_SERVER = r'''
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({'ok': self.path == '/health', 'uptimeMs': 1}).encode('utf-8')
+        self.send_response(200 if self.path == '/health' else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+server = HTTPServer(('127.0.0.1', 0), Handler)
+port = server.server_address[1]
+print('starting', flush=True)
+print(json.dumps({'ok': True, 'port': port, 'baseUrl': 'http://127.0.0.1:{0}'.format(port)}), flush=True)
+server.serve_forever()
+'''
+
+
+class ApiServiceBehaviorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sublime, _ = install_fake_modules()
+        cls.api_service = importlib.import_module('PairOfCleats.lib.api_service')
+        cls.cli_info = importlib.import_module('PairOfCleats.lib.cli_info')
+
+    def setUp(self):
+        self.sublime.reset()
+        self.repo = tempfile.mkdtemp()
+        self.other_repo = tempfile.mkdtemp()
+        self._build_server_command = self.api_service.build_server_command
+        self._build_env = self.api_service.config.build_env
+        self.script = FAKE_API_SERVER
+        self.api_service.build_server_command = lambda _settings, _repo_root, allowed_roots=None: [sys.executable, '-c', self.script]
+        self.api_service.config.build_env = lambda _settings: None
+        self.settings = {
+            'api_execution_mode': 'prefer',
+            'api_server_url': '',
+            'api_server_auto_start': True,
+            'api_timeout_ms': 2000,
+        }
+
+    def tearDown(self):
+        self.api_service.stop_all()
+        self.cli_info.clear()
+        self.api_service.build_server_command = self._build_server_command
+        self.api_service.config.build_env = self._build_env
+        shutil.rmtree(self.repo, ignore_errors=True)
+        shutil.rmtree(self.other_repo, ignore_errors=True)
+
+    def _wait_ready(self, server):
+        done = threading.Event()
+        results = []
+
+        def on_ready(ok):
+            results.append(ok)
+            done.set()
+
+        server.start_async(self.settings, on_ready=on_ready)
+        self.assertTrue(done.wait(30))
+        return results[0]
+
+    def test_prefer_mode_falls_back_until_server_is_healthy(self):
+        first = self.api_service.managed_settings(self.settings, self.repo)
+        self.assertEqual(first['api_server_url'], '')
+        server = self.api_service.get_server(self.settings, self.repo)
+        self.assertTrue(self._wait_ready(server))
+
+        ready = self.api_service.managed_settings(self.settings, self.repo)
+        self.assertTrue(ready['api_server_url'].startswith('http://127.0.0.1:'))
+        self.assertEqual(ready['api_server_url'], server.base_url)
+        self.assertEqual(self.settings['api_server_url'], '')
+
+    def test_windows_on_one_repo_share_a_server(self):
+        server = self.api_service.get_server(self.settings, self.repo)
+        self.assertIs(self.api_service.get_server(dict(self.settings), self.repo), server)
+        self.assertIsNot(self.api_service.get_server(self.settings, self.other_repo), server)
+
+    def test_require_mode_waits_for_server(self):
+        settings = dict(self.settings, api_execution_mode='require')
+        done = threading.Event()
+        self.assertIsNone(self.api_service.managed_settings(settings, self.repo, on_ready=done.set))
+        self.assertTrue(done.wait(30))
+        ready = self.api_service.managed_settings(settings, self.repo, on_ready=done.set)
+        self.assertTrue(ready['api_server_url'].startswith('http://127.0.0.1:'))
+
+    def test_explicit_url_and_cli_mode_skip_auto_start(self):
+        explicit = dict(self.settings, api_server_url='http://127.0.0.1:7464')
+        self.assertIs(self.api_service.managed_settings(explicit, self.repo), explicit)
+        cli = dict(self.settings, api_execution_mode='cli')
+        self.assertIs(self.api_service.managed_settings(cli, self.repo), cli)
+        self.assertEqual(self.api_service._SERVERS, {})
+
+    def test_failed_start_is_not_retried_immediately(self):
+        self.script = 'import sys; sys.exit(2)'
+        server = self.api_service.get_server(self.settings, self.repo)
+        self.assertFalse(self._wait_ready(server))
+        self.assertIn('exited during startup', server.error)
+        settings = dict(self.settings, api_execution_mode='require')
+        result = self.api_service.managed_settings(settings, self.repo, on_ready=lambda: None)
+        self.assertIs(result, settings)
+        self.assertFalse(server.is_starting())
+        self.assertIn('exited during startup', self.sublime.last_status)
+
+    def test_stop_all_terminates_servers(self):
+        server = self.api_service.get_server(self.settings, self.repo)
+        self.assertTrue(self._wait_ready(server))
+        proc = server._proc
+        self.api_service.stop_all()
+        self.assertIsNotNone(proc.poll())
+        self.assertFalse(server.is_ready())
+        self.assertEqual(self.api_service._SERVERS, {})
+
+    def test_cli_startup_is_checked_once(self):
+        cli = {'command': sys.executable, 'args_prefix': ['-c', 'import sys; sys.stderr.write("1.2.3\\n")'], 'source': 'settings'}
+        server = self.api_service.ManagedServer([sys.executable, '-c', self.script], self.repo, cli=cli)
+        self.assertTrue(self._wait_ready(server))
+        server.stop()
+        self.assertTrue(self._wait_ready(server))
+        info = self.cli_info.get_info(cli, spawn_process=lambda *_args, **_kwargs: self.fail('CLI checked twice'))
+        self.assertTrue(info['ok'])
+        self.assertEqual(info['version'], '1.2.3')
+        checked_at = info['checked_at']
+        self.assertEqual(self.cli_info.get_info(cli)['checked_at'], checked_at)
+
+        broken = {'command': sys.executable, 'args_prefix': ['-c', 'import sys; sys.stderr.write("boom\\n"); sys.exit(3)']}
+        server = self.api_service.ManagedServer([sys.executable, '-c', self.script], self.repo, cli=broken)
+        self.assertFalse(self._wait_ready(server))
+        self.assertIsNone(server._proc)
+        self.assertEqual(server.error, 'PairOfCleats CLI exited with code 3: boom')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import unittest
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from runtime_harness import FakeWindow, install_fake_modules
+from runtime_harness import FakeView, FakeWindow, install_fake_modules
 
 
 class IndexBehaviorTests(unittest.TestCase):
@@ -14,6 +14,7 @@ class IndexBehaviorTests(unittest.TestCase):
     def setUpClass(cls):
         cls.sublime, _ = install_fake_modules()
         cls.index = importlib.import_module('PairOfCleats.commands.index')
+        cls.reindex = importlib.import_module('PairOfCleats.lib.reindex')
 
     def setUp(self):
         self.sublime.reset()
@@ -89,10 +90,46 @@ class IndexBehaviorTests(unittest.TestCase):
             self.assertEqual(self.runner_calls, [])
             self.assertIn('require an explicit repo root', self.sublime.last_error)
 
+    def test_saves_are_debounced_into_one_incremental_update_per_repo(self):
+        self.index.config.get_settings = lambda _window: {
+            'index_on_save': True,
+            'index_on_save_debounce_ms': 1000,
+            'index_watch_mode': 'code',
+            # The update must not go to the warm search worker.
+            'cli_worker_enabled': True,
+        }
+        timers = []
+        set_timeout = self.sublime.set_timeout
+        self.sublime.set_timeout = lambda callback, delay=0: timers.append((callback, delay))
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                repo = os.path.join(tmp, 'repo')
+                os.makedirs(os.path.join(repo, '.git'))
+                os.makedirs(os.path.join(repo, 'node_modules', 'dep'))
+                for name in ('a.js', 'b.js', 'a.js', os.path.join('node_modules', 'dep', 'c.js')):
+                    view = FakeView(os.path.join(repo, name))
+                    view.set_window(self.window)
+                    self.reindex.note_saved(view)
+
+                self.assertEqual([delay for _callback, delay in timers], [1000, 1000, 1000])
+                self.assertEqual(self.reindex.pending_paths(repo), [os.path.join(repo, 'a.js'), os.path.join(repo, 'b.js')])
+                for callback, _delay in list(timers):
+                    callback()
+                self.assertEqual(len(self.runner_calls), 1)
+                self.assertEqual(self.runner_calls[0]['title'], self.reindex.UPDATE_TITLE)
+                self.assertEqual(self.runner_calls[0]['cwd'], os.path.abspath(repo))
+                self.assertEqual(self.runner_calls[0]['args'][:5], ['index', 'build', '--mode', 'code', '--incremental'])
+                self.assertEqual(self.reindex.pending_paths(repo), [])
+                self.assertIn('index updated (2 files)', self.sublime.last_status)
+        finally:
+            self.sublime.set_timeout = set_timeout
+            self.reindex.clear()
+
     def _run_process(self, _command, _args, cwd=None, env=None, window=None, title=None, capture_json=None, on_done=None, stream_output=None, panel_name=None, **_kwargs):
         self.runner_calls.append({
             'cwd': cwd,
             'title': title,
+            'args': list(_args),
         })
         if on_done:
             on_done(type('FakeResult', (), {
@@ -0,0 +1,163 @@
+import importlib
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from runtime_harness import FakeView, FakeWindow, install_fake_modules
+
+
+class IndexStatusBehaviorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sublime, _ = install_fake_modules()
+        cls.index_status = importlib.import_module('PairOfCleats.lib.index_status')
+        cls.fixture_repo = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), '..', '..', 'fixtures', 'sample')
+        )
+
+    def setUp(self):
+        self.sublime.reset()
+        self.window = FakeWindow()
+        self.view = FakeView(os.path.join(self.fixture_repo, 'src', 'index.js'), 'const sample = 1;')
+        self.view.set_window(self.window)
+        self.window.set_active_view(self.view)
+        self.window.set_folders([self.fixture_repo])
+        self.sublime.set_active_window(self.window)
+        index_status = self.index_status
+        self._originals = (
+            index_status.config.get_settings,
+            index_status.api_client.follow_status,
+            index_status.StatusMonitor.start,
+            index_status.index_state.get_last_build,
+        )
+        index_status.config.get_settings = lambda _window: {
+            'api_server_url': 'http://127.0.0.1:7464',
+            'index_status_interval_ms': 30000,
+        }
+        index_status.StatusMonitor.start = lambda _monitor: None
+
+    def tearDown(self):
+        index_status = self.index_status
+        (
+            index_status.config.get_settings,
+            index_status.api_client.follow_status,
+            index_status.StatusMonitor.start,
+            index_status.index_state.get_last_build,
+        ) = self._originals
+        index_status.stop_all()
+        index_status.result_cache.invalidate()
+
+    def test_index_status_monitor_paints_generation_and_backs_off(self):
+        index_status = self.index_status
+        result_cache = index_status.result_cache
+        snapshots = [
+            {'generation': 'abc123456', 'health': {'issues': ['sqlite code db missing']}},
+            RuntimeError('connection refused'),
+            {'generation': 'def789000', 'health': {'issues': []}},
+        ]
+
+        def follow_status(_base_url, repo_root, _settings, on_status, on_connect=None):
+            value = snapshots.pop(0)
+            if isinstance(value, Exception):
+                raise value
+            result_cache.note_status(repo_root, value)
+            on_status(value)
+
+        index_status.api_client.follow_status = follow_status
+        monitor = index_status.watch_window(self.window)
+        self.assertIs(index_status.get_monitor(monitor.repo_root), monitor)
+        monitor.poll_once()
+        status = self.view.status
+        self.assertEqual(status[index_status.STATUS_KEY], 'PairOfCleats: index abc1234 | 1 issue')
+
+        key = result_cache.make_key(monitor.repo_root, 'sample', 'code', 5)
+        result_cache.SYMBOL_CACHE.put(key, [{'name': 'sample'}])
+        monitor.poll_once()
+        self.assertEqual(monitor.next_delay(), index_status.MIN_BACKOFF_S)
+        self.assertEqual(status[index_status.STATUS_KEY], 'PairOfCleats: index abc1234 | 1 issue | offline')
+        self.assertIsNotNone(result_cache.SYMBOL_CACHE.get(key))
+
+        monitor.poll_once()
+        self.assertEqual(monitor.next_delay(), 30.0)
+        self.assertEqual(status[index_status.STATUS_KEY], 'PairOfCleats: index def7890')
+        self.assertIsNone(result_cache.SYMBOL_CACHE.get(key))
+
+        index_status.release_window(self.window)
+        self.assertNotIn(index_status.STATUS_KEY, status)
+        self.assertIsNone(index_status.get_monitor(monitor.repo_root))
+
+    def test_last_build_time_is_read_once_until_refresh(self):
+        index_status = self.index_status
+        reads = []
+        builds = [{'last_time': '2026-01-01T00:00:00Z'}, {'last_time': '2026-01-01T00:10:00Z'}]
+
+        def get_last_build(_window):
+            reads.append(1)
+            return builds[min(len(reads), len(builds)) - 1]
+
+        index_status.index_state.get_last_build = get_last_build
+        index_status.api_client.follow_status = (
+            lambda _base_url, _repo_root, _settings, on_status, on_connect=None: on_status({'generation': 'abc123456'})
+        )
+        monitor = index_status.watch_window(self.window)
+        for _ in range(3):
+            monitor.poll_once()
+            index_status.watch_window(self.window, self.view)
+        self.assertEqual(reads, [1])
+        built_at = monitor.built_at
+        self.assertIn('built', self.view.status[index_status.STATUS_KEY])
+
+        index_status.refresh(monitor.repo_root)
+        index_status.paint_window(self.window)
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(monitor.built_at - built_at, 600)
+
+    def test_followed_stream_pushes_updates_and_pings_keep_it_fresh(self):
+        index_status = self.index_status
+        painted = []
+        connections = []
+
+        class FakeConn(object):
+            sock = None
+
+        def follow_status(_base_url, _repo_root, _settings, on_status, on_connect=None):
+            on_connect(FakeConn())
+            connections.append(1)
+            on_status({'generation': 'abc123456'})
+            on_status(None)
+            on_status({'generation': 'def789000'})
+
+        index_status.api_client.follow_status = follow_status
+        monitor = index_status.watch_window(self.window)
+        monitor.on_update = lambda current: painted.append(current.generation)
+        monitor.updated_at = None
+        monitor.poll_once()
+        self.assertEqual(connections, [1])
+        self.assertEqual(painted, ['abc123456', 'def789000'])
+        self.assertIsNotNone(monitor.updated_at)
+        self.assertIsNone(monitor._conn)
+
+        monitor.stop()
+        monitor.poll_once()
+        self.assertEqual(painted, ['abc123456', 'def789000'])
+
+    def test_watch_window_only_resolves_the_repo_once(self):
+        index_status = self.index_status
+        index_status.api_client.follow_status = lambda *_args, **_kwargs: None
+        calls = []
+        get_settings = index_status.config.get_settings
+        index_status.config.get_settings = lambda window: calls.append(1) or get_settings(window)
+        monitor = index_status.watch_window(self.window)
+        for _ in range(3):
+            self.assertIs(index_status.watch_window(self.window, self.view), monitor)
+        self.assertEqual(calls, [1])
+
+        index_status.forget_window(self.window)
+        self.assertIs(index_status.watch_window(self.window, self.view), monitor)
+        self.assertEqual(calls, [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
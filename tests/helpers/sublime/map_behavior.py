@@ -134,6 +134,50 @@ class MapBehaviorTests(unittest.TestCase):
             self.window.quick_panel_callback(0)
             self.assertEqual(self.sublime.last_status, 'PairOfCleats: selected node has no source location.')
 
+    def test_map_node_index_is_cached_by_path_and_mtime(self):
+        map_nodes = importlib.import_module('PairOfCleats.lib.map_nodes')
+        map_nodes.clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            node_list_path = os.path.join(tmp, 'nodes.json')
+            nodes = [
+                {'label': 'fn{0}'.format(idx), 'file': 'src/f{0}.js'.format(idx % 3), 'startLine': idx + 1}
+                for idx in range(500)
+            ]
+            nodes[7] = {'label': 'with "nodes": [ in it', 'file': 'src/odd.js', 'startLine': None}
+            with open(node_list_path, 'w', encoding='utf-8') as handle:
+                json.dump({
+                    'root': '"nodes": [',
+                    'meta': {'nodes': [{'label': 'nested'}]},
+                    'generatedAt': 'now',
+                    'nodes': nodes,
+                }, handle, indent=2)
+            original_chunk = map_nodes.READ_CHUNK_CHARS
+            map_nodes.READ_CHUNK_CHARS = 37
+            try:
+                index = map_nodes.get_index(node_list_path)
+            finally:
+                map_nodes.READ_CHUNK_CHARS = original_chunk
+            self.assertEqual(len(index), 500)
+            self.assertEqual(len(index.files), 4)
+            self.assertEqual(index.items()[1], ['fn1', 'src/f1.js:2'])
+            self.assertEqual(index.items()[7], ['with "nodes": [ in it', 'src/odd.js'])
+            self.assertEqual(index.hit(7), {'file': 'src/odd.js', 'startLine': None, 'endLine': None})
+            self.assertIs(map_nodes.get_index(node_list_path), index)
+            self.assertIs(index.items(), index.items())
+
+            self.map_state.record_last_map(self.window, {'repo': tmp, 'nodeListPath': node_list_path})
+            command = self.map_commands.PairOfCleatsMapJumpToNodeCommand(self.window)
+            command.run()
+            self.assertIs(self.window.quick_panel_items, index.items())
+
+            with open(node_list_path, 'w', encoding='utf-8') as handle:
+                json.dump({'nodes': [{'label': 'only', 'file': 'src/only.js', 'startLine': 3}]}, handle)
+            os.utime(node_list_path, ns=(1, 1))
+            command.run()
+            self.assertEqual(self.window.quick_panel_items, [['only', 'src/only.js:3']])
+            self.window.quick_panel_callback(0)
+            self.assertEqual(self.window.opened_files[-1]['path'], os.path.join(tmp, 'src/only.js') + ':3')
+
     def test_map_show_last_report_reopens_persisted_report(self):
         self.map_state.record_last_map(self.window, {
             'repo': 'C:/repo',
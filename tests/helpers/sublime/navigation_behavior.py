@@ -23,6 +23,7 @@ class NavigationBehaviorTests(unittest.TestCase):
         cls.search = importlib.import_module('PairOfCleats.commands.search')
 
     def setUp(self):
+        self.search.result_cache.invalidate()
         self.window = FakeWindow()
         self.view = FakeView('C:/repo/src/current.js', 'WidgetBuilder')
         self.view.set_window(self.window)
@@ -35,8 +36,10 @@ class NavigationBehaviorTests(unittest.TestCase):
             'resolve_cli': self.search.paths.resolve_cli,
             'build_env': self.search.config.build_env,
             'run_process': self.search.runner.run_process,
+            'get_worker': self.search.worker.get_worker,
         }
         self.search.config.get_settings = lambda _window: {}
+        self.search.worker.get_worker = lambda _settings, _repo_root: None
         self.search.config.validate_settings = lambda _settings, _repo_root, workflow=None: []
         self.search.paths.resolve_repo_root = (
             lambda _window, return_reason=True, path_hint=None, allow_fallback=True: ('C:/repo', None)
@@ -63,6 +66,8 @@ class NavigationBehaviorTests(unittest.TestCase):
                 self.search.config.build_env = value
             elif key == 'run_process':
                 self.search.runner.run_process = value
+            elif key == 'get_worker':
+                self.search.worker.get_worker = value
 
     def test_goto_definition_opens_exact_hit(self):
         payload = {
@@ -21,6 +21,7 @@ class _FakeApiResult:
         self.payload = payload
         self.headers = headers or {}
         self.error = error
+        self.cancelled = False
 
 
 class OperatorBehaviorTests(unittest.TestCase):
@@ -42,6 +43,7 @@ class OperatorBehaviorTests(unittest.TestCase):
         self.sublime.set_active_window(self.window)
         self.runner_calls = []
         self.api_calls = []
+        self.api_priorities = []
         self._originals = {
             'get_settings': self.operator.config.get_settings,
             'validate_settings': self.operator.config.validate_settings,
@@ -136,6 +138,7 @@ class OperatorBehaviorTests(unittest.TestCase):
         self.assertIn('Uptime:', health_panel.appended)
         self.assertIn('PairOfCleats server status', status_panel.appended)
         self.assertIn(self.fixture_repo, status_panel.appended)
+        self.assertEqual(self.api_priorities, [self.operator.api_client.PRIORITY_BACKGROUND] * 2)
 
     def test_api_operator_commands_ignore_cli_global_mode(self):
         self.operator.config.get_settings = lambda _window: {
@@ -187,12 +190,13 @@ class OperatorBehaviorTests(unittest.TestCase):
         if on_done:
             on_done(_FakeCliResult(payload))
 
-    def _run_async(self, request_fn, on_done, on_progress=None):
+    def _run_async(self, request_fn, on_done, on_progress=None, **kwargs):
+        self.api_priorities.append(kwargs.get('priority'))
         if callable(on_progress):
             on_progress('Request started.')
         payload, headers = request_fn()
         on_done(_FakeApiResult(payload=payload, headers=headers))
-        return object()
+        return self.operator.api_client.ApiHandle(None)
 
     def _health_json(self, base_url, settings):
         self.api_calls.append({'kind': 'health', 'base_url': base_url})
@@ -261,5 +265,6 @@ class OperatorBehaviorTests(unittest.TestCase):
         return {}
 
 
+
 if __name__ == '__main__':
     unittest.main()
@@ -17,6 +17,8 @@ class PathsBehaviorTests(unittest.TestCase):
 
     def setUp(self):
         self.sublime.reset()
+        self.paths.clear_repo_root_cache()
+        self.paths.clear_cli_cache()
         self.window = FakeWindow()
         self.sublime.set_active_window(self.window)
 
@@ -34,6 +36,34 @@ class PathsBehaviorTests(unittest.TestCase):
             self.assertEqual(root, os.path.abspath(inner))
             self.assertIsNone(reason)
 
+    def test_repo_root_lookups_are_cached_until_a_marker_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            outer = os.path.join(tmp, 'outer')
+            inner = os.path.join(outer, 'inner')
+            os.makedirs(os.path.join(outer, '.git'))
+            os.makedirs(inner)
+            walks = []
+            walk = self.paths._walk_repo_root
+            self.paths._walk_repo_root = lambda path: walks.append(path) or walk(path)
+            recheck = self.paths.ROOT_CACHE_RECHECK_S
+            try:
+                self.assertEqual(self.paths.find_repo_root(inner), os.path.abspath(outer))
+                self.window.set_folders([inner])
+                for _ in range(5):
+                    self.assertEqual(self.paths.resolve_repo_root(self.window), os.path.abspath(outer))
+                self.assertEqual(walks, [inner])
+
+                self.paths.ROOT_CACHE_RECHECK_S = 0
+                self.assertEqual(self.paths.find_repo_root(inner), os.path.abspath(outer))
+                self.assertEqual(walks, [inner])
+                os.makedirs(os.path.join(inner, '.git'))
+                os.utime(inner, ns=(0, 0))
+                self.assertEqual(self.paths.find_repo_root(inner), os.path.abspath(inner))
+                self.assertEqual(walks, [inner, inner])
+            finally:
+                self.paths._walk_repo_root = walk
+                self.paths.ROOT_CACHE_RECHECK_S = recheck
+
     def test_strict_resolution_prompts_for_multiple_repo_roots(self):
         with tempfile.TemporaryDirectory() as tmp:
             repo_a = os.path.join(tmp, 'repo-a')
@@ -141,5 +171,58 @@ class PathsBehaviorTests(unittest.TestCase):
             self.assertEqual(watch_root, os.path.abspath(repo_root))
 
 
+    def test_cli_resolution_is_cached_until_node_modules_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'bin'))
+            with open(os.path.join(tmp, 'bin', 'pairofcleats.js'), 'w', encoding='utf-8') as handle:
+                handle.write('')
+            probes = []
+            find = self.paths._find_local_binary
+            self.paths._find_local_binary = lambda root: probes.append(root) or find(root)
+            recheck = self.paths.ROOT_CACHE_RECHECK_S
+            try:
+                cli = self.paths.resolve_cli({}, tmp)
+                self.assertEqual(cli['source'], 'repo-bin')
+                cli['args_prefix'].append('mutated')
+                self.assertEqual(self.paths.resolve_cli({}, tmp)['args_prefix'], [os.path.join(tmp, 'bin', 'pairofcleats.js')])
+                self.paths.ROOT_CACHE_RECHECK_S = 0
+                self.assertEqual(self.paths.resolve_cli({}, tmp)['source'], 'repo-bin')
+                self.assertEqual(probes, [tmp])
+
+                os.makedirs(os.path.join(tmp, 'node_modules', '.bin'))
+                with open(os.path.join(tmp, 'node_modules', '.bin', 'pairofcleats'), 'w', encoding='utf-8') as handle:
+                    handle.write('')
+                cli = self.paths.resolve_cli({}, tmp)
+                self.assertEqual(cli['source'], 'node_modules')
+                self.assertEqual(len(probes), 2)
+                self.assertEqual(self.paths.resolve_cli({'pairofcleats_path': 'bin/pairofcleats.js'}, tmp)['source'], 'settings')
+            finally:
+                self.paths._find_local_binary = find
+                self.paths.ROOT_CACHE_RECHECK_S = recheck
+
+    def test_configured_cli_is_re_resolved_when_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, 'pairofcleats.js')
+            with open(target, 'w', encoding='utf-8') as handle:
+                handle.write('')
+            calls = []
+            resolve = self.paths._resolve_cli
+            self.paths._resolve_cli = lambda *args: calls.append(args) or resolve(*args)
+            recheck = self.paths.ROOT_CACHE_RECHECK_S
+            self.paths.ROOT_CACHE_RECHECK_S = 0
+            try:
+                settings = {'pairofcleats_path': target}
+                self.paths.resolve_cli(settings, tmp)
+                self.paths.resolve_cli(settings, tmp)
+                self.assertEqual(len(calls), 1)
+                stat = os.stat(target)
+                os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+                self.assertEqual(self.paths.resolve_cli(settings, tmp)['source'], 'settings')
+                self.assertEqual(len(calls), 2)
+            finally:
+                self.paths._resolve_cli = resolve
+                self.paths.ROOT_CACHE_RECHECK_S = recheck
+
+
 if __name__ == '__main__':
     unittest.main()
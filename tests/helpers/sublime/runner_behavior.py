@@ -18,6 +18,7 @@ class RunnerBehaviorTests(unittest.TestCase):
     def setUpClass(cls):
         cls.sublime, _ = install_fake_modules()
         cls.runner = importlib.import_module('PairOfCleats.lib.runner')
+        cls.json_stream = importlib.import_module('PairOfCleats.lib.json_stream')
 
     def setUp(self):
         self.sublime.reset()
@@ -194,6 +195,129 @@ class RunnerBehaviorTests(unittest.TestCase):
         self.assertIn('[output truncated]', panel.appended)
 
 
+    def test_capture_json_is_not_limited_by_output_cap(self):
+        payload = {'hits': [{'file': 'src/{0}.js'.format(idx), 'text': 'x' * 50} for idx in range(40)]}
+        proc = _FakeImmediateProcess(stdout_text=json.dumps(payload, indent=2) + '\n', returncode=0)
+        result = self._run_fake(proc, capture_json=True, output_cap_chars=80)
+        self.assertEqual(result.state, 'done')
+        self.assertIsNone(result.error)
+        self.assertEqual(result.payload, payload)
+        self.assertTrue(result.stdout_truncated)
+        self.assertLessEqual(len(result.stdout), 80 + len(self.runner.TRUNCATION_MARKER))
+
+    def test_capture_json_collects_json_lines(self):
+        proc = _FakeImmediateProcess(stdout_text='{"event": "start"}\n{"event": "done", "count": 2}\n', returncode=0)
+        result = self._run_fake(proc, capture_json=True)
+        self.assertEqual(result.payload, [{'event': 'start'}, {'event': 'done', 'count': 2}])
+
+    def test_capture_json_reports_incomplete_document(self):
+        proc = _FakeImmediateProcess(stdout_text='{"ok": true, "hits": [', returncode=0)
+        result = self._run_fake(proc, capture_json=True)
+        self.assertEqual(result.state, 'parse_failed')
+        self.assertIn('before the document was complete', result.error)
+
+    def test_json_stream_decoder_handles_split_strings_and_escapes(self):
+        decoder = self.json_stream.JsonStreamDecoder()
+        text = json.dumps({'a': 'brace } and "quote" \\ end', 'b': [1, {'c': '['}]}) + '\n' + json.dumps([1, 2])
+        for char in text:
+            decoder.feed(char)
+        self.assertEqual(decoder.close(), [
+            {'a': 'brace } and "quote" \\ end', 'b': [1, {'c': '['}]},
+            [1, 2],
+        ])
+        self.assertIsNone(decoder.error)
+
+        lines = self.json_stream.JsonStreamDecoder()
+        lines.feed('{"a": 1}\n{"b": [2]}\n  {"c": ')
+        self.assertEqual(lines.documents, [{'a': 1}, {'b': [2]}])
+        self.assertEqual(lines._buffer, '{"c": ')
+        lines.feed('3}\n')
+        self.assertEqual(lines._buffer, '')
+        self.assertEqual(lines.close()[-1], {'c': 3})
+
+        scalar = self.json_stream.JsonStreamDecoder()
+        scalar.feed('nu')
+        scalar.feed('ll\n')
+        self.assertIsNone(self.json_stream.decode_payload(scalar))
+        self.assertEqual(self.json_stream.decode_payload(self.json_stream.JsonStreamDecoder()), {})
+
+    def test_byte_pipes_decode_split_characters_and_newlines(self):
+        proc = _FakeImmediateProcess(returncode=0)
+        proc.stdout = io.BytesIO('caf\u00e9 one\r\ntwo\r\n{"ok": true}\r\n'.encode('utf-8'))
+        proc.stderr = io.BytesIO(b'')
+        original = self.runner.READ_CHUNK_BYTES
+        self.runner.READ_CHUNK_BYTES = 4
+        try:
+            result = self._run_fake(proc)
+        finally:
+            self.runner.READ_CHUNK_BYTES = original
+        self.assertEqual(result.stdout, 'caf\u00e9 one\ntwo\n{"ok": true}\n')
+
+    def test_large_output_is_delivered_in_batches(self):
+        text = ''.join('line {0}\n'.format(idx) for idx in range(5000))
+        proc = _FakeImmediateProcess(returncode=0)
+        proc.stdout = io.BytesIO(text.encode('utf-8'))
+        proc.stderr = io.BytesIO(b'')
+        notes = []
+        original = self.tasks.note_progress
+        self.tasks.note_progress = lambda window, task, details=None: notes.append(details)
+        try:
+            result = self._run_fake(proc)
+        finally:
+            self.tasks.note_progress = original
+        self.assertEqual(result.stdout, text)
+        self.assertLess(len(notes), 10)
+        self.assertEqual(notes[-1], 'line 4999')
+
+    def test_panel_appends_are_buffered_into_one_command_per_frame(self):
+        panel = self.runner._ensure_panel(self.window, 'pairofcleats-test')
+        panel.command_log = []
+        queued = []
+        original = self.runner.sublime.set_timeout
+        self.runner.sublime.set_timeout = lambda callback, delay=0: queued.append(callback)
+        try:
+            for idx in range(1000):
+                self.runner._append_panel(panel, 'line {0}\n'.format(idx))
+        finally:
+            self.runner.sublime.set_timeout = original
+        self.assertEqual(len(queued), 1)
+        queued[0]()
+        appends = [entry for entry in panel.command_log if entry['name'] == 'append']
+        self.assertEqual(len(appends), 1)
+        self.assertTrue(panel.appended.endswith('line 999\n'))
+
+    def test_panel_keeps_only_the_last_lines(self):
+        panel = self.runner._ensure_panel(self.window, 'pairofcleats-test')
+        original = self.runner.PANEL_MAX_LINES
+        self.runner.PANEL_MAX_LINES = 5
+        try:
+            for idx in range(3):
+                self.runner._append_panel(panel, 'a{0}\nb{0}\nc{0}\n'.format(idx))
+            self.assertEqual(panel.appended, 'b1\nc1\na2\nb2\nc2\n')
+            self.runner._append_panel(panel, ''.join('x{0}\n'.format(idx) for idx in range(20)))
+            self.assertEqual(panel.appended, 'x15\nx16\nx17\nx18\nx19\n')
+        finally:
+            self.runner.PANEL_MAX_LINES = original
+
+    def _run_fake(self, proc, capture_json=False, output_cap_chars=None):
+        result_holder = {}
+        done = threading.Event()
+        kwargs = {}
+        if output_cap_chars is not None:
+            kwargs['output_cap_chars'] = output_cap_chars
+        self.runner.run_process(
+            'fake-command',
+            [],
+            window=self.window,
+            capture_json=capture_json,
+            stream_output=False,
+            spawn_process=lambda *args, **_kwargs: proc,
+            on_done=lambda result: (result_holder.update({'result': result}), done.set()),
+            **kwargs
+        )
+        self.assertTrue(done.wait(5), 'runner did not complete in time')
+        return result_holder['result']
+
 class _FakeLongRunningProcess:
     def __init__(self, wait_seconds=0.1):
         self.stdout = io.StringIO('')
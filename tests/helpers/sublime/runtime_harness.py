@@ -1,5 +1,10 @@
+import atexit
+import hashlib
+import importlib
 import os
+import shutil
 import sys
+import tempfile
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 PACKAGE_ROOT = os.path.join(REPO_ROOT, 'sublime')
@@ -10,19 +15,33 @@ if PACKAGE_ROOT not in sys.path:
 class FakeSettings:
     def __init__(self):
         self._data = {}
+        self._on_change = {}
 
     def get(self, key, default=None):
         return self._data.get(key, default)
 
     def set(self, key, value):
         self._data[key] = value
+        self._changed()
 
     def update(self, values):
         for key, value in (values or {}).items():
             self._data[key] = value
+        self._changed()
 
     def clear(self):
         self._data.clear()
+        self._changed()
+
+    def add_on_change(self, tag, callback):
+        self._on_change[tag] = callback
+
+    def clear_on_change(self, tag):
+        self._on_change.pop(tag, None)
+
+    def _changed(self):
+        for callback in list(self._on_change.values()):
+            callback()
 
 
 class FakeRegion:
@@ -39,7 +58,11 @@ class FakeSelection(list):
 
 
 class FakeView:
+    _next_id = 1
+
     def __init__(self, file_name=None, text=''):
+        self._id = FakeView._next_id
+        FakeView._next_id += 1
         self._file_name = file_name
         self._settings = FakeSettings()
         self.appended = ''
@@ -51,10 +74,27 @@ class FakeView:
         self._selection = FakeSelection([FakeRegion(0, 0)])
         self.command_log = []
         self._window = None
+        self.status = {}
+        self.dirty = False
+        self.changes = 0
+
+    def id(self):
+        return self._id
 
     def file_name(self):
         return self._file_name
 
+    def is_dirty(self):
+        return self.dirty
+
+    def change_count(self):
+        return self.changes
+
+    def edit_text(self, text):
+        self.text = text
+        self.dirty = True
+        self.changes += 1
+
     def window(self):
         return self._window
 
@@ -80,6 +120,15 @@ class FakeView:
             self.appended += args.get('characters', '')
         elif name == 'right_delete':
             self.appended = ''
+        elif name == 'pair_of_cleats_replace_panel_tail':
+            self.appended = self.appended[:args.get('start', 0)] + args.get('characters', '')
+        elif name == 'pair_of_cleats_trim_panel':
+            lines = self.appended.splitlines(True)
+            max_lines = args.get('max_lines', 0)
+            if self.appended.endswith('\n'):
+                lines.append('')
+            if max_lines > 0 and len(lines) - 1 > max_lines:
+                self.appended = ''.join(lines[-(max_lines + 1):])
         elif name == 'pair_of_cleats_apply_completion':
             self.text = args.get('text', '')
 
@@ -101,6 +150,18 @@ class FakeView:
     def sel(self):
         return self._selection
 
+    def size(self):
+        return len(self.appended or self.text or '')
+
+    def is_valid(self):
+        return True
+
+    def set_status(self, key, value):
+        self.status[key] = value
+
+    def erase_status(self, key):
+        self.status.pop(key, None)
+
     def substr(self, region):
         if isinstance(region, FakeRegion):
             return self.text[region.a:region.b]
@@ -148,9 +209,24 @@ class FakeWindow:
     def set_folders(self, folders):
         self._folders = list(folders or [])
 
-    def show_quick_panel(self, items, on_select, selected_index=-1):
+    def show_quick_panel(self, items, on_select, flags=0, selected_index=-1):
         self.quick_panel_items = items
         self.quick_panel_callback = on_select
+        self.quick_panel_flags = flags
+
+    def show_input_panel(self, caption, initial_text, on_done, on_change, on_cancel):
+        self.input_panel = {
+            'caption': caption,
+            'initial': initial_text,
+            'on_done': on_done,
+            'on_change': on_change,
+            'on_cancel': on_cancel,
+            'view': FakeView(),
+        }
+        return self.input_panel['view']
+
+    def focus_view(self, view):
+        self.focused_view = view
 
     def create_output_panel(self, name):
         panel = self.panels.get(name)
@@ -160,6 +236,9 @@ class FakeWindow:
             self.panels[name] = panel
         return panel
 
+    def find_output_panel(self, name):
+        return self.panels.get(name)
+
     def new_file(self):
         view = FakeView()
         view.set_window(self)
@@ -199,6 +278,12 @@ class FakeWindow:
         if view is not None:
             view.set_window(self)
 
+    def views(self):
+        views = list(self.new_views) + [entry['view'] for entry in self.opened_files]
+        if self._active_view is not None and self._active_view not in views:
+            views.append(self._active_view)
+        return views
+
 
 class FakeWindowCommand:
     def __init__(self, window=None):
@@ -274,4 +359,22 @@ def install_fake_modules():
 
     sys.modules['sublime'] = FakeSublimeModule
     sys.modules['sublime_plugin'] = FakeSublimePluginModule
+    _isolate_state_store()
     return FakeSublimeModule, FakeSublimePluginModule
+
+
+_STATE_ROOT = {}
+
+
+def _isolate_state_store():
+    # Keep plugin state written by behavior tests out of fixture repos.
+    if 'path' not in _STATE_ROOT:
+        _STATE_ROOT['path'] = tempfile.mkdtemp(prefix='pairofcleats-sublime-state-')
+        atexit.register(shutil.rmtree, _STATE_ROOT['path'], True)
+    state_store = importlib.import_module('PairOfCleats.lib.state_store')
+    root = _STATE_ROOT['path']
+    state_store.store_path = lambda repo_root: os.path.join(
+        root,
+        hashlib.sha1(os.path.abspath(repo_root).encode('utf-8')).hexdigest(),
+        state_store.STATE_FILE,
+    )
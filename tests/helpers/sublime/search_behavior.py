@@ -1,6 +1,10 @@
 import importlib
+import json
 import os
+import shutil
 import sys
+import tempfile
+import threading
 import unittest
 
 sys.path.insert(0, os.path.dirname(__file__))
@@ -17,10 +21,12 @@ class SearchBehaviorTests(unittest.TestCase):
 
     def setUp(self):
         self.sublime.reset()
+        self.search.result_cache.invalidate()
         self.window = FakeWindow()
         self.sublime.set_active_window(self.window)
         self.runner_calls = []
         self.api_calls = []
+        self.supersede_keys = []
         self._originals = {
             'resolve_repo_root': self.search.paths.resolve_repo_root,
             'get_settings': self.search.config.get_settings,
@@ -29,8 +35,12 @@ class SearchBehaviorTests(unittest.TestCase):
             'build_env': self.search.config.build_env,
             'run_process': self.search.runner.run_process,
             'api_search_json': self.search.api_client.search_json,
+            'api_search_stream_json': self.search.api_client.search_stream_json,
             'api_run_async': self.search.api_client.run_async,
+            'worker_get': self.search.worker.get_worker,
+            'worker_call_tool_async': self.search.worker.call_tool_async,
         }
+        self.search.worker.get_worker = lambda _settings, _repo_root: None
         self.search.paths.resolve_repo_root = (
             lambda _window, return_reason=True, path_hint=None, allow_fallback=True: ('C:/repo', None)
             if return_reason else 'C:/repo'
@@ -59,8 +69,14 @@ class SearchBehaviorTests(unittest.TestCase):
                 self.search.runner.run_process = value
             elif key == 'api_search_json':
                 self.search.api_client.search_json = value
+            elif key == 'api_search_stream_json':
+                self.search.api_client.search_stream_json = value
             elif key == 'api_run_async':
                 self.search.api_client.run_async = value
+            elif key == 'worker_get':
+                self.search.worker.get_worker = value
+            elif key == 'worker_call_tool_async':
+                self.search.worker.call_tool_async = value
 
     def test_search_prefers_api_when_configured(self):
         self.search.config.get_settings = lambda _window: {
@@ -84,7 +100,7 @@ class SearchBehaviorTests(unittest.TestCase):
             'api_timeout_ms': 5000,
             'api_execution_mode': 'prefer',
         }
-        self.search.api_client.search_json = self._search_json_success
+        self.search.api_client.search_stream_json = self._search_stream_json_success
         self.search.api_client.run_async = self._run_api_immediate
         self.search.runner.run_process = self._run_process
 
@@ -92,6 +108,7 @@ class SearchBehaviorTests(unittest.TestCase):
 
         self.assertEqual(len(self.api_calls), 1)
         self.assertEqual(len(self.runner_calls), 0)
+        self.assertEqual(self.supersede_keys, [('search', self.window.id())])
         self.assertEqual(self.api_calls[0]['ann'], True)
         self.assertEqual(self.api_calls[0]['allow_sparse_fallback'], True)
         self.assertEqual(self.api_calls[0]['as_of'], 'snap:baseline')
@@ -105,6 +122,339 @@ class SearchBehaviorTests(unittest.TestCase):
         session = self.results_state.get_last_results(self.window)
         self.assertEqual(session['query'], 'return')
 
+    def test_search_api_stream_reports_progress_and_renders_once(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'both',
+            'search_backend_default': '',
+            'search_limit': 25,
+            'open_results_in': 'output_panel',
+            'results_buffer_threshold': 50,
+            'history_limit': 25,
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_timeout_ms': 5000,
+            'api_execution_mode': 'require',
+        }
+        snapshots = []
+
+        def stream(*args, **kwargs):
+            on_event = kwargs.pop('on_event')
+            payload, headers = self._search_json_success(*args, **kwargs)
+            on_event({'type': 'progress', 'message': 'Running search.'})
+            snapshots.append('pairofcleats-results' in self.window.panels)
+            snapshots.append(self.window.panels['pairofcleats-progress'].appended)
+            return payload, headers
+
+        self.search.api_client.search_stream_json = stream
+        self.search.api_client.run_async = self._run_api_immediate
+
+        self.search._execute_search(self.window, 'return', {'mode': 'code', 'limit': 5}, explain=False)
+
+        # Nothing is rendered until the result arrives, then it is rendered once.
+        self.assertFalse(snapshots[0])
+        self.assertIn('Running search.', snapshots[1])
+        panel = self.window.panels['pairofcleats-results']
+        self.assertTrue(panel.appended.startswith('PairOfCleats results (1)'))
+        self.assertEqual(panel.appended.count('PairOfCleats results'), 1)
+        self.assertIsNotNone(panel.settings().get('pairofcleats.results.session'))
+
+    def test_load_more_appends_the_next_page(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'code',
+            'search_backend_default': '',
+            'search_limit': 2,
+            'open_results_in': 'output_panel',
+            'history_limit': 25,
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_timeout_ms': 5000,
+            'api_execution_mode': 'require',
+        }
+
+        def stream(*args, **kwargs):
+            kwargs.pop('on_event')
+            payload, headers = self._search_json_success(*args, **kwargs)
+            limit = self.api_calls[-1]['limit']
+            payload['code'] = [
+                {'file': 'src/f{0}.js'.format(idx), 'name': 'f{0}'.format(idx), 'startLine': idx}
+                for idx in range(min(limit, 3))
+            ]
+            return payload, headers
+
+        self.search.api_client.search_stream_json = stream
+        self.search.api_client.run_async = self._run_api_immediate
+
+        self.search._execute_search(self.window, 'return', {'mode': 'code'}, explain=False)
+        panel = self.window.panels['pairofcleats-results']
+        self.assertIn('2 hits shown', panel.appended)
+        self.assertTrue(self.search._has_more_results(self.window))
+        first_page = panel.appended.split('-- 2 hits shown')[0]
+
+        panel.window_to_text = lambda _xy: panel.size() - 1
+        click = {'by': 'words', 'event': {'x': 1, 'y': 1}}
+        self.search.load_more_on_footer_click(panel, 'drag_select', {'event': {'x': 1, 'y': 1}})
+        self.search.load_more_on_footer_click(panel, 'move', click)
+        self.assertEqual([call['limit'] for call in self.api_calls], [2])
+        panel.window_to_text = lambda _xy: 0
+        self.search.load_more_on_footer_click(panel, 'drag_select', click)
+        self.assertEqual([call['limit'] for call in self.api_calls], [2])
+        panel.window_to_text = lambda _xy: panel.size() - 1
+        self.search.load_more_on_footer_click(panel, 'drag_select', click)
+
+        self.assertEqual([call['limit'] for call in self.api_calls], [2, 4])
+        self.assertTrue(panel.appended.startswith(first_page))
+        self.assertIn('3. src/f2.js', panel.appended)
+        self.assertNotIn('hits shown', panel.appended)
+        self.assertFalse(self.search._has_more_results(self.window))
+        session = self.results_state.load_session(self.window, self.results_state.get_last_results(self.window))
+        self.assertEqual([hit['name'] for hit in session['hits']], ['f0', 'f1', 'f2'])
+        self.assertEqual(len(self.search.history.load_history(self.window)), 1)
+
+    def test_failed_page_load_can_be_retried_from_the_footer(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'code',
+            'search_backend_default': '',
+            'search_limit': 2,
+            'open_results_in': 'output_panel',
+            'history_limit': 25,
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_timeout_ms': 5000,
+            'api_execution_mode': 'require',
+        }
+
+        def stream(*args, **kwargs):
+            kwargs.pop('on_event')
+            payload, headers = self._search_json_success(*args, **kwargs)
+            payload['code'] = [
+                {'file': 'src/f{0}.js'.format(idx), 'name': 'f{0}'.format(idx), 'startLine': idx}
+                for idx in range(self.api_calls[-1]['limit'])
+            ]
+            return payload, headers
+
+        self.search.api_client.search_stream_json = stream
+        self.search.api_client.run_async = self._run_api_immediate
+        self.search._execute_search(self.window, 'return', {'mode': 'code'}, explain=False)
+        panel = self.window.panels['pairofcleats-results']
+        panel.window_to_text = lambda _xy: panel.size() - 1
+        click = {'by': 'words', 'event': {'x': 1, 'y': 1}}
+
+        self.search.api_client.run_async = self._run_api_error
+        self.search.load_more_on_footer_click(panel, 'drag_select', click)
+        self.assertNotIn(self.window.id(), self.search._PAGE_REQUESTS)
+
+        self.search.api_client.run_async = self._run_api_immediate
+        self.search.load_more_on_footer_click(panel, 'drag_select', click)
+        self.assertEqual([call['limit'] for call in self.api_calls], [2, 4])
+        self.assertIn('4. src/f3.js', panel.appended)
+
+    def _live_settings(self, **overrides):
+        settings = {
+            'index_mode_default': 'code',
+            'search_backend_default': '',
+            'search_limit': 25,
+            'search_live_debounce_ms': 150,
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_timeout_ms': 5000,
+            'api_execution_mode': 'require',
+        }
+        settings.update(overrides)
+        return lambda _window: settings
+
+    def _defer_timers(self):
+        timers = []
+        original = self.sublime.set_timeout
+        self.sublime.set_timeout = lambda callback, delay=0: timers.append((callback, delay))
+        self.addCleanup(setattr, self.sublime, 'set_timeout', original)
+
+        def flush():
+            while timers:
+                timers.pop(0)[0]()
+        return timers, flush
+
+    def test_live_search_debounces_and_reuses_cached_prefixes(self):
+        self.search.config.get_settings = self._live_settings()
+        self.search.api_client.run_async = self._run_api_immediate
+
+        def search_json(_base_url, _repo_root, _settings, query, _mode, limit=None, **_kwargs):
+            self.api_calls.append({'query': query, 'limit': limit})
+            return {'ok': True, 'code': [
+                {'file': 'src/{0}.js'.format(query), 'name': query, 'startLine': 1},
+                {'file': 'src/other.js', 'name': 'returnValue', 'startLine': 2},
+            ]}, {}
+
+        self.search.api_client.search_json = search_json
+        timers, flush = self._defer_timers()
+        self.search._live_search(self.window)
+        panel = self.window.input_panel
+
+        panel['on_change']('r')
+        panel['on_change']('re')
+        panel['on_change']('ret')
+        self.assertEqual([delay for _callback, delay in timers], [150, 150])
+        flush()
+        self.assertEqual(self.api_calls, [{'query': 'ret', 'limit': 20}])
+        self.assertEqual(self.supersede_keys, [('live-search', self.window.id())])
+        self.assertEqual(len(self.window.quick_panel_items), 2)
+        self.assertIs(self.window.focused_view, panel['view'])
+
+        panel['on_change']('retu')
+        # Hits for the cached "ret" prefix are narrowed before the request runs.
+        self.assertEqual(len(self.window.quick_panel_items), 1)
+        flush()
+        self.assertEqual([call['query'] for call in self.api_calls], ['ret', 'retu'])
+
+        panel['on_change']('ret')
+        self.assertEqual(timers, [])
+        self.assertEqual(len(self.window.quick_panel_items), 2)
+
+        panel['on_cancel']()
+        self.assertNotIn(self.window.id(), self.search._LIVE_SEARCHES)
+
+    def test_live_search_uses_worker_and_cancels_superseded_calls(self):
+        self.search.config.get_settings = self._live_settings(api_execution_mode='cli', api_server_url='')
+        calls = []
+
+        class Call(object):
+            def __init__(self, arguments, on_done):
+                self.arguments = arguments
+                self.on_done = on_done
+                self.cancelled = False
+
+            def cancel(self):
+                self.cancelled = True
+
+        def call_tool_async(_worker, name, arguments, on_done):
+            calls.append(Call(arguments, on_done))
+            return calls[-1]
+
+        self.search.worker.get_worker = lambda _settings, _repo_root: object()
+        self.search.worker.call_tool_async = call_tool_async
+        self.search._live_search(self.window)
+        panel = self.window.input_panel
+
+        panel['on_change']('ret')
+        panel['on_change']('retur')
+        self.assertEqual([call.arguments['query'] for call in calls], ['ret', 'retur'])
+        self.assertTrue(calls[0].cancelled)
+        self.assertFalse(calls[1].cancelled)
+
+        result = self.search.worker.WorkerResult(payload={'code': [{'file': 'src/a.js', 'name': 'retur'}]})
+        calls[1].on_done(result)
+        self.assertEqual(len(self.window.quick_panel_items), 1)
+        self.window.quick_panel_callback(0)
+        self.assertNotIn(self.window.id(), self.search._LIVE_SEARCHES)
+        self.assertTrue(self.window.opened_files[0]['path'].endswith('src/a.js'))
+        self.assertEqual(self.runner_calls, [])
+
+    def test_federated_search_sends_one_request_for_all_repo_roots(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        roots = []
+        for name in ('alpha', 'beta'):
+            root = os.path.join(tmp, name)
+            os.makedirs(os.path.join(root, '.git'))
+            roots.append(root)
+        self.window.set_folders(roots)
+        self.search.config.get_settings = self._live_settings(open_results_in='output_panel', history_limit=25)
+        self.search.api_client.run_async = self._run_api_immediate
+        requests = []
+
+        def federated_search_json(_base_url, _settings, payload):
+            requests.append(payload)
+            return {'ok': True, 'code': [
+                {'file': 'src/a.js', 'name': 'low', 'score': 0.2, 'repoAlias': 'alpha'},
+                {'file': 'src/b.js', 'name': 'high', 'score': 0.9, 'repoAlias': 'beta'},
+                {'file': 'src/c.js', 'name': 'mid', 'score': 0.5, 'repoAlias': 'alpha'},
+            ]}, {}
+
+        self.addCleanup(setattr, self.search.api_client, 'federated_search_json', self.search.api_client.federated_search_json)
+        self.search.api_client.federated_search_json = federated_search_json
+
+        self.search._execute_federated_search(self.window, 'needle')
+
+        self.assertEqual(len(requests), 1)
+        # A normal search in the same window must not cancel this one.
+        self.assertEqual(self.supersede_keys, [('federated-search', self.window.id())])
+        workspace = requests[0]['workspacePath']
+        self.assertEqual(requests[0]['query'], 'needle')
+        self.assertNotIn('repo', requests[0]['search'])
+        with open(workspace, 'r', encoding='utf-8') as handle:
+            config = json.load(handle)
+        self.assertEqual(sorted(repo['root'] for repo in config['repos']), roots)
+        self.assertTrue(config['cacheRoot'].startswith(roots[0]))
+        panel = self.window.panels['pairofcleats-results']
+        text = panel.appended
+        self.assertLess(text.index('== beta (1) =='), text.index('== alpha (2) =='))
+        self.assertLess(text.index('2. src/c.js'), text.index('3. src/a.js'))
+        session = self.results_state.load_session(self.window, self.results_state.get_last_results(self.window))
+        self.assertEqual([hit['name'] for hit in session['hits']], ['high', 'mid', 'low'])
+        path = self.search.results.resolve_hit_path(session['hits'][0], session['repoRoot'])
+        self.assertEqual(path, os.path.join(roots[1], 'src/b.js'))
+
+    def test_cancelled_federated_search_in_a_tab_reports_and_leaves_no_panel(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        roots = []
+        for name in ('alpha', 'beta'):
+            root = os.path.join(tmp, name)
+            os.makedirs(os.path.join(root, '.git'))
+            roots.append(root)
+        self.window.set_folders(roots)
+        self.search.config.get_settings = self._live_settings(open_results_in='new_tab', history_limit=25)
+        pending = []
+
+        def run_async(_request_fn, on_done, **_kwargs):
+            handle = self.search.api_client.ApiHandle(None)
+            pending.append((handle, on_done))
+            return handle
+
+        self.search.api_client.run_async = run_async
+        self.search._execute_federated_search(self.window, 'needle')
+
+        self.assertNotIn('pairofcleats-results', self.window.panels)
+        active = self.search.tasks.active_tasks(self.window)
+        self.assertEqual([task['title'] for task in active], ['PairOfCleats federated search'])
+        self.assertTrue(active[0]['cancellable'])
+        active[0]['cancel']()
+        self.assertTrue(pending[0][0].is_cancelled())
+
+        pending[0][1](self.search.api_client.ApiResult(error='Request cancelled.', cancelled=True))
+        self.assertEqual(self.search.tasks.active_tasks(self.window), [])
+        self.assertEqual(self.search.tasks.recent_tasks(self.window)[0]['status'], 'cancelled')
+        self.assertIn('federated search cancelled', self.sublime.last_status)
+        self.assertEqual(self.runner_calls, [])
+
+    def test_cancelled_api_search_is_not_retried_via_cli(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'both',
+            'search_backend_default': '',
+            'search_limit': 25,
+            'open_results_in': 'quick_panel',
+            'results_buffer_threshold': 50,
+            'history_limit': 25,
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_timeout_ms': 5000,
+            'api_execution_mode': 'prefer',
+        }
+        pending = []
+
+        def run_async(_request_fn, on_done, on_progress=None, **_kwargs):
+            handle = self.search.api_client.ApiHandle(None)
+            pending.append((handle, on_done))
+            return handle
+
+        self.search.api_client.run_async = run_async
+        self.search.runner.run_process = self._run_process
+
+        self.search._execute_search(self.window, 'return', {'mode': 'code', 'limit': 5}, explain=False)
+        task = self.search.tasks.cancel_active(self.window)
+        self.assertIsNotNone(task)
+        handle, on_done = pending[0]
+        self.assertTrue(handle.is_cancelled())
+        on_done(self.search.api_client.ApiResult(error=handle.reason, cancelled=True))
+
+        self.assertEqual(len(self.runner_calls), 0)
+        self.assertIsNone(self.window.quick_panel_items)
+        self.assertEqual(self.search.tasks.recent_tasks(self.window)[0]['status'], 'cancelled')
+
     def test_search_api_prefer_falls_back_to_cli_on_error(self):
         self.search.config.get_settings = lambda _window: {
             'index_mode_default': 'both',
@@ -141,6 +491,61 @@ class SearchBehaviorTests(unittest.TestCase):
         self.assertIn('7', self.runner_calls[0]['args'])
         self.assertIsNotNone(self.window.quick_panel_items)
 
+    def test_cli_search_uses_warm_worker(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'both',
+            'search_backend_default': '',
+            'search_limit': 25,
+            'open_results_in': 'quick_panel',
+            'results_buffer_threshold': 50,
+            'history_limit': 25,
+            'api_execution_mode': 'cli',
+        }
+        worker_calls = []
+
+        def call_tool_async(_worker, name, arguments, on_done):
+            worker_calls.append((name, arguments))
+            on_done(self.search.worker.WorkerResult(payload={
+                'code': [{'file': 'src/index.js', 'name': 'index', 'startLine': 3}],
+            }))
+            return self.search.worker.WorkerCall(_worker)
+
+        self.search.worker.get_worker = lambda _settings, _repo_root: object()
+        self.search.worker.call_tool_async = call_tool_async
+        self.search.runner.run_process = self._run_process
+
+        self.search._execute_search(self.window, 'return', {'mode': 'code', 'limit': 5}, explain=False)
+
+        self.assertEqual(self.runner_calls, [])
+        self.assertEqual(worker_calls[0][0], 'search')
+        self.assertEqual(worker_calls[0][1]['repoPath'], 'C:/repo')
+        self.assertEqual(worker_calls[0][1]['top'], 5)
+        self.assertIsNotNone(self.window.quick_panel_items)
+
+    def test_cli_search_falls_back_when_worker_fails(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'both',
+            'search_backend_default': '',
+            'search_limit': 25,
+            'open_results_in': 'quick_panel',
+            'results_buffer_threshold': 50,
+            'history_limit': 25,
+            'api_execution_mode': 'cli',
+        }
+
+        def call_tool_async(_worker, _name, _arguments, on_done):
+            on_done(self.search.worker.WorkerResult(error='worker exited'))
+            return self.search.worker.WorkerCall(_worker)
+
+        self.search.worker.get_worker = lambda _settings, _repo_root: object()
+        self.search.worker.call_tool_async = call_tool_async
+        self.search.runner.run_process = self._run_process
+
+        self.search._execute_search(self.window, 'return', {'mode': 'code', 'limit': 5}, explain=False)
+
+        self.assertEqual(len(self.runner_calls), 1)
+        self.assertIsNotNone(self.window.quick_panel_items)
+
     def test_symbol_lookup_ignores_temporal_defaults(self):
         self.search.config.get_settings = lambda _window: {
             'index_mode_default': 'both',
@@ -166,6 +571,147 @@ class SearchBehaviorTests(unittest.TestCase):
         self.assertIsNone(self.api_calls[0]['as_of'])
         self.assertIsNone(self.api_calls[0]['snapshot'])
 
+    def test_symbol_lookup_reuses_cached_hits_until_index_changes(self):
+        self.search.config.get_settings = lambda _window: {
+            'index_mode_default': 'both',
+            'search_backend_default': '',
+            'search_limit': 25,
+            'search_advanced_defaults': {},
+            'open_results_in': 'quick_panel',
+            'results_buffer_threshold': 50,
+            'history_limit': 25,
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_timeout_ms': 5000,
+            'api_execution_mode': 'require',
+        }
+        self.search.api_client.search_json = self._search_json_success
+        self.search.api_client.run_async = self._run_api_immediate
+        seen = []
+
+        def lookup(query='buildWidget', limit=25):
+            self.search._execute_symbol_lookup(
+                self.window,
+                query,
+                lambda hits, _repo_root, _resolved: seen.append(hits),
+                limit=limit,
+            )
+
+        lookup()
+        lookup()
+        self.assertEqual(len(self.api_calls), 1)
+        self.assertEqual(seen[0], seen[1])
+        lookup(limit=5)
+        self.assertEqual(len(self.api_calls), 2)
+
+        cache = self.search.result_cache
+        status = {'repo': {'root': 'C:/repo', 'artifacts': {'indexCode': 10}}}
+        self.assertFalse(cache.note_status('C:/repo', status))
+        lookup()
+        self.assertEqual(len(self.api_calls), 2)
+        status['repo']['artifacts']['indexCode'] = 12
+        self.assertTrue(cache.note_status('C:/repo', status))
+        lookup()
+        self.assertEqual(len(self.api_calls), 3)
+        cache.invalidate('C:/repo')
+        lookup()
+        self.assertEqual(len(self.api_calls), 4)
+
+    def test_symbol_lookup_maps_lines_onto_unsaved_buffers(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        saved = ['line {0}'.format(idx) for idx in range(1, 11)]
+        with open(os.path.join(tmp, 'a.js'), 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(saved) + '\n')
+        self.search.paths.resolve_repo_root = (
+            lambda _window, return_reason=True, path_hint=None, allow_fallback=True: (tmp, None)
+            if return_reason else tmp
+        )
+        settings = {
+            'search_limit': 25,
+            'search_advanced_defaults': {},
+            'api_server_url': 'http://127.0.0.1:7464',
+            'api_execution_mode': 'require',
+        }
+        self.search.config.get_settings = lambda _window: dict(settings)
+        self.search.api_client.run_async = self._run_api_immediate
+        self.search.api_client.search_json = lambda *_args, **_kwargs: ({'ok': True, 'code': [
+            {'file': 'a.js', 'startLine': 6, 'endLine': 7, 'name': 'six'},
+            {'file': 'b.js', 'startLine': 6, 'endLine': 7, 'name': 'other'},
+        ]}, {})
+        view = self.window.open_file(os.path.join(tmp, 'a.js'))
+        view.edit_text('\n'.join(['added 1', 'added 2'] + saved[:3] + saved[4:]) + '\n')
+        seen = []
+        done = threading.Event()
+        diff_threads = []
+        overlay = self.search.overlay
+        build = overlay._LineMap.build
+        overlay._LineMap.build = lambda saved, live: diff_threads.append(threading.current_thread()) or build(saved, live)
+        self.addCleanup(setattr, overlay._LineMap, 'build', build)
+        self.addCleanup(overlay.clear)
+
+        def on_hits(hits, _root, _resolved):
+            seen.append(hits)
+            done.set()
+
+        def lookup():
+            done.clear()
+            self.search._execute_symbol_lookup(self.window, 'six', on_hits)
+            self.assertTrue(done.wait(5))
+
+        lookup()
+        self.assertEqual([(hit['startLine'], hit['endLine']) for hit in seen[-1]], [(7, 8), (6, 7)])
+        self.assertEqual(len(diff_threads), 1)
+        self.assertIsNot(diff_threads[0], threading.current_thread())
+        lookup()
+        self.assertEqual(seen[-1][0]['startLine'], 7)
+        self.assertEqual(len(diff_threads), 1)
+        view.edit_text('\n'.join(saved) + '\n')
+        lookup()
+        self.assertEqual(seen[-1][0]['startLine'], 6)
+        settings['search_unsaved_overlay'] = False
+        view.edit_text('changed\n')
+        lookup()
+        self.assertEqual(seen[-1][0]['startLine'], 6)
+
+    def test_line_map_diffs_only_the_edited_region_under_a_cap(self):
+        line_map_class = self.search.overlay._LineMap
+        saved = ['line {0}'.format(idx) for idx in range(100000)]
+        live = saved[:50000] + ['added'] + saved[50000:]
+        line_map = line_map_class.build(saved, live)
+        self.assertEqual([line_map.map(line) for line in (1, 50000, 50001, 100000)], [1, 50000, 50002, 100001])
+
+        original = self.search.overlay.MAX_DIFF_LINES
+        self.search.overlay.MAX_DIFF_LINES = 10
+        try:
+            self.assertIsNone(line_map_class.build(saved, ['changed'] + saved[:20] + ['changed'] + saved[21:]))
+            self.assertIsNotNone(line_map_class.build(saved, saved[:20] + ['changed'] + saved[21:]))
+        finally:
+            self.search.overlay.MAX_DIFF_LINES = original
+
+    def test_result_cache_evicts_least_recent_entries_over_byte_cap(self):
+        cache = self.search.result_cache.ResultCache(max_bytes=200)
+        hit = {'file': 'src/index.js', 'name': 'x' * 40}
+        cache.put(('repo', 'a'), [hit])
+        cache.put(('repo', 'b'), [hit])
+        cache.get(('repo', 'a'))
+        cache.put(('repo', 'c'), [hit])
+        self.assertIsNotNone(cache.get(('repo', 'a')))
+        self.assertIsNone(cache.get(('repo', 'b')))
+        self.assertLessEqual(cache.size_bytes(), 200)
+        self.assertFalse(cache.put(('repo', 'd'), [hit] * 10))
+
+    def test_result_cache_expires_entries_after_ttl(self):
+        cache = self.search.result_cache.ResultCache(ttl_s=30)
+        cache.put(('repo', 'a'), [{'file': 'src/index.js'}])
+        self.assertIsNotNone(cache.get(('repo', 'a')))
+        time_fn = self.search.result_cache.time.time
+        self.search.result_cache.time.time = lambda: time_fn() + 31
+        try:
+            self.assertIsNone(cache.get(('repo', 'a')))
+        finally:
+            self.search.result_cache.time.time = time_fn
+        self.assertEqual(len(cache), 0)
+
     def test_require_api_blocks_unsupported_explain(self):
         self.search.config.get_settings = lambda _window: {
             'index_mode_default': 'both',
@@ -221,18 +767,26 @@ class SearchBehaviorTests(unittest.TestCase):
             }],
         }, {})
 
-    def _run_api_immediate(self, request_fn, on_done, on_progress=None):
+    def _search_stream_json_success(self, *args, **kwargs):
+        on_event = kwargs.pop('on_event', None)
+        payload, headers = self._search_json_success(*args, **kwargs)
+        if callable(on_event):
+            on_event({'type': 'hits', 'payload': {'code': payload['code']}})
+        return payload, headers
+
+    def _run_api_immediate(self, request_fn, on_done, on_progress=None, supersede_key=None, **_kwargs):
+        self.supersede_keys.append(supersede_key)
         if callable(on_progress):
             on_progress('Request started.')
         payload, headers = request_fn()
         on_done(self.search.api_client.ApiResult(payload=payload, headers=headers))
-        return None
+        return self.search.api_client.ApiHandle(None)
 
-    def _run_api_error(self, _request_fn, on_done, on_progress=None):
+    def _run_api_error(self, _request_fn, on_done, on_progress=None, **_kwargs):
         if callable(on_progress):
             on_progress('Request started.')
         on_done(self.search.api_client.ApiResult(error='api down'))
-        return None
+        return self.search.api_client.ApiHandle(None)
 
     def _run_process(self, _command, _args, cwd=None, env=None, window=None, title=None, capture_json=None, on_done=None, stream_output=None, panel_name=None):
         self.runner_calls.append({
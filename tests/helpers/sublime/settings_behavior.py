@@ -80,6 +80,7 @@ class SettingsBehaviorTests(unittest.TestCase):
     def test_validate_settings_requires_server_url_for_api_modes(self):
         settings = self.config.get_settings(None)
         settings['api_execution_mode'] = 'require'
+        settings['api_server_auto_start'] = False
         errors = self.config.validate_settings(settings, repo_root='C:/repo')
         self.assertIn('api_server_url must be set when api_execution_mode is prefer or require.', errors)
 
@@ -87,6 +88,13 @@ class SettingsBehaviorTests(unittest.TestCase):
         errors = self.config.validate_settings(settings, repo_root='C:/repo')
         self.assertIn('api_server_url must be set when api_execution_mode is prefer or require.', errors)
 
+    def test_validate_settings_allows_missing_server_url_with_auto_start(self):
+        settings = self.config.get_settings(None)
+        settings['api_execution_mode'] = 'require'
+        settings['api_server_auto_start'] = True
+        errors = self.config.validate_settings(settings, repo_root='C:/repo')
+        self.assertNotIn('api_server_url must be set when api_execution_mode is prefer or require.', errors)
+
     def test_resolve_execution_mode_uses_workflow_transport_matrix(self):
         settings = {
             'api_server_url': 'http://127.0.0.1:7464',
@@ -214,5 +222,43 @@ class SettingsBehaviorTests(unittest.TestCase):
         self.assertIn('Project env override keys: PAIR', text)
 
 
+    def test_effective_settings_are_cached_until_a_change(self):
+        self.window.set_project_data({'settings': {'pairofcleats': {'search_limit': 50}}})
+        first = self.config.get_settings(self.window)
+        first['search_limit'] = 1
+        self.assertEqual(self.config.get_settings(self.window)['search_limit'], 50)
+
+        self.window.set_project_data({'settings': {'pairofcleats': {'search_limit': 60}}})
+        self.assertEqual(self.config.get_settings(self.window)['search_limit'], 50)
+        self.config.invalidate_settings(self.window)
+        self.assertEqual(self.config.get_settings(self.window)['search_limit'], 60)
+
+        settings = self.sublime.load_settings(self.config.SETTINGS_FILE)
+        settings.set('open_results_in', 'output_panel')
+        self.assertEqual(self.config.get_settings(self.window)['open_results_in'], 'output_panel')
+        self.assertEqual(self.config.get_settings(None)['open_results_in'], 'output_panel')
+
+    def test_validation_results_are_memoized_by_settings_hash(self):
+        settings = self.config.get_settings(None)
+        settings['node_path'] = '/missing/node'
+        original = self.config._validate_settings
+        calls = []
+
+        def counting(*args):
+            calls.append(args)
+            return original(*args)
+
+        self.config._validate_settings = counting
+        try:
+            first = self.config.validate_settings(settings, 'C:/repo', workflow='search')
+            second = self.config.validate_settings(dict(settings), 'C:/repo', workflow='search')
+            self.config.validate_settings(settings, 'C:/repo', workflow='map')
+        finally:
+            self.config._validate_settings = original
+        self.assertIn('node_path does not exist: /missing/node', first)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 2)
+
+
 if __name__ == '__main__':
     unittest.main()
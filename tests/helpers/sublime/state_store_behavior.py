@@ -0,0 +1,191 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from runtime_harness import FakeWindow, install_fake_modules
+
+
+class StateStoreBehaviorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        install_fake_modules()
+        cls.state_store = importlib.import_module('PairOfCleats.lib.state_store')
+        cls.history = importlib.import_module('PairOfCleats.lib.history')
+        cls.results_state = importlib.import_module('PairOfCleats.lib.results_state')
+        cls.results = importlib.import_module('PairOfCleats.lib.results')
+        cls.session_blobs = importlib.import_module('PairOfCleats.lib.session_blobs')
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tmp, 'repo')
+        os.makedirs(os.path.join(self.repo, '.git'))
+        self.state_root = os.path.join(self.tmp, 'state')
+        self._store_path = self.state_store.store_path
+        self.state_store.store_path = lambda repo_root: os.path.join(
+            self.state_root,
+            os.path.basename(repo_root),
+            self.state_store.STATE_FILE,
+        )
+        self.state_store.clear_memory()
+        self.session_blobs.clear_memory()
+        self.window = FakeWindow()
+
+    def tearDown(self):
+        self.state_store.store_path = self._store_path
+        self.state_store.clear_memory()
+        self.session_blobs.clear_memory()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _state_file(self):
+        return os.path.join(self.state_root, 'repo', self.state_store.STATE_FILE)
+
+    def test_project_data_only_keeps_a_pointer(self):
+        self.window.set_folders([self.repo])
+        self.history.record_query(self.window, 'alpha', {'mode': 'code'}, 25)
+        self.results_state.record_last_results(self.window, {'query': 'alpha', 'payload': {'code': [1, 2, 3]}})
+
+        self.assertEqual(self.window.project_data(), {
+            'pairofcleats_state': {'store': self._state_file()},
+        })
+        self.assertTrue(os.path.isfile(self._state_file()))
+        self.state_store.clear_memory()
+        other = FakeWindow()
+        other.set_project_data(self.window.project_data())
+        self.assertEqual(self.history.load_history(other)[0]['query'], 'alpha')
+        last = self.results_state.get_last_results(other)
+        self.assertNotIn('payload', last)
+        self.assertEqual(self.results_state.load_session(other, last)['payload'], {'code': [1, 2, 3]})
+
+    def test_windows_on_one_repo_share_state(self):
+        other = FakeWindow()
+        for window in (self.window, other):
+            window.set_folders([self.repo])
+        self.history.record_query(self.window, 'alpha', {}, 25)
+        self.results_state.record_last_results(other, {'query': 'beta'})
+        self.assertEqual(self.history.get_last_query(other)['query'], 'alpha')
+        self.assertEqual(self.results_state.get_last_results(self.window)['query'], 'beta')
+
+    def test_legacy_project_state_is_migrated(self):
+        self.window.set_folders([self.repo])
+        self.window.set_project_data({
+            'folders': [{'path': self.repo}],
+            'pairofcleats_state': {
+                'history': [{'query': 'legacy'}],
+                'last_results': {'query': 'legacy'},
+            },
+        })
+        self.assertEqual(self.history.get_last_query(self.window)['query'], 'legacy')
+        data = self.window.project_data()
+        self.assertEqual(data['folders'], [{'path': self.repo}])
+        self.assertEqual(data['pairofcleats_state'], {'store': self._state_file()})
+        self.assertEqual(self.results_state.get_last_results(self.window), {'query': 'legacy'})
+
+    def test_memory_state_moves_to_disk_once_a_repo_is_known(self):
+        self.history.record_query(self.window, 'early', {}, 25)
+        self.assertEqual(self.window.project_data(), {})
+        self.assertEqual(self.history.load_history(self.window)[0]['query'], 'early')
+
+        self.window.set_folders([self.repo])
+        self.assertEqual(self.history.load_history(self.window)[0]['query'], 'early')
+        self.assertEqual(self.window.project_data()['pairofcleats_state'], {'store': self._state_file()})
+
+    def test_reads_are_served_from_memory_and_the_store_is_cached(self):
+        map_state = importlib.import_module('PairOfCleats.lib.map_state')
+        self.window.set_folders([self.repo])
+        map_state.record_last_map(self.window, {'repo': self.repo, 'outPath': 'map.html', 'summary': {'counts': {}}}, report_text='report body')
+        ref = map_state.get_last_map_ref(self.window)
+        self.assertEqual(ref, {'repo': self.repo, 'outPath': 'map.html', 'blob': ref['blob']})
+        with open(self._state_file(), 'rb') as handle:
+            self.assertNotIn(b'report body', handle.read())
+        self.assertEqual(map_state.get_last_map(self.window)['reportText'], 'report body')
+
+        calls = []
+        original = self.window.project_data
+        self.window.project_data = lambda: calls.append(1) or original()
+        os.remove(self._state_file())
+        for _ in range(3):
+            self.assertEqual(map_state.get_last_map_ref(self.window)['outPath'], 'map.html')
+        self.assertEqual(calls, [])
+        self.state_store.forget_window(self.window)
+        self.assertIsNotNone(map_state.get_last_map_ref(self.window))
+        self.assertEqual(calls, [1])
+
+    def test_store_compacts_superseded_records(self):
+        path = os.path.join(self.tmp, 'compact', 'state.jsonl')
+        original = self.state_store.COMPACT_MIN_BYTES
+        self.state_store.COMPACT_MIN_BYTES = 1024
+        try:
+            store = self.state_store.StateStore(path)
+            for idx in range(200):
+                store.put('history', [{'query': 'q{0}'.format(idx)}])
+                store.put('last_search', {'query': 'q{0}'.format(idx)})
+        finally:
+            self.state_store.COMPACT_MIN_BYTES = original
+        with open(path, 'rb') as handle:
+            lines = handle.read().splitlines()
+        self.assertLess(len(lines), 20)
+        reloaded = self.state_store.StateStore(path)
+        self.assertEqual(reloaded.get('history'), [{'query': 'q199'}])
+        self.assertEqual(reloaded.get('last_search'), {'query': 'q199'})
+        self.assertEqual(reloaded.keys(), ['history', 'last_search'])
+
+    def test_store_ignores_a_torn_trailing_record(self):
+        path = os.path.join(self.tmp, 'torn', 'state.jsonl')
+        store = self.state_store.StateStore(path)
+        store.put('history', [{'query': 'kept'}])
+        with open(path, 'ab') as handle:
+            handle.write(b'{"key": "history", "value": [{"query": "to')
+        reloaded = self.state_store.StateStore(path)
+        self.assertEqual(reloaded.get('history'), [{'query': 'kept'}])
+        reloaded.put('last_search', {'query': 'after'})
+        self.assertEqual(self.state_store.StateStore(path).get('last_search'), {'query': 'after'})
+        self.assertEqual(reloaded.get('last_search'), {'query': 'after'})
+
+    def test_sessions_are_stored_once_and_loaded_lazily(self):
+        self.window.set_folders([self.repo])
+        hits = [{'file': 'src/a.js', 'startLine': idx, 'name': 'hit{0}'.format(idx)} for idx in range(50)]
+        session = self.results.build_session('alpha', {'mode': 'code'}, self.repo, hits, 'new_tab')
+        self.results_state.record_last_results(self.window, session)
+        view = self.results.open_results_view(self.window, session['text'], session=session)
+
+        ref = self.results_state.get_last_results(self.window)
+        self.assertEqual(view.settings().get(self.results.RESULTS_SESSION_KEY), ref)
+        self.assertEqual(ref['query'], 'alpha')
+        self.assertNotIn('hits', ref)
+        self.assertNotIn('text', ref)
+        blob_dir = os.path.join(self.state_root, 'repo', self.session_blobs.BLOB_DIR)
+        self.assertEqual(os.listdir(blob_dir), [ref['blob'] + self.session_blobs.BLOB_SUFFIX])
+        with open(os.path.join(blob_dir, os.listdir(blob_dir)[0]), 'rb') as handle:
+            self.assertNotIn(b'src/a.js', handle.read())
+
+        reopened = self.results.reopen_session(self.window, ref)
+        self.assertEqual(reopened['target'], 'new_tab')
+        self.assertIn('hit49', reopened['view'].appended)
+
+    def test_blob_store_evicts_least_recently_used(self):
+        root = os.path.join(self.tmp, 'blobs')
+        store = self.session_blobs.BlobStore(root, max_bytes=4096)
+        digests = []
+        for idx in range(6):
+            value = {'idx': idx, 'noise': os.urandom(600).hex()}
+            digests.append(store.put(value))
+            os.utime(store._path(digests[-1]), (1000 + idx, 1000 + idx))
+            if idx == 3:
+                # Reading a blob marks it as recently used.
+                self.assertEqual(store.get(digests[0])['idx'], 0)
+                os.utime(store._path(digests[0]), (2000, 2000))
+        self.assertIsNotNone(store.get(digests[0]))
+        self.assertIsNotNone(store.get(digests[5]))
+        self.assertIsNone(store.get(digests[1]))
+        total = sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root))
+        self.assertLessEqual(total, 4096)
+        self.assertIsNone(self.session_blobs.load_session(self.window, {'blob': digests[1], 'query': 'gone'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -70,5 +70,34 @@ class TaskBehaviorTests(unittest.TestCase):
         self.assertIn('cancelling pairofcleats map', self.sublime.last_status.lower())
 
 
+    def test_progress_updates_are_coalesced_into_one_render(self):
+        task = self.tasks.start_task(self.window, 'PairOfCleats index build', kind='index', show_panel=False)
+        panel = self.window.panels[self.tasks.TASK_PANEL]
+        queued = []
+        original = self.tasks.sublime.set_timeout
+        self.tasks.sublime.set_timeout = lambda callback, delay=0: queued.append((callback, delay))
+        try:
+            for idx in range(500):
+                self.tasks.note_progress(self.window, task, details='line {0}'.format(idx))
+        finally:
+            self.tasks.sublime.set_timeout = original
+        self.assertEqual(len(queued), 1)
+        self.assertLessEqual(queued[0][1], self.tasks.RENDER_INTERVAL_MS)
+        self.assertNotIn('line 499', panel.appended)
+        queued[0][0]()
+        self.assertIn('detail: line 499', panel.appended)
+
+    def test_detail_changes_rewrite_only_the_panel_tail(self):
+        task = self.tasks.start_task(self.window, 'PairOfCleats search', kind='search', details='Starting...')
+        panel = self.window.panels[self.tasks.TASK_PANEL]
+        panel.command_log = []
+        self.tasks.note_progress(self.window, task, details='Scanning code...')
+        names = [entry['name'] for entry in panel.command_log]
+        self.assertIn('pair_of_cleats_replace_panel_tail', names)
+        self.assertNotIn('right_delete', names)
+        self.assertTrue(panel.appended.startswith('PairOfCleats task progress'))
+        self.assertIn('detail: Scanning code...', panel.appended)
+        self.assertNotIn('Starting...', panel.appended)
+
 if __name__ == '__main__':
     unittest.main()
@@ -42,7 +42,6 @@ class VisibilityBehaviorTests(unittest.TestCase):
     def tearDown(self):
         self.tasks.clear_all()
         self.watch.stop_all('test')
-        self.watch.clear_if_done(self.window)
 
     def test_text_commands_follow_view_selection_and_symbol_visibility(self):
         view = FakeView('C:/repo/src/app.js', 'const sample = 1;')
@@ -118,11 +117,12 @@ class VisibilityBehaviorTests(unittest.TestCase):
             self.assertTrue(start.is_visible())
             self.assertTrue(start.is_enabled())
             self.assertFalse(stop.is_visible())
-            token = self.watch.register(self.window, _Handle(), repo)
+            self.watch.start(self.window, repo, lambda _window, _on_output, _on_done: _Handle())
             self.assertFalse(start.is_enabled())
             self.assertTrue(stop.is_visible())
             self.assertTrue(stop.is_enabled())
-            self.watch.clear_if_done(self.window, token=token)
+            self.watch.stop(self.window)
+            self.assertFalse(stop.is_enabled())
 
     def test_runtime_visibility_tracks_active_and_cancellable_tasks(self):
         show = self.runtime.PairOfCleatsShowProgressCommand(self.window)
@@ -74,10 +74,15 @@ class WatchBehaviorTests(unittest.TestCase):
         self.index.config.build_env = lambda _settings: {}
         self.index.indexing.build_index_args = lambda *args, **kwargs: ['watch']
 
-        def _run_process(command, args, cwd=None, env=None, window=None, title=None, capture_json=None, on_done=None, stream_output=None, panel_name=None):
+        self.outputs = []
+        self.envs = []
+
+        def _run_process(command, args, cwd=None, env=None, window=None, title=None, capture_json=None, on_done=None, stream_output=None, panel_name=None, on_output=None):
             handle = _FakeHandle()
             self.handles.append(handle)
             self.callbacks.append(on_done)
+            self.outputs.append(on_output)
+            self.envs.append(env)
             return handle
 
         self.index.runner.run_process = _run_process
@@ -121,5 +126,72 @@ class WatchBehaviorTests(unittest.TestCase):
         self.assertTrue(self.watch.is_running(self.window))
 
 
+    def test_windows_on_one_root_share_a_single_watch(self):
+        other = FakeWindow()
+        self.index._run_index_watch(self.window)
+        self.index._run_index_watch(other)
+        self.assertEqual(len(self.handles), 1)
+        self.assertEqual(self.watch.snapshot(other)['subscribers'], 2)
+
+        self.outputs[0]('Indexed src/a.js\n')
+        for window in (self.window, other):
+            self.assertIn('Indexed src/a.js', window.panels[self.index.INDEX_PANEL].appended)
+
+        self.index._run_index_watch_stop(self.window)
+        self.assertEqual(self.handles[0].cancelled, 0)
+        self.assertFalse(self.watch.is_running(self.window))
+        self.assertEqual(self.watch.current_root(other), 'C:/repo')
+
+        # A crash restarts the process for the remaining window.
+        self.handles[0].process.code = 1
+        self.callbacks[0](_FakeResult(returncode=1, output='boom'))
+        self.assertEqual(len(self.handles), 2)
+        self.assertTrue(self.watch.is_running(other))
+        self.assertIn('restarting in 1s', other.panels[self.index.INDEX_PANEL].appended)
+
+        self.index._run_index_watch_stop(other)
+        self.assertEqual(self.handles[1].cancelled, 1)
+        self.callbacks[1](_FakeResult(returncode=0))
+        self.assertFalse(self.watch.is_running(other))
+        self.index._run_index_watch(self.window)
+        self.assertEqual(len(self.handles), 3)
+
+    def test_watch_commit_invalidates_cached_search_results(self):
+        result_cache = self.index.result_cache
+        key = result_cache.make_key('C:/repo', 'alpha', 'code', 25)
+        result_cache.SYMBOL_CACHE.put(key, [{'file': 'src/a.js'}])
+        self.index._run_index_watch(self.window)
+
+        self.outputs[0]('[watch] Rebuilding index for 1 change(s)...\n')
+        self.assertIsNotNone(result_cache.SYMBOL_CACHE.get(key))
+        self.outputs[0]('[watch] Index update com')
+        self.outputs[0]('plete.\n')
+        self.assertIsNone(result_cache.SYMBOL_CACHE.get(key))
+
+    def test_watch_defaults_to_parcel_events_and_reports_backend_and_lag(self):
+        calls = []
+        self.index.indexing.build_index_args = lambda *args, **kwargs: calls.append(kwargs) or ['watch']
+        self.index._run_index_watch(self.window)
+        self.assertEqual(calls[0]['watch_poll_ms'], 0)
+        self.assertEqual(self.envs[0]['PAIROFCLEATS_WATCHER_BACKEND'], 'parcel')
+
+        index_status = importlib.import_module('PairOfCleats.lib.index_status')
+        self.outputs[0]('[watch] Monitoring 1200 file(s) via par')
+        self.assertIsNone(self.watch.snapshot(self.window)['backend'])
+        self.outputs[0]('cel fs events.\n[watch] Event lag: avg 12ms, max 40ms over 3 event(s).\n')
+        self.assertEqual(index_status._format_watch(self.window), 'watch parcel, lag 12ms')
+
+        self.watch.stop(self.window)
+        self.index.config.get_settings = lambda _window: {
+            'index_watch_backend': 'auto',
+            'index_watch_poll_ms': 1500,
+        }
+        self.index._run_index_watch(self.window)
+        self.assertEqual(calls[1]['watch_poll_ms'], 1500)
+        self.assertNotIn('PAIROFCLEATS_WATCHER_BACKEND', self.envs[1])
+        self.outputs[1]('[watch] Monitoring 3 file(s) via chokidar polling 1500ms.\n')
+        self.assertEqual(index_status._format_watch(self.window), 'watch chokidar polling 1500ms')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,188 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from runtime_harness import install_fake_modules
+
+
+FAKE_SERVER = r'''
+import json
+import os
+import sys
+
+marker = sys.argv[1]
+stdin = sys.stdin.buffer
+stdout = sys.stdout.buffer
+
+
+def read_frame():
+    length = None
+    while True:
+        line = stdin.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            if length is None:
+                continue
+            break
+        name, _sep, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value.strip())
+    return json.loads(stdin.read(length).decode('utf-8'))
+
+
+def send(message):
+    body = json.dumps(message).encode('utf-8')
+    stdout.write(b'Content-Length: ' + str(len(body)).encode('ascii') + b'\r\n\r\n' + body)
+    stdout.flush()
+
+
+with open(marker, 'a') as handle:
+    handle.write('start\n')
+
+while True:
+    message = read_frame()
+    if message is None:
+        break
+    if 'id' not in message:
+        continue
+    method = message.get('method')
+    if method == 'initialize':
+        send({'jsonrpc': '2.0', 'id': message['id'], 'result': {'capabilities': {}}})
+        continue
+    arguments = message['params'].get('arguments') or {}
+    query = arguments.get('query')
+    if query == 'crash-once' and not os.path.exists(marker + '.crashed'):
+        open(marker + '.crashed', 'w').close()
+        os._exit(3)
+    if query == 'fail':
+        payload = {'message': 'Index not found.'}
+        result = {'content': [{'type': 'text', 'text': json.dumps(payload)}], 'isError': True}
+    else:
+        payload = {'code': [{'file': 'src/a.py', 'startLine': 3, 'name': query}], 'pid': os.getpid()}
+        result = {'content': [{'type': 'text', 'text': json.dumps(payload)}]}
+    send({'jsonrpc': '2.0', 'id': message['id'], 'result': result})
+'''
+
+
+class WorkerBehaviorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sublime, _ = install_fake_modules()
+        cls.worker = importlib.import_module('PairOfCleats.lib.worker')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.marker = os.path.join(self.tmpdir, 'starts.log')
+        self.cli_worker = self.worker.CliWorker(
+            [sys.executable, '-c', FAKE_SERVER, self.marker],
+            self.tmpdir,
+            idle_ms=1000,
+        )
+
+    def tearDown(self):
+        self.cli_worker.stop()
+        self.worker.stop_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _starts(self):
+        with open(self.marker) as handle:
+            return len(handle.read().splitlines())
+
+    def _call(self, query):
+        done = threading.Event()
+        results = []
+
+        def on_done(result):
+            results.append(result)
+            done.set()
+
+        self.worker.call_tool_async(self.cli_worker, 'search', {'query': query}, on_done)
+        self.assertTrue(done.wait(30))
+        return results[0]
+
+    def test_requests_reuse_one_warm_process(self):
+        first = self._call('alpha')
+        second = self._call('beta')
+        self.assertIsNone(first.error)
+        self.assertEqual(first.payload['code'][0]['name'], 'alpha')
+        self.assertEqual(second.payload['code'][0]['name'], 'beta')
+        self.assertEqual(first.payload['pid'], second.payload['pid'])
+        self.assertEqual(self._starts(), 1)
+
+    def test_concurrent_callers_wait_for_initialize(self):
+        release = threading.Event()
+        request = self.cli_worker.request
+
+        def slow_request(method, *args, **kwargs):
+            if method == 'initialize':
+                release.wait(30)
+            return request(method, *args, **kwargs)
+
+        self.cli_worker.request = slow_request
+        started = []
+        start = lambda: started.append(self.cli_worker.ensure_started())
+        threads = [threading.Thread(target=start) for _ in range(2)]
+        threads[0].start()
+        while not self.cli_worker.is_alive():
+            self.worker.time.sleep(0.01)
+        threads[1].start()
+        threads[1].join(0.2)
+        self.assertEqual(started, [])
+        release.set()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(started, [None, None])
+        self.assertEqual(self._starts(), 1)
+
+    def test_tool_errors_are_reported_without_restart(self):
+        result = self._call('fail')
+        self.assertEqual(result.error, 'Index not found.')
+        self.assertFalse(result.cancelled)
+        self.assertTrue(self.cli_worker.is_alive())
+        self.assertEqual(self._starts(), 1)
+
+    def test_worker_restarts_after_crash_and_retries(self):
+        result = self._call('crash-once')
+        self.assertIsNone(result.error)
+        self.assertEqual(result.payload['code'][0]['name'], 'crash-once')
+        self.assertEqual(self._starts(), 2)
+
+    def test_repeated_crashes_stop_restarts(self):
+        self.cli_worker._crashes = [self.worker.time.time()] * self.worker.MAX_RESTARTS
+        result = self._call('alpha')
+        self.assertIn('crashed', result.error)
+        self.assertFalse(os.path.exists(self.marker))
+
+    def test_idle_workers_are_stopped(self):
+        self._call('alpha')
+        key = ('idle', 'worker')
+        self.worker._WORKERS[key] = self.cli_worker
+        self.assertEqual(self.worker.stop_idle(now=self.cli_worker.last_used + 0.5), 0)
+        self.assertTrue(self.cli_worker.is_alive())
+        self.assertEqual(self.worker.stop_idle(now=self.cli_worker.last_used + 2.0), 1)
+        self.assertFalse(self.cli_worker.is_alive())
+        self.assertNotIn(key, self.worker._WORKERS)
+
+    def test_search_arguments_skip_unsupported_options(self):
+        resolved = {'mode': 'code', 'limit': 5, 'backend': '', 'advanced': {}}
+        arguments = self.worker.build_search_arguments('alpha', '/repo', resolved)
+        self.assertEqual(arguments['repoPath'], '/repo')
+        self.assertEqual(arguments['output'], 'compact')
+        self.assertNotIn('repo', arguments)
+        self.assertIsNone(self.worker.build_search_arguments('alpha', '/repo', resolved, explain=True))
+        self.assertIsNone(self.worker.build_search_arguments('alpha', '/repo', dict(resolved, as_of='HEAD')))
+        lmdb = self.worker.build_search_arguments('alpha', '/repo', dict(resolved, backend='lmdb'))
+        self.assertEqual(lmdb['backend'], 'lmdb')
+        self.assertIsNone(self.worker.build_search_arguments('alpha', '/repo', dict(resolved, backend='tantivy')))
+
+
+if __name__ == '__main__':
+    unittest.main()
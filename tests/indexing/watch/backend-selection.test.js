@@ -24,4 +24,12 @@ assert.equal(pollFallback.resolved, 'chokidar', 'polling forces chokidar');
 
 delete process.env.PAIROFCLEATS_WATCHER_BACKEND;
 
+const autoEvents = resolveWatcherBackend({ runtime, pollMs: 0 });
+assert.equal(autoEvents.pollingEnabled, false, 'watch-poll 0 should disable polling');
+assert.equal(
+  autoEvents.resolved,
+  caps.watcher.parcel ? 'parcel' : 'chokidar',
+  'auto without polling should prefer parcel events'
+);
+
 console.log('watch backend selection tests passed');
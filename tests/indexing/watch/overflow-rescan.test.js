@@ -0,0 +1,137 @@
+#!/usr/bin/env node
+import assert from 'node:assert/strict';
+import fs from 'node:fs/promises';
+import path from 'node:path';
+import os from 'node:os';
+import { applyTestEnv } from '../../helpers/test-env.js';
+import { buildIgnoreMatcher } from '../../../src/index/build/ignore.js';
+import { watchIndex } from '../../../src/index/build/watch.js';
+import { markEventsLost } from '../../../src/index/build/watch/shared.js';
+import { getRepoCacheRoot } from '../../../tools/shared/dict-utils.js';
+
+const waitFor = async (predicate, timeoutMs = 5000) => {
+  const started = Date.now();
+  while (Date.now() - started < timeoutMs) {
+    if (predicate()) return;
+    await new Promise((resolve) => setTimeout(resolve, 10));
+  }
+  throw new Error('Timed out waiting for condition.');
+};
+
+const tempRoot = await fs.mkdtemp(path.join(os.tmpdir(), 'poc-watch-overflow-rescan-'));
+applyTestEnv({ cacheRoot: tempRoot });
+
+const repoRoot = path.join(tempRoot, 'repo');
+await fs.mkdir(path.join(repoRoot, 'src'), { recursive: true });
+const fileA = path.join(repoRoot, 'src', 'a.js');
+const fileB = path.join(repoRoot, 'src', 'b.js');
+const fileGone = path.join(repoRoot, 'src', 'gone.js');
+await fs.writeFile(fileA, 'export const a = 1;\n');
+await fs.writeFile(fileGone, 'export const gone = 1;\n');
+const statA = await fs.stat(fileA);
+const statGone = await fs.stat(fileGone);
+
+const userConfig = {};
+const { ignoreMatcher } = await buildIgnoreMatcher({ root: repoRoot, userConfig });
+const repoCacheRoot = getRepoCacheRoot(repoRoot, userConfig);
+const runtime = {
+  root: repoRoot,
+  repoCacheRoot,
+  userConfig,
+  ignoreMatcher,
+  maxFileBytes: null,
+  fileCaps: { default: {} },
+  guardrails: {},
+  recordsDir: path.join(repoCacheRoot, 'triage', 'records'),
+  recordsConfig: {},
+  ignoreFiles: [],
+  ignoreWarnings: [],
+  stage: null,
+  configHash: 'test',
+  toolInfo: { version: 'test' }
+};
+
+let onErrorRef = null;
+let readyResolve;
+const ready = new Promise((resolve) => { readyResolve = resolve; });
+let discoveryCalls = 0;
+const builtFiles = [];
+
+const deps = {
+  resolveWatcherBackend: () => ({
+    requested: 'parcel',
+    resolved: 'parcel',
+    warning: null,
+    pollingEnabled: false
+  }),
+  discoverFilesForModes: async () => {
+    discoveryCalls += 1;
+    if (discoveryCalls === 1) {
+      return {
+        code: [
+          { abs: fileA, rel: 'src/a.js', stat: statA },
+          { abs: fileGone, rel: 'src/gone.js', stat: statGone }
+        ]
+      };
+    }
+    return {
+      code: [
+        { abs: fileA, rel: 'src/a.js', stat: await fs.stat(fileA) },
+        { abs: fileB, rel: 'src/b.js', stat: await fs.stat(fileB) }
+      ]
+    };
+  },
+  startWatcher: async ({ onError }) => {
+    onErrorRef = onError;
+    return { close: async () => {} };
+  },
+  buildIndexForMode: async ({ discovery }) => {
+    builtFiles.push(discovery.entries.map((entry) => entry.rel).sort());
+  },
+  validateIndexArtifacts: async () => ({ ok: true, issues: [], warnings: [] }),
+  promoteBuild: async () => ({})
+};
+
+const abortController = new AbortController();
+const watchPromise = watchIndex({
+  runtime,
+  modes: ['code'],
+  pollMs: 0,
+  debounceMs: 10,
+  abortSignal: abortController.signal,
+  handleSignals: false,
+  deps,
+  onReady: () => readyResolve()
+});
+
+let testError = null;
+try {
+  await ready;
+  assert.ok(onErrorRef, 'expected watcher to register error handler');
+  // Changes made while the watcher was dropping events.
+  await fs.writeFile(fileB, 'export const b = 2;\n');
+  await fs.rm(fileGone);
+  // Only errors the backend marked as lost events trigger a rescan.
+  onErrorRef(new Error('Failed to rescan: dropped connection'));
+  assert.equal(discoveryCalls, 1, 'expected uncoded errors not to rescan');
+  onErrorRef(markEventsLost(new Error('Events were dropped by the FSEvents client. File system must be re-scanned.')));
+  await waitFor(() => builtFiles.some((files) => files.includes('src/b.js')), 5000);
+} catch (error) {
+  testError = error;
+} finally {
+  abortController.abort();
+  await watchPromise;
+  await fs.rm(tempRoot, { recursive: true, force: true });
+}
+
+if (testError) {
+  throw testError;
+}
+
+assert.equal(discoveryCalls, 2, 'expected one rescan after lost events');
+assert.deepEqual(
+  builtFiles.find((files) => files.includes('src/b.js')),
+  ['src/a.js', 'src/b.js'],
+  'expected rescan to pick up the added file and drop the deleted one'
+);
+console.log('watch overflow rescan test passed');
@@ -0,0 +1,65 @@
+#!/usr/bin/env node
+import assert from 'node:assert/strict';
+import fs from 'node:fs/promises';
+import os from 'node:os';
+import path from 'node:path';
+import { applyTestEnv } from '../../helpers/test-env.js';
+import { followStatus } from '../../../tools/api/router/status.js';
+import { getBuildsRoot, loadUserConfig } from '../../../tools/shared/dict-utils.js';
+
+const waitFor = async (predicate, timeoutMs = 5000) => {
+  const started = Date.now();
+  while (Date.now() - started < timeoutMs) {
+    if (predicate()) return;
+    await new Promise((resolve) => setTimeout(resolve, 10));
+  }
+  throw new Error('Timed out waiting for condition.');
+};
+
+const tempRoot = await fs.mkdtemp(path.join(os.tmpdir(), 'poc-status-follow-'));
+applyTestEnv({ cacheRoot: path.join(tempRoot, 'cache') });
+const repoRoot = path.join(tempRoot, 'repo');
+await fs.mkdir(repoRoot, { recursive: true });
+const buildsRoot = getBuildsRoot(repoRoot, loadUserConfig(repoRoot));
+await fs.mkdir(buildsRoot, { recursive: true });
+
+const events = [];
+let closed = false;
+const sse = {
+  isClosed: () => closed,
+  async sendEvent(event, payload) {
+    events.push({ event, payload });
+    return true;
+  }
+};
+let collected = 0;
+const abortController = new AbortController();
+const following = followStatus({
+  sse,
+  repoPath: repoRoot,
+  signal: abortController.signal,
+  pollMs: 10,
+  pingMs: 100,
+  collectStatus: async () => ({ build: ++collected })
+});
+
+try {
+  await new Promise((resolve) => setTimeout(resolve, 50));
+  assert.equal(events.length, 0, 'expected no events before a build is promoted');
+  await fs.writeFile(path.join(buildsRoot, 'current.json'), JSON.stringify({ buildId: 'b1' }));
+  await waitFor(() => events.some((entry) => entry.event === 'result'));
+  assert.deepEqual(events[0], { event: 'result', payload: { ok: true, status: { build: 1 } } });
+  await waitFor(() => events.some((entry) => entry.event === 'ping'));
+  assert.equal(collected, 1, 'expected status to be collected only when the build pointer changed');
+} finally {
+  abortController.abort();
+  await following;
+}
+
+closed = true;
+const count = events.length;
+await followStatus({ sse, repoPath: repoRoot, pollMs: 10 });
+assert.equal(events.length, count, 'expected a closed stream to end immediately');
+
+await fs.rm(tempRoot, { recursive: true, force: true });
+console.log('status stream follow test passed');
@@ -19,6 +19,7 @@ import { handleIndexDiffsRoute } from './router/index-diffs.js';
 import { handleIndexSnapshotsRoute } from './router/index-snapshots.js';
 import { handleContextPackRoute, handleRiskExplainRoute } from './router/analysis.js';
 import { buildSearchParams, buildSearchPayloadFromQuery, isNoIndexError } from './router/search.js';
+import { followStatus } from './router/status.js';
 
 const API_EDITOR_CAPABILITIES = Object.freeze({
   search: true,
@@ -64,6 +65,7 @@ export const createApiRouter = ({
   const { isAuthorized } = createAuthGuard(auth);
   const { parseJsonBody } = createBodyParser({ maxBodyBytes });
   const { resolveRepo } = createRepoResolver({ defaultRepo, allowedRepoRoots });
+  const streamsController = new AbortController();
   const { getRepoCaches, closeRepoCaches, refreshBuildPointer } = createRepoCacheManager({
     defaultRepo,
     repoCache,
@@ -261,6 +263,9 @@ export const createApiRouter = ({
           const payload = await status(repoPath);
           if (!sse.isClosed()) {
             await sse.sendEvent('result', { ok: true, status: payload });
+            if (requestUrl.searchParams.get('follow') === '1') {
+              await followStatus({ sse, repoPath, signal: streamsController.signal });
+            }
             await sse.sendEvent('done', { ok: true });
           }
         } catch (err) {
@@ -672,8 +677,19 @@ export const createApiRouter = ({
     }
   };
 
+  /**
+   * End open `/status/stream?follow=1` connections so the server can close.
+   */
+  const closeStreams = () => {
+    streamsController.abort();
+  };
+
   return {
     handleRequest,
-    close: closeRepoCaches
+    closeStreams,
+    close: () => {
+      closeStreams();
+      return closeRepoCaches();
+    }
   };
 };
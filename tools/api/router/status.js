@@ -0,0 +1,59 @@
+import fs from 'node:fs/promises';
+import path from 'node:path';
+import { setTimeout as delay } from 'node:timers/promises';
+import { status } from '../../../src/integrations/core/index.js';
+import { getBuildsRoot, loadUserConfig } from '../../shared/dict-utils.js';
+
+export const STATUS_FOLLOW_POLL_MS = 1000;
+export const STATUS_FOLLOW_PING_MS = 15000;
+
+const readStamp = async (filePath) => {
+  try {
+    const stat = await fs.stat(filePath);
+    return `${stat.mtimeMs}:${stat.size}`;
+  } catch {
+    return null;
+  }
+};
+
+/**
+ * Keep a `/status/stream?follow=1` connection open after the first snapshot.
+ *
+ * The repo's build pointer (`builds/current.json`) is checked every `pollMs`;
+ * when a build is promoted a fresh `result` is sent. A `ping` is sent after
+ * `pingMs` without events so clients can tell an idle stream from a dead one.
+ * Resolves when the client disconnects or `signal` aborts.
+ *
+ * @param {{sse:object,repoPath:string,signal?:AbortSignal,pollMs?:number,pingMs?:number,collectStatus?:Function}} input
+ * @returns {Promise<void>}
+ */
+export const followStatus = async ({
+  sse,
+  repoPath,
+  signal = null,
+  pollMs = STATUS_FOLLOW_POLL_MS,
+  pingMs = STATUS_FOLLOW_PING_MS,
+  collectStatus = status
+}) => {
+  const currentPath = path.join(getBuildsRoot(repoPath, loadUserConfig(repoPath)), 'current.json');
+  let stamp = await readStamp(currentPath);
+  let lastSentAt = Date.now();
+  while (!sse.isClosed() && !signal?.aborted) {
+    try {
+      await delay(pollMs, undefined, signal ? { signal } : undefined);
+    } catch {
+      return;
+    }
+    if (sse.isClosed()) return;
+    const next = await readStamp(currentPath);
+    if (next !== stamp) {
+      stamp = next;
+      const payload = await collectStatus(repoPath);
+      if (!await sse.sendEvent('result', { ok: true, status: payload })) return;
+      lastSentAt = Date.now();
+    } else if (Date.now() - lastSentAt >= pingMs) {
+      if (!await sse.sendEvent('ping', { ok: true })) return;
+      lastSentAt = Date.now();
+    }
+  }
+};
@@ -92,6 +92,7 @@ server.listen({ port, host }, () => {
 
 const shutdown = (signal) => {
   log(`[api] ${signal} received; shutting down...`);
+  router.closeStreams();
   server.close(() => {
     router.close();
     log('[api] shutdown complete.');